@@ -0,0 +1,31 @@
+-- Add version counters for data the backend caches in memory
+-- Each statement that changes a cached table bumps its counter in cache_versions, so
+-- backend processes can cheaply check whether their copy is still current.
+
+-- Connect to the database
+\c chemtrack
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO cache_versions (name) VALUES ('chemicals') ON CONFLICT (name) DO NOTHING;
+
+-- Bump the counter named by the trigger argument
+CREATE OR REPLACE FUNCTION bump_cache_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE cache_versions SET version = version + 1 WHERE name = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_chemicals_cache_version ON chemicals;
+CREATE TRIGGER bump_chemicals_cache_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON chemicals
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_cache_version('chemicals');
+
+-- Grant permissions to chemuser (the trigger runs as the user changing chemicals)
+GRANT SELECT, UPDATE ON cache_versions TO chemuser;
@@ -0,0 +1,20 @@
+-- Add a full-text search vector to the chemicals table
+-- The generated column combines the descriptive fields, weighted so that matches on
+-- the name, CAS number or formula rank above hazard phrases and description words.
+-- A GIN index lets the free-text chemical search run as a single indexed query.
+
+-- Connect to the database
+\c chemtrack
+
+ALTER TABLE chemicals ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(cas_number, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(chemical_formula, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(hazard_classification, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(chemical_description, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_chemicals_search_vector ON chemicals USING gin (search_vector);
+
+ANALYZE chemicals;
@@ -0,0 +1,53 @@
+-- Record when inventory crosses below its reorder level
+-- A trigger on inventory adds an event whenever a row becomes low (inserted below its
+-- reorder level, or updated from at/above it to below it). The reorder notification
+-- endpoint reads these events in delta mode so that each run only covers new crossings.
+--
+-- Events carry the ID of the transaction that wrote them. A reader uses the oldest
+-- transaction still running (pg_snapshot_xmin) as its watermark: every event below it is
+-- committed and visible, so consecutive runs see each event exactly once even when
+-- transactions commit out of order.
+--
+-- Old events can be pruned at any time, e.g.
+--   DELETE FROM inventory_reorder_events WHERE crossed_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
+
+-- Connect to the database
+\c chemtrack
+
+CREATE TABLE IF NOT EXISTS inventory_reorder_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    inventory_id INTEGER NOT NULL REFERENCES inventory(id) ON DELETE CASCADE,
+    quantity DECIMAL NOT NULL,
+    reorder_quantity DECIMAL NOT NULL,
+    xid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    crossed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_reorder_events_xid ON inventory_reorder_events(xid);
+
+CREATE OR REPLACE FUNCTION record_inventory_reorder_event()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO inventory_reorder_events (inventory_id, quantity, reorder_quantity)
+    VALUES (NEW.id, NEW.quantity, NEW.reorder_quantity);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS inventory_reorder_event_insert ON inventory;
+CREATE TRIGGER inventory_reorder_event_insert
+AFTER INSERT ON inventory
+FOR EACH ROW
+WHEN (NEW.quantity < NEW.reorder_quantity)
+EXECUTE FUNCTION record_inventory_reorder_event();
+
+DROP TRIGGER IF EXISTS inventory_reorder_event_update ON inventory;
+CREATE TRIGGER inventory_reorder_event_update
+AFTER UPDATE OF quantity, reorder_quantity ON inventory
+FOR EACH ROW
+WHEN (NEW.quantity < NEW.reorder_quantity AND NOT (OLD.quantity < OLD.reorder_quantity))
+EXECUTE FUNCTION record_inventory_reorder_event();
+
+-- Grant permissions to chemuser (the trigger runs as the user updating inventory)
+GRANT SELECT, INSERT, DELETE ON inventory_reorder_events TO chemuser;
+GRANT USAGE, SELECT ON SEQUENCE inventory_reorder_events_event_id_seq TO chemuser;
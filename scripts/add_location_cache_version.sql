@@ -0,0 +1,14 @@
+-- Add a cache version counter for locations
+-- The backend keeps the building/room/locker hierarchy in memory and reloads it when this
+-- counter moves. Requires scripts/add_cache_versions.sql.
+
+-- Connect to the database
+\c chemtrack
+
+INSERT INTO cache_versions (name) VALUES ('locations') ON CONFLICT (name) DO NOTHING;
+
+DROP TRIGGER IF EXISTS bump_locations_cache_version ON locations;
+CREATE TRIGGER bump_locations_cache_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON locations
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_cache_version('locations');
@@ -0,0 +1,41 @@
+-- Make each building/room/locker combination unique in locations
+-- The backend relies on this constraint instead of checking for duplicates before it
+-- creates or updates a location. Existing duplicates are merged into the lowest
+-- location_id first, moving their inventory with them.
+
+-- Connect to the database
+\c chemtrack
+
+BEGIN;
+
+UPDATE inventory i
+SET location_id = keep.location_id
+FROM locations dup
+    JOIN (
+        SELECT building_name, lab_room_number, locker_number, min(location_id) AS location_id
+        FROM locations
+        GROUP BY building_name, lab_room_number, locker_number
+        HAVING count(*) > 1
+    ) keep USING (building_name, lab_room_number, locker_number)
+WHERE i.location_id = dup.location_id
+  AND dup.location_id <> keep.location_id;
+
+DELETE FROM locations dup
+USING locations keep
+WHERE keep.building_name = dup.building_name
+  AND keep.lab_room_number = dup.lab_room_number
+  AND keep.locker_number = dup.locker_number
+  AND keep.location_id < dup.location_id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'locations_building_room_locker_key'
+    ) THEN
+        ALTER TABLE locations
+        ADD CONSTRAINT locations_building_room_locker_key
+        UNIQUE (building_name, lab_room_number, locker_number);
+    END IF;
+END $$;
+
+COMMIT;
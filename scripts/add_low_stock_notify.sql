@@ -0,0 +1,26 @@
+-- Publish low-stock crossings on the inventory_low_stock notification channel
+-- Extends the reorder event trigger from add_inventory_reorder_events.sql so that each
+-- recorded crossing is also sent with NOTIFY. Notifications are delivered when the
+-- updating transaction commits; the backend's low-stock listener batches them into alerts.
+
+-- Connect to the database
+\c chemtrack
+
+CREATE OR REPLACE FUNCTION record_inventory_reorder_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    new_event_id BIGINT;
+BEGIN
+    INSERT INTO inventory_reorder_events (inventory_id, quantity, reorder_quantity)
+    VALUES (NEW.id, NEW.quantity, NEW.reorder_quantity)
+    RETURNING event_id INTO new_event_id;
+
+    PERFORM pg_notify('inventory_low_stock', json_build_object(
+        'event_id', new_event_id,
+        'inventory_id', NEW.id,
+        'quantity', NEW.quantity,
+        'reorder_quantity', NEW.reorder_quantity
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,75 @@
+-- Support fast reorder notification lookups
+-- A partial index covers only inventory below its reorder level, and the
+-- user_notification_scopes table holds, for each user with reorder notifications on,
+-- the building and lab room they want notifications for. A trigger on user_preferences
+-- keeps the table current, so the notification query no longer pivots preferences.
+
+-- Connect to the database
+\c chemtrack
+
+-- Low-stock inventory by location (only rows below their reorder level are indexed)
+CREATE INDEX IF NOT EXISTS idx_inventory_low_stock ON inventory(location_id)
+    INCLUDE (chemical_id, quantity, reorder_quantity)
+    WHERE quantity < reorder_quantity;
+
+-- One row per user with reorder notifications turned on.
+-- A NULL building or lab room means notifications for all buildings or lab rooms.
+CREATE TABLE IF NOT EXISTS user_notification_scopes (
+    user_name VARCHAR(40) PRIMARY KEY,
+    building_name VARCHAR(50),
+    lab_room_number INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_notification_scopes_location
+    ON user_notification_scopes(building_name, lab_room_number);
+
+-- Rebuild the scope row of one user from their preferences
+CREATE OR REPLACE FUNCTION refresh_user_notification_scope(p_user_name VARCHAR)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM user_notification_scopes WHERE user_name = p_user_name;
+
+    INSERT INTO user_notification_scopes (user_name, building_name, lab_room_number)
+    SELECT
+        p_user_name,
+        NULLIF(TRIM(MAX(preference_value) FILTER (WHERE preference_key = 'building')), ''),
+        NULLIF(TRIM(MAX(preference_value) FILTER (WHERE preference_key = 'lab_room')), '')::INTEGER
+    FROM user_preferences
+    WHERE user_name = p_user_name
+    HAVING BOOL_OR(preference_key = 'reorder_notification' AND preference_value = 'on')
+        -- Lab rooms are 0-9999 and building names at most 50 characters (see locations);
+        -- a preference outside that cannot match any location and is not cast
+        AND COALESCE(TRIM(MAX(preference_value) FILTER (WHERE preference_key = 'lab_room')), '') ~ '^([0-9]{1,4})?$'
+        AND COALESCE(LENGTH(TRIM(MAX(preference_value) FILTER (WHERE preference_key = 'building'))), 0) <= 50;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_user_notification_scope()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE')
+            AND OLD.preference_key IN ('building', 'lab_room', 'reorder_notification') THEN
+        PERFORM refresh_user_notification_scope(OLD.user_name);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE')
+            AND NEW.preference_key IN ('building', 'lab_room', 'reorder_notification') THEN
+        PERFORM refresh_user_notification_scope(NEW.user_name);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_user_notification_scope ON user_preferences;
+CREATE TRIGGER sync_user_notification_scope
+AFTER INSERT OR UPDATE OR DELETE ON user_preferences
+FOR EACH ROW
+EXECUTE FUNCTION sync_user_notification_scope();
+
+-- Grant permissions to chemuser (the trigger runs as the user changing preferences)
+GRANT SELECT, INSERT, UPDATE, DELETE ON user_notification_scopes TO chemuser;
+
+-- Backfill scopes for existing users
+SELECT refresh_user_notification_scope(user_name) FROM (SELECT DISTINCT user_name FROM user_preferences) u;
+
+ANALYZE inventory;
+ANALYZE user_notification_scopes;
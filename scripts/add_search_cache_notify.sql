@@ -0,0 +1,99 @@
+-- Publish search cache invalidations on the search_cache notification channel
+-- Every backend process caches search results in memory and listens on this channel.
+-- Inventory updates and deletes send the changed inventory IDs, so each process drops only
+-- the searches they can affect; inserts, moved inventory and any change to chemicals or
+-- locations ask for every cached search to be dropped. NOTIFY writes no table row, so
+-- concurrent inventory transactions do not wait on each other, and notifications are
+-- delivered when the changing transaction commits.
+
+-- Connect to the database
+\c chemtrack
+
+-- Replaces the inventory counter an earlier version of this change kept in cache_versions
+DROP TRIGGER IF EXISTS bump_inventory_cache_version ON inventory;
+DELETE FROM cache_versions WHERE name = 'inventory';
+
+-- Send the inventory IDs a statement changed, or ask for a full flush
+CREATE OR REPLACE FUNCTION notify_search_cache_inventory()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_ids JSON;
+    flush_all BOOLEAN := FALSE;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- Inventory moved to another location or chemical can join searches it was not in
+        SELECT json_agg(n.id),
+               COALESCE(BOOL_OR(n.location_id IS DISTINCT FROM o.location_id
+                                OR n.chemical_id IS DISTINCT FROM o.chemical_id), FALSE)
+        INTO changed_ids, flush_all
+        FROM new_rows n JOIN old_rows o ON o.id = n.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(id) INTO changed_ids FROM old_rows;
+    ELSE
+        -- New inventory can join any search
+        SELECT json_agg(id) INTO changed_ids FROM new_rows;
+        flush_all := TRUE;
+    END IF;
+
+    -- The statement changed no rows
+    IF changed_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- NOTIFY payloads must stay under 8000 bytes
+    IF flush_all OR octet_length(changed_ids::text) > 7900 THEN
+        PERFORM pg_notify('search_cache', '{"all": true}');
+    ELSE
+        PERFORM pg_notify('search_cache', json_build_object('inventory_ids', changed_ids)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ask for every cached search to be dropped
+CREATE OR REPLACE FUNCTION notify_search_cache_all()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('search_cache', '{"all": true}');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_search_cache_inventory_insert ON inventory;
+CREATE TRIGGER notify_search_cache_inventory_insert
+AFTER INSERT ON inventory
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_inventory();
+
+DROP TRIGGER IF EXISTS notify_search_cache_inventory_update ON inventory;
+CREATE TRIGGER notify_search_cache_inventory_update
+AFTER UPDATE ON inventory
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_inventory();
+
+DROP TRIGGER IF EXISTS notify_search_cache_inventory_delete ON inventory;
+CREATE TRIGGER notify_search_cache_inventory_delete
+AFTER DELETE ON inventory
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_inventory();
+
+DROP TRIGGER IF EXISTS notify_search_cache_inventory_truncate ON inventory;
+CREATE TRIGGER notify_search_cache_inventory_truncate
+AFTER TRUNCATE ON inventory
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_all();
+
+DROP TRIGGER IF EXISTS notify_search_cache_chemicals ON chemicals;
+CREATE TRIGGER notify_search_cache_chemicals
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON chemicals
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_all();
+
+DROP TRIGGER IF EXISTS notify_search_cache_locations ON locations;
+CREATE TRIGGER notify_search_cache_locations
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON locations
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_search_cache_all();
@@ -0,0 +1,16 @@
+-- Add indexes used by the chemical search
+-- Foreign keys are not indexed automatically; these let the search join and filter by
+-- location without scanning inventory, and let the default name ordering walk an index
+-- when only the first page of results is requested
+
+-- Connect to the database
+\c chemtrack
+
+CREATE INDEX IF NOT EXISTS idx_inventory_chemical_id ON inventory(chemical_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_location_id ON inventory(location_id);
+CREATE INDEX IF NOT EXISTS idx_locations_building_room_locker ON locations(building_name, lab_room_number, locker_number);
+CREATE INDEX IF NOT EXISTS idx_chemicals_name ON chemicals(name);
+
+ANALYZE inventory;
+ANALYZE locations;
+ANALYZE chemicals;
@@ -0,0 +1,14 @@
+-- Enable trigram indexes for chemical substring search
+-- The chemical search filters with ILIKE '%term%', which a btree index cannot serve.
+-- pg_trgm GIN indexes can, and also provide similarity() for relevance ordering.
+-- Must be run by a user allowed to create extensions (rds_superuser on RDS)
+
+-- Connect to the database
+\c chemtrack
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_chemicals_name_trgm ON chemicals USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_chemicals_hazard_classification_trgm ON chemicals USING gin (hazard_classification gin_trgm_ops);
+
+ANALYZE chemicals;
@@ -0,0 +1,27 @@
+-- Narrow user_notification_scopes.building_name to VARCHAR(50)
+-- Earlier versions of add_reorder_notification_scopes.sql created the column as
+-- VARCHAR(200). locations.building_name is VARCHAR(50), so a longer scope building
+-- cannot match any location and those users never receive reorder notifications.
+-- This script lists the scope rows it removes, deletes them and narrows the column.
+-- The users' preferences are not changed; a scope row is rebuilt when they next
+-- save a building of at most 50 characters.
+-- Run it once, only on databases where the column is still wider than 50 characters.
+
+-- Connect to the database
+\c chemtrack
+
+BEGIN;
+
+-- Scope rows that will be removed
+SELECT user_name, building_name, LENGTH(building_name) AS building_name_length
+FROM user_notification_scopes
+WHERE LENGTH(building_name) > 50
+ORDER BY user_name;
+
+DELETE FROM user_notification_scopes WHERE LENGTH(building_name) > 50;
+
+ALTER TABLE user_notification_scopes ALTER COLUMN building_name TYPE VARCHAR(50);
+
+COMMIT;
+
+ANALYZE user_notification_scopes;
@@ -1,7 +1,6 @@
 import os
 import time
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response
-import requests
 import logging
 import api_client
 
@@ -47,6 +46,20 @@ def after_metrics_request(response):
     request_latency = time.time() - request.start_time
     return response
 
+def error_header_html(username):
+    """Header shown when the shared-templates service cannot be reached"""
+    return f"""
+    <header class="header">
+        <div class="header-left">
+            <h1 class="header-title">ChemTrack (Error Header)</h1>
+        </div>
+        <div class="header-user">
+            <span class="header-user-name">{username}</span>
+            <a href="/logout" class="logout-btn">Logout</a>
+        </div>
+    </header>
+    """
+
 def get_shared_header(username, user_account_enabled=True):
     """Get the shared header from the shared-templates service"""
     try:
@@ -56,7 +69,7 @@ def get_shared_header(username, user_account_enabled=True):
             'user_account_enabled': str(user_account_enabled).lower()
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
         if response.status_code == 200:
             header_html = response.text
             return header_html
@@ -76,18 +89,28 @@ def get_shared_header(username, user_account_enabled=True):
             """
     except Exception as e:
         logger.error(f"Exception fetching shared header: {str(e)}")
-        # Fallback header for debugging
-        return f"""
-        <header class="header">
-            <div class="header-left">
-                <h1 class="header-title">ChemTrack (Error Header)</h1>
-            </div>
-            <div class="header-user">
-                <span class="header-user-name">{username}</span>
-                <a href="/logout" class="logout-btn">Logout</a>
-            </div>
-        </header>
-        """
+        return error_header_html(username)
+
+def error_navigation_html():
+    """Navigation shown when the shared-templates service cannot be reached"""
+    return """
+    <nav class="nav-sidebar">
+        <ul class="nav-list">
+            <li class="nav-item">
+                <a href="/" class="nav-link active">
+                    <span class="nav-icon">🏠</span>
+                    Home (Error)
+                </a>
+            </li>
+            <li class="nav-item">
+                <a href="/search" class="nav-link">
+                    <span class="nav-icon">🔍</span>
+                    Search (Error)
+                </a>
+            </li>
+        </ul>
+    </nav>
+    """
 
 def get_shared_navigation(role, active_page, current_path=''):
     """Get the shared navigation from the shared-templates service"""
@@ -101,7 +124,7 @@ def get_shared_navigation(role, active_page, current_path=''):
             'recipes_url': PRC_RECIPES
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
         if response.status_code == 200:
             nav_html = response.text
             return nav_html
@@ -128,25 +151,7 @@ def get_shared_navigation(role, active_page, current_path=''):
             """
     except Exception as e:
         logger.error(f"Exception fetching shared navigation: {str(e)}")
-        # Fallback navigation for debugging
-        return """
-        <nav class="nav-sidebar">
-            <ul class="nav-list">
-                <li class="nav-item">
-                    <a href="/" class="nav-link active">
-                        <span class="nav-icon">🏠</span>
-                        Home (Error)
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="/search" class="nav-link">
-                        <span class="nav-icon">🔍</span>
-                        Search (Error)
-                    </a>
-                </li>
-            </ul>
-        </nav>
-        """
+        return error_navigation_html()
 
 def check_admin_access():
     """Check if user has admin access (manager or administrator role)"""
@@ -174,6 +179,90 @@ def require_admin_access():
         
     return None
 
+def get_users():
+    """
+    Get the list of users from the backend
+    
+    Returns:
+        tuple: (users, error message or None)
+    """
+    try:
+        response = api_client.get(f"{PRC_BACKEND}/backend/users")
+        if response.status_code != 200:
+            logger.error(f"Error fetching users: {response.text}")
+            return [], "Failed to fetch users"
+        
+        # Process users to ensure preferences are properly formatted
+        users = []
+        for user in response.json().get('users', []):
+            processed_user = {
+                'username': user.get('username', ''),
+                'email': user.get('email', ''),
+                'role': user.get('role', ''),
+                'preferences': {}
+            }
+            
+            # Make sure preferences are properly structured
+            if 'preferences' in user and user['preferences']:
+                processed_user['preferences'] = {
+                    'building': user['preferences'].get('building', ''),
+                    'lab_room': str(user['preferences'].get('lab_room', ''))  # Ensure lab_room is a string
+                }
+                logger.info(f"User {processed_user['username']} preferences: {processed_user['preferences']}")
+            
+            users.append(processed_user)
+        return users, None
+    except Exception as e:
+        logger.error(f"Exception fetching users: {str(e)}")
+        return [], str(e)
+
+def get_locations():
+    """
+    Get the list of locations from the backend
+    
+    Returns:
+        tuple: (locations, error message or None)
+    """
+    try:
+        response = api_client.get(f"{PRC_BACKEND}/backend/locations")
+        if response.status_code == 200:
+            return response.json().get('locations', []), None
+        logger.error(f"Error fetching locations: {response.text}")
+        return [], "Failed to fetch locations"
+    except Exception as e:
+        logger.error(f"Exception fetching locations: {str(e)}")
+        return [], str(e)
+
+def get_location_tree():
+    """Get buildings with their lab rooms (pages filter lab rooms client-side), empty on error"""
+    try:
+        location_tree_response = api_client.get_cached(f"{PRC_BACKEND}/backend/location_tree")
+        if location_tree_response.status_code == 200:
+            return location_tree_response.json().get('buildings', {})
+    except Exception as e:
+        logger.error(f"Error fetching location tree: {str(e)}")
+    return {}
+
+def get_buildings():
+    """Get the list of buildings for filters, empty on error"""
+    try:
+        buildings_response = api_client.get_cached(f"{PRC_BACKEND}/backend/buildings")
+        if buildings_response.status_code == 200:
+            return buildings_response.json().get('buildings', [])
+    except Exception as e:
+        logger.error(f"Error fetching buildings: {str(e)}")
+    return []
+
+def get_roles():
+    """Get the list of roles, empty on error"""
+    try:
+        roles_response = api_client.get(f"{PRC_BACKEND}/backend/roles")
+        if roles_response.status_code == 200:
+            return roles_response.json().get('roles', [])
+    except Exception as e:
+        logger.error(f"Error fetching roles: {str(e)}")
+    return []
+
 @app.route('/admin')
 def admin_index():
     """Admin index page"""
@@ -182,8 +271,12 @@ def admin_index():
     role = session.get('role', '')
     
     # Get shared header and navigation
-    header_html = get_shared_header(username, True)
-    navigation_html = get_shared_navigation(role, 'admin', request.path)
+    page = api_client.fan_out({
+        'header_html': (get_shared_header, (username, True), error_header_html(username)),
+        'navigation_html': (get_shared_navigation, (role, 'admin', request.path), error_navigation_html()),
+    })
+    header_html = page['header_html']
+    navigation_html = page['navigation_html']
     
     return render_template('admin_index.html',
                           username=username,
@@ -198,72 +291,27 @@ def user_management():
     username = session.get('user', '')
     role = session.get('role', '')
     
-    # Get shared header and navigation
-    header_html = get_shared_header(username, True)
-    navigation_html = get_shared_navigation(role, 'admin', request.path)
-    
-    # Get list of users
-    try:
-        conn = None
-        users = []
-        error = None
-        
-        # Get users from backend
-        response = api_client.get(f"{PRC_BACKEND}/backend/users")
-        if response.status_code == 200:
-            users_data = response.json().get('users', [])
-            # Process users to ensure preferences are properly formatted
-            users = []
-            for user in users_data:
-                processed_user = {
-                    'username': user.get('username', ''),
-                    'email': user.get('email', ''),
-                    'role': user.get('role', ''),
-                    'preferences': {}
-                }
-                
-                # Make sure preferences are properly structured
-                if 'preferences' in user and user['preferences']:
-                    processed_user['preferences'] = {
-                        'building': user['preferences'].get('building', ''),
-                        'lab_room': str(user['preferences'].get('lab_room', ''))  # Ensure lab_room is a string
-                    }
-                    logger.info(f"User {processed_user['username']} preferences: {processed_user['preferences']}")
-                
-                users.append(processed_user)
-        else:
-            error = "Failed to fetch users"
-            logger.error(f"Error fetching users: {response.text}")
-    except Exception as e:
-        error = str(e)
-        logger.error(f"Exception fetching users: {str(e)}")
-        users = []
-    
-    # Get list of buildings
-    try:
-        buildings_response = api_client.get(f"{PRC_BACKEND}/backend/buildings")
-        buildings = []
-        if buildings_response.status_code == 200:
-            buildings = buildings_response.json().get('buildings', [])
-    except Exception as e:
-        buildings = []
-        logger.error(f"Error fetching buildings: {str(e)}")
-        
-    # Get list of roles
-    try:
-        roles_response = api_client.get(f"{PRC_BACKEND}/backend/roles")
-        roles = []
-        if roles_response.status_code == 200:
-            roles = roles_response.json().get('roles', [])
-    except Exception as e:
-        roles = []
-        logger.error(f"Error fetching roles: {str(e)}")
+    # Get users, locations, roles and shared components concurrently
+    page = api_client.fan_out({
+        'users': (get_users, (), ([], "Failed to fetch users")),
+        'location_tree': (get_location_tree, (), {}),
+        'roles': (get_roles, (), []),
+        'header_html': (get_shared_header, (username, True), error_header_html(username)),
+        'navigation_html': (get_shared_navigation, (role, 'admin', request.path), error_navigation_html()),
+    })
+    users, error = page['users']
+    location_tree = page['location_tree']
+    buildings = list(location_tree)
+    roles = page['roles']
+    header_html = page['header_html']
+    navigation_html = page['navigation_html']
     
     return render_template('user_management.html',
                           username=username,
                           role=role,
                           users=users,
                           buildings=buildings,
+                          location_tree=location_tree,
                           roles=roles,
                           error=error,
                           static_url=PRC_STATIC + "/static",
@@ -277,37 +325,17 @@ def location_management():
     username = session.get('user', '')
     role = session.get('role', '')
     
-    # Get shared header and navigation
-    header_html = get_shared_header(username, True)
-    navigation_html = get_shared_navigation(role, 'admin', request.path)
-    
-    # Get list of locations
-    try:
-        conn = None
-        locations = []
-        error = None
-        
-        # Get locations from backend
-        response = api_client.get(f"{PRC_BACKEND}/backend/locations")
-        if response.status_code == 200:
-            locations = response.json().get('locations', [])
-        else:
-            error = "Failed to fetch locations"
-            logger.error(f"Error fetching locations: {response.text}")
-    except Exception as e:
-        error = str(e)
-        logger.error(f"Exception fetching locations: {str(e)}")
-        locations = []
-    
-    # Get list of buildings for filter
-    try:
-        buildings_response = api_client.get(f"{PRC_BACKEND}/backend/buildings")
-        buildings = []
-        if buildings_response.status_code == 200:
-            buildings = buildings_response.json().get('buildings', [])
-    except Exception as e:
-        buildings = []
-        logger.error(f"Error fetching buildings: {str(e)}")
+    # Get locations, buildings and shared components concurrently
+    page = api_client.fan_out({
+        'locations': (get_locations, (), ([], "Failed to fetch locations")),
+        'buildings': (get_buildings, (), []),
+        'header_html': (get_shared_header, (username, True), error_header_html(username)),
+        'navigation_html': (get_shared_navigation, (role, 'admin', request.path), error_navigation_html()),
+    })
+    locations, error = page['locations']
+    buildings = page['buildings']
+    header_html = page['header_html']
+    navigation_html = page['navigation_html']
     
     return render_template('location_management.html',
                           username=username,
@@ -339,7 +367,7 @@ def logout():
 def get_lab_rooms(building):
     """Proxy to get lab rooms for a building from the backend"""
     try:
-        response = api_client.get(f"{PRC_BACKEND}/backend/lab_rooms/{building}")
+        response = api_client.get_cached(f"{PRC_BACKEND}/backend/lab_rooms/{building}")
         if response.status_code == 200:
             return response.json()
         else:
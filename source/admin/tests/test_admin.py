@@ -13,6 +13,7 @@ os.environ['SECRET_KEY'] = 'test_secret_key'
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import admin after setting environment variables
 import admin
+import api_client
 
 @pytest.fixture
 def client():
@@ -47,16 +48,20 @@ def mock_session_user_technician():
 
 @pytest.fixture
 def mock_requests_get():
-    """Mock requests.get for shared components"""
-    with patch('requests.get') as mock_get:
+    """Mock the pooled session's GET for shared components"""
+    # Start each test without cached fragments
+    api_client._fragment_cache.clear()
+    with patch('requests.Session.get') as mock_get:
         # Setup mock response for header
         mock_header_response = Mock()
         mock_header_response.status_code = 200
+        mock_header_response.headers = {"ETag": '"header-v1"', "X-Templates-Version": "v1"}
         mock_header_response.text = "<header>Test Admin Header</header>"
         
         # Setup mock response for navigation
         mock_nav_response = Mock()
         mock_nav_response.status_code = 200
+        mock_nav_response.headers = {"ETag": '"nav-v1"', "X-Templates-Version": "v1"}
         mock_nav_response.text = "<nav>Test Admin Navigation</nav>"
         
         # Configure the mock to return different responses based on URL
@@ -68,6 +73,7 @@ def mock_requests_get():
             else:
                 mock_default = Mock()
                 mock_default.status_code = 404
+                mock_default.headers = {}
                 return mock_default
                 
         mock_get.side_effect = mock_get_response
@@ -162,10 +168,11 @@ def test_user_management(client, mock_session_user_admin, mock_requests_get, moc
         ]
     }
     
-    buildings_response = MagicMock()
-    buildings_response.status_code = 200
-    buildings_response.json.return_value = {
-        "buildings": ["Building A", "Building B"]
+    location_tree_response = MagicMock()
+    location_tree_response.status_code = 200
+    location_tree_response.json.return_value = {
+        "success": True,
+        "buildings": {"Building A": {"101": [1, 2]}, "Building B": {"202": [1]}}
     }
     
     roles_response = MagicMock()
@@ -175,7 +182,7 @@ def test_user_management(client, mock_session_user_admin, mock_requests_get, moc
     }
     
     # Set up the expected sequence of responses
-    mock_api_client["get"].side_effect = [users_response, buildings_response, roles_response]
+    mock_api_client["get"].side_effect = [users_response, location_tree_response, roles_response]
     
     with client.session_transaction() as sess:
         sess['user'] = 'admin_user'
@@ -188,6 +195,10 @@ def test_user_management(client, mock_session_user_admin, mock_requests_get, moc
     # Check for structural elements rather than specific content
     # that might be dynamically populated via JavaScript
     assert b'user-management' in response.data or b'table' in response.data or b'form' in response.data
+    
+    # Lab rooms are filtered client-side from the embedded location tree
+    assert b'Building B' in response.data
+    assert b'"Building A": {"101": [1, 2]}' in response.data
 
 def test_location_management(client, mock_session_user_admin, mock_requests_get, mock_api_client):
     """Test the location management page"""
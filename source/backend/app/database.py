@@ -1,77 +1,70 @@
 import os
-import json
-import boto3
-import psycopg2
-import psycopg2.extras
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+import psycopg
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 import logging
 from fastapi import HTTPException
+from .utils.secret_provider import get_secret_provider
 
 logging.basicConfig(level=logging.WARN)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-def get_db_connection():
-    """Get database connection from AWS Secrets Manager or local configuration"""
-    
-    try:
-        # Get database URL from AWS Secrets Manager
-        aws_region = os.environ.get('AWS_REGION', 'us-east-1')
+def _is_authentication_error(err: Exception) -> bool:
+    """True when the server rejected the supplied credentials"""
+    return getattr(err, 'sqlstate', None) in ('28P01', '28000') or 'authentication failed' in str(err)
+
+def _connection_kwargs(creds):
+    return {
+        "dbname": creds['dbname'],
+        "user": creds['user'],
+        "password": creds['password'],
+        "host": creds['host'],
+        "port": creds['port'],
+        "connect_timeout": 10,  # Set connection timeout
+    }
+
+async def _current_connection_kwargs():
+    """Connection settings from the cached secret provider (blocking fetches run off the event loop)"""
+    creds = await asyncio.to_thread(get_secret_provider().get_db_credentials)
+    logger.info(f"Connecting to database - Host: {creds['host']}, User: {creds['user']}")
+    return _connection_kwargs(creds)
+
+class RotatingCredentialsConnection(psycopg.AsyncConnection):
+    """AsyncConnection that re-fetches secrets and retries once when authentication fails"""
+
+    @classmethod
+    async def connect(cls, conninfo: str = "", **kwargs):
         try:
-            logger.debug(f"Initializing boto3 session with region: {aws_region}")
-            session = boto3.session.Session(region_name=aws_region)
-            client = session.client(service_name='secretsmanager', region_name=aws_region)
-        except Exception as boto_err:
-            logger.error(f"Failed to initialize boto3 client: {str(boto_err)}")
-            raise Exception(f"AWS client initialization failed: {str(boto_err)}")
-        
-        # Get database URL from secrets
+            return await super().connect(conninfo, **kwargs)
+        except psycopg.OperationalError as auth_err:
+            if not _is_authentication_error(auth_err):
+                raise
+            # The password may have been rotated since it was cached; re-fetch and retry once
+            logger.warning("Database rejected cached credentials, refreshing secrets and retrying")
+            creds = await asyncio.to_thread(get_secret_provider().refresh)
+            kwargs.update(_connection_kwargs(creds))
+            return await super().connect(conninfo, **kwargs)
+
+async def get_db_connection():
+    """Open a new, unpooled database connection using the cached secret provider"""
+
+    try:
         try:
-            secret_name = "env-vars"
-            logger.debug(f"Getting secret: {secret_name}")
-            get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-            secret = json.loads(get_secret_value_response['SecretString'])
-            db_url = secret.get('db_url')
-            if not db_url:
-                logger.error("db_url not found in secrets")
-                raise Exception("Database URL not found in secrets")
+            kwargs = await _current_connection_kwargs()
         except Exception as secret_err:
-            logger.error(f"Failed to get DB URL from secrets: {str(secret_err)}")
-            raise Exception(f"Error retrieving database URL: {str(secret_err)}")
-        
-        # Get database credentials from AWS Secrets Manager
-        try:
-            secret_name = "chemtrack-db-app-user"
-            logger.debug(f"Getting secret: {secret_name}")
-            get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-            db_creds = json.loads(get_secret_value_response['SecretString'])
-            username = db_creds.get('username')
-            password = db_creds.get('password')
-            
-            if not username or not password:
-                logger.error("Database credentials incomplete")
-                raise Exception("Database credentials not properly configured")
-        except Exception as cred_err:
-            logger.error(f"Failed to get DB credentials from secrets: {str(cred_err)}")
-            raise Exception(f"Error retrieving database credentials: {str(cred_err)}")
-
-        # Parse the db_url to get host
-        # Assuming db_url is in format: hostname:port or just hostname
-        host = db_url.split(':')[0] if ':' in db_url else db_url
-        logger.info(f"Connecting to database - Host: {host}, User: {username}")        
-        
+            logger.error(f"Failed to get database credentials: {str(secret_err)}")
+            raise Exception(f"Error retrieving database credentials: {str(secret_err)}")
+
         # Create database connection
         try:
-            conn = psycopg2.connect(
-                dbname="chemtrack",
-                user=username,
-                password=password,
-                host=host,
-                port=5432,
-                connect_timeout=10  # Set connection timeout
-            )
+            conn = await RotatingCredentialsConnection.connect(**kwargs)
             logger.info("Database connection established successfully")
             return conn
-        except psycopg2.OperationalError as op_err:
+        except psycopg.OperationalError as op_err:
             logger.error(f"Database operational error: {str(op_err)}")
             raise Exception(f"Could not connect to database: {str(op_err)}")
         except Exception as conn_err:
@@ -80,3 +73,75 @@ def get_db_connection():
     except Exception as e:
         logger.error(f"Failed to get database connection: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
+
+# Time each pooled connection was last returned, used to skip health checks on warm connections
+_last_returned = weakref.WeakKeyDictionary()
+_check_after = float(os.environ.get('DB_POOL_CHECK_AFTER', '30'))
+
+async def _mark_returned(conn):
+    _last_returned[conn] = time.monotonic()
+
+async def _check_if_idle(conn):
+    """Ping connections that have been idle longer than DB_POOL_CHECK_AFTER before reuse"""
+    if time.monotonic() - _last_returned.get(conn, 0.0) > _check_after:
+        await AsyncConnectionPool.check_connection(conn)
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+async def init_pool():
+    """Create and open the process-wide connection pool (called at app startup)"""
+    global _pool
+    async with _pool_lock:
+        if _pool is None:
+            pool = AsyncConnectionPool(
+                connection_class=RotatingCredentialsConnection,
+                kwargs=_current_connection_kwargs,
+                min_size=int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+                max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                max_idle=float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+                max_lifetime=float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),
+                timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                check=_check_if_idle,
+                reset=_mark_returned,
+                name="chemtrack",
+                open=False,
+            )
+            # Don't block startup on the database; the pool keeps connecting in the background
+            await pool.open(wait=False)
+            logger.info(f"Connection pool opened (min={pool.min_size}, max={pool.max_size})")
+            _pool = pool
+        return _pool
+
+async def close_pool():
+    """Close the process-wide connection pool (called at app shutdown)"""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+            logger.info("Connection pool closed")
+
+async def get_pool():
+    """Return the process-wide pool, creating it on first use outside the app lifespan"""
+    return _pool if _pool is not None else await init_pool()
+
+@asynccontextmanager
+async def db_connection():
+    """
+    Check a pooled connection out for the duration of an async with block
+
+    The transaction is committed when the block exits normally and rolled back on error.
+    """
+    pool = await get_pool()
+    try:
+        async with pool.connection() as conn:
+            yield conn
+    except PoolTimeout as e:
+        logger.error(f"Database connection pool exhausted: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Database connection error: {str(e)}")
+
+async def get_db():
+    """FastAPI dependency that yields a pooled connection and returns it afterwards"""
+    async with db_connection() as conn:
+        yield conn
@@ -1,22 +1,51 @@
 import os
 import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
-from .routes import auth, user, preference, location, chemical, report
+from .routes import auth, user, preference, location, chemical, report, bulk_import, export
 from .utils.api_security import ApiKeyMiddleware
+from .database import init_pool, close_pool, db_connection
+from .services.low_stock_listener import create_low_stock_listener
+from .services.search_cache_listener import SearchCacheListener
+from .utils.search_cache import get_search_cache
 
 # Setup logging
 logging.basicConfig(level=logging.WARN)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the shared database connection pool once per process
+
+    Also starts the search cache listener when the search cache is enabled, and the
+    low-stock listener if enabled.
+    """
+    await init_pool()
+    listener_tasks = []
+    if get_search_cache().enabled:
+        listener_tasks.append(asyncio.create_task(SearchCacheListener().run()))
+    if os.environ.get('LOW_STOCK_LISTENER', 'false').lower() == 'true':
+        listener_tasks.append(asyncio.create_task(create_low_stock_listener().run()))
+    yield
+    for listener_task in listener_tasks:
+        listener_task.cancel()
+        try:
+            await listener_task
+        except asyncio.CancelledError:
+            pass
+    await close_pool()
+
 # Create FastAPI app
-app = FastAPI(title="ChemTrack Backend API")
+app = FastAPI(title="ChemTrack Backend API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -40,7 +69,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 # Health check endpoint
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     # For local development, just return healthy without checking the database
     if os.environ.get('LOCAL_DEV') == 'true':
@@ -48,10 +77,8 @@ def health_check():
     
     # Otherwise, try to connect to the database to verify health
     try:
-        from .database import get_db_connection
-        conn = get_db_connection()
-        if conn:
-            conn.close()
+        async with db_connection() as conn:
+            await conn.execute("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         # Don't fail the health check, but include the error
@@ -64,6 +91,8 @@ app.include_router(preference.router)
 app.include_router(location.router)
 app.include_router(chemical.router)
 app.include_router(report.router)
+app.include_router(bulk_import.router)
+app.include_router(export.router)
 
 # Run application
 if __name__ == "__main__":
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+class ImportRowError(BaseModel):
+    row: int  # record number in the file, starting at 1 (CSV header not counted)
+    messages: List[str]
+
+class InventoryImportResponse(BaseModel):
+    success: bool
+    rows_received: int = 0
+    rows_imported: int = 0
+    chemicals_created: int = 0
+    chemicals_updated: int = 0
+    locations_created: int = 0
+    error_count: int = 0
+    errors: List[ImportRowError] = []  # first 1000 invalid records
+    message: Optional[str] = None
@@ -24,6 +24,15 @@ class ChemicalDetailsResponse(BaseModel):
     chemical: Optional[Dict[str, Any]] = None
     message: Optional[str] = None
 
+class ChemicalsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)  # inventory IDs
+
+class ChemicalsResponse(BaseModel):
+    success: bool
+    chemicals: List[Dict[str, Any]] = []
+    missing_ids: List[int] = []
+    message: Optional[str] = None
+
 class InventoryUpdateRequest(BaseModel):
     inventory_id: int
     quantity: float = Field(..., gt=0)
@@ -34,18 +43,54 @@ class InventoryUpdateResponse(BaseModel):
     new_quantity: float
     message: Optional[str] = None
 
+class InventoryBatchUpdateRequest(BaseModel):
+    items: List[InventoryUpdateRequest] = Field(..., min_length=1, max_length=1000)
+    mode: str = "atomic"  # 'atomic' (all-or-nothing) or 'best_effort'
+
+class InventoryBatchItemResult(BaseModel):
+    inventory_id: int
+    success: bool
+    new_quantity: float
+    message: Optional[str] = None
+
+class InventoryBatchUpdateResponse(BaseModel):
+    success: bool
+    results: List[InventoryBatchItemResult] = []
+    message: Optional[str] = None
+
 class ChemSearchRequest(BaseModel):
     name: Optional[str] = None
     building_name: Optional[str] = None
     lab_room_number: Optional[int] = None
     locker_number: Optional[int] = None
     hazard_classification: Optional[str] = None
+    query: Optional[str] = None  # free-text search across all descriptive fields
+    limit: Optional[int] = Field(None, ge=1, le=1000)  # page size; omit to return every match
+    sort: Optional[str] = None  # a search page column key (name, uom, qty, ...), 'relevance' or 'rank'; default 'rank' with a query, else 'name'
+    direction: Optional[str] = None  # 'asc' or 'desc'; default 'desc' for relevance/rank, else 'asc'
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    format: str = "rows"  # 'rows' (a dict per chemical) or 'columnar' (columns + rows arrays)
 
 class ChemSearchResponse(BaseModel):
     success: bool
     results: List[Dict[str, Any]] = []
+    columns: Optional[List[str]] = None  # columnar format only
+    rows: Optional[List[List[Any]]] = None  # columnar format only
+    next_cursor: Optional[str] = None
     message: Optional[str] = None
 
+class SearchCacheStatsResponse(BaseModel):
+    success: bool
+    enabled: bool
+    listening: bool
+    size: int
+    max_size: int
+    ttl: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    invalidations: int
+
 class ReorderNotifUser(BaseModel):
     username: str
     email: str
@@ -54,4 +99,5 @@ class ReorderNotifUser(BaseModel):
 class ReorderNotifResponse(BaseModel):
     success: bool
     users: List[ReorderNotifUser] = []
+    next_token: Optional[str] = None  # pass as ?since= to get only later threshold crossings
     message: Optional[str] = None
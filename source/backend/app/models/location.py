@@ -31,3 +31,8 @@ class LocationsListResponse(BaseModel):
     success: bool
     locations: List[Dict[str, Any]] = []
     message: Optional[str] = None
+
+class LocationTreeResponse(BaseModel):
+    success: bool
+    buildings: Dict[str, Dict[str, List[int]]] = {}  # building -> lab room number -> locker numbers
+    message: Optional[str] = None
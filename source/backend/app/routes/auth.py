@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
-from ..database import get_db_connection
+from ..database import get_db
 from ..models.auth import (
     LoginRequest, 
     LoginResponse, 
@@ -15,36 +15,30 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["authentication"])
 
 @router.post("/backend/login", response_model=LoginResponse)
-def login(request: LoginRequest):
+async def login(request: LoginRequest, conn=Depends(get_db)):
     """Login endpoint"""
     try:
-        conn = get_db_connection()
-        result = login_user(conn, request.username, request.password)
-        conn.close()
+        result = await login_user(conn, request.username, request.password)
         return result
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Login error: {str(e)}")
 
 @router.post("/backend/updatepassword", response_model=UserResponse)
-def update_user_password(request: UserPswdRequest):
+async def update_user_password(request: UserPswdRequest, conn=Depends(get_db)):
     """Update user password endpoint"""
     try:
-        conn = get_db_connection()
-        result = update_password(conn, request.username, request.old_password, request.new_password)
-        conn.close()
+        result = await update_password(conn, request.username, request.old_password, request.new_password)
         return result
     except Exception as e:
         logger.error(f"Error updating password: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating password: {str(e)}")
 
 @router.post("/backend/set_password_reset", response_model=PasswordResetResponse)
-def password_reset(request: PasswordResetRequest):
+async def password_reset(request: PasswordResetRequest, conn=Depends(get_db)):
     """Set password reset flag for a user"""
     try:
-        conn = get_db_connection()
-        result = set_password_reset(conn, request.username)
-        conn.close()
+        result = await set_password_reset(conn, request.username)
         return result
     except Exception as e:
         logger.error(f"Error setting password reset: {str(e)}")
@@ -0,0 +1,45 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from ..database import get_db
+from ..models.bulk_import import InventoryImportResponse
+from ..services.bulk_import import import_inventory
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["import"])
+
+# Content types recognised when no format is given
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson"
+}
+
+@router.post("/backend/import/inventory", response_model=InventoryImportResponse)
+async def import_inventory_file(
+    http_request: Request,
+    format: Optional[str] = Query(None, description="'csv' or 'ndjson'; defaults from the Content-Type"),
+    mode: str = Query("atomic", description="'atomic' or 'best_effort'"),
+    conn=Depends(get_db)
+):
+    """
+    Bulk import chemicals, locations and inventory from a CSV or NDJSON request body
+
+    The body is streamed into the database rather than read into memory. Each record is one
+    inventory container; see IMPORT_COLUMNS in services/bulk_import.py for the fields.
+    """
+    if format is None:
+        content_type = http_request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_CONTENT_TYPES.get(content_type, "csv")
+
+    try:
+        logger.info(f"Importing inventory: format={format}, mode={mode}")
+        result = await import_inventory(conn, http_request.stream(), format, mode)
+        return result
+    except ValueError as ve:
+        logger.warning(f"Rejected inventory import: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error importing inventory: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error importing inventory: {str(e)}")
@@ -1,58 +1,126 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
-from ..database import get_db_connection
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from ..database import get_db, db_connection
 from ..models.chemical import (
     ChemSearchRequest,
     ChemSearchResponse,
     ReorderNotifResponse,
     InventoryUpdateRequest,
     InventoryUpdateResponse,
-    ChemicalDetailsResponse
+    InventoryBatchUpdateRequest,
+    InventoryBatchUpdateResponse,
+    ChemicalDetailsResponse,
+    ChemicalsRequest,
+    ChemicalsResponse,
+    SearchCacheStatsResponse
 )
-from ..services.chemical import search_chemicals, get_reorder_notifications, update_inventory_quantity, get_chemical_by_id
+from ..services.chemical import (
+    search_chemicals,
+    search_rows_to_records,
+    get_reorder_notifications,
+    update_inventory_quantity,
+    update_inventory_batch,
+    get_chemical_by_id,
+    get_chemicals_by_ids
+)
+from ..utils.search_cache import get_search_cache, normalize_search_request, search_cache_key
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["chemicals"])
 
+COLUMNAR_MEDIA_TYPE = "application/vnd.chemtrack.columnar+json"
+
+def render_search_result(result, columnar: bool):
+    """
+    Shape a columnar search result for the client
+    
+    Columnar responses are returned as-is, skipping response model validation; the default
+    format expands each row into a dict.
+    """
+    if columnar:
+        return JSONResponse(content=result, media_type=COLUMNAR_MEDIA_TYPE)
+    return {
+        "success": result["success"],
+        "results": search_rows_to_records(result["columns"], result["rows"]),
+        "next_cursor": result["next_cursor"],
+        "message": result["message"]
+    }
+
 @router.post("/backend/chemsearch", response_model=ChemSearchResponse)
-def search_chemical_inventory(request: ChemSearchRequest):
-    """Search chemicals endpoint"""
+async def search_chemical_inventory(request: ChemSearchRequest, http_request: Request):
+    """
+    Search chemicals endpoint (repeated searches are answered from the search cache)
+    
+    Send format="columnar" or an Accept header of application/vnd.chemtrack.columnar+json
+    to receive column names once plus an array per row instead of a dict per row.
+    """
+    if request.format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Invalid format: {request.format}. Must be 'rows' or 'columnar'")
+    columnar = request.format == "columnar" or COLUMNAR_MEDIA_TYPE in http_request.headers.get("accept", "")
+    
+    # Search with the same normalized criteria the cache key is built from
+    request = normalize_search_request(request)
+    cache = get_search_cache()
+    key = search_cache_key(request)
+    
     try:
-        conn = get_db_connection()
-        result = search_chemicals(
-            conn, 
-            request.name, 
-            request.building_name, 
-            request.lab_room_number, 
-            request.locker_number,
-            request.hazard_classification
-        )
-        conn.close()
-        return result
+        cached = cache.get(key)
+        if cached is not None:
+            return render_search_result(cached, columnar)
+        
+        generation = cache.generation
+        async with db_connection() as conn:
+            result = await search_chemicals(
+                conn, 
+                request.name, 
+                request.building_name, 
+                request.lab_room_number, 
+                request.locker_number,
+                request.hazard_classification,
+                limit=request.limit,
+                sort=request.sort,
+                direction=request.direction,
+                cursor=request.cursor,
+                query=request.query
+            )
+        cache.put(key, result, generation)
+        return render_search_result(result, columnar)
+    except HTTPException:
+        raise
+    except ValueError as val_error:
+        logger.error(f"Validation error: {str(val_error)}")
+        raise HTTPException(status_code=400, detail=str(val_error))
     except Exception as e:
         logger.error(f"Error searching chemicals: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error searching chemicals: {str(e)}")
 
+@router.get("/backend/search_cache/stats", response_model=SearchCacheStatsResponse)
+async def get_search_cache_stats():
+    """Report search cache size and hit/miss counters"""
+    return {"success": True, **get_search_cache().stats()}
+
 @router.get("/backend/reorder_notif", response_model=ReorderNotifResponse)
-def get_reordering_notifications():
-    """Get users who should be notified about chemicals that need reordering"""
+async def get_reordering_notifications(since: Optional[str] = None, conn=Depends(get_db)):
+    """Get users who should be notified about chemicals that need reordering (optionally only since a previous run)"""
     try:
-        conn = get_db_connection()
-        result = get_reorder_notifications(conn)
-        conn.close()
+        result = await get_reorder_notifications(conn, since)
         return result
+    except ValueError as val_error:
+        logger.error(f"Validation error: {str(val_error)}")
+        raise HTTPException(status_code=400, detail=str(val_error))
     except Exception as e:
         logger.error(f"Error getting reorder notifications: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting reorder notifications: {str(e)}")
 
 @router.get("/backend/chemical/{inventory_id}", response_model=ChemicalDetailsResponse)
-def get_chemical(inventory_id: int):
+async def get_chemical(inventory_id: int, conn=Depends(get_db)):
     """Get a specific chemical by its inventory ID"""
     try:
         logger.info(f"Getting chemical details for ID: {inventory_id}")
-        conn = get_db_connection()
-        result = get_chemical_by_id(conn, inventory_id)
-        conn.close()
+        result = await get_chemical_by_id(conn, inventory_id)
         
         if not result["success"]:
             logger.warning(f"Chemical not found: {inventory_id}")
@@ -66,27 +134,42 @@ def get_chemical(inventory_id: int):
         logger.error(f"Error getting chemical details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving chemical details: {str(e)}")
 
+@router.get("/backend/chemicals", response_model=ChemicalsResponse)
+async def get_chemicals(ids: str = Query(..., description="Comma-separated inventory IDs"), conn=Depends(get_db)):
+    """Get many chemicals by inventory ID in one query (IDs not found are listed in missing_ids)"""
+    try:
+        inventory_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid inventory IDs: {ids}")
+    try:
+        request = ChemicalsRequest(ids=inventory_ids)
+    except ValidationError as ve:
+        raise HTTPException(status_code=400, detail=f"Between 1 and 1000 inventory IDs are required: {ve.errors()[0]['msg']}")
+    return await get_chemicals_by_id_list(request, conn)
+
+@router.post("/backend/chemicals", response_model=ChemicalsResponse)
+async def get_chemicals_by_id_list(request: ChemicalsRequest, conn=Depends(get_db)):
+    """Get many chemicals by inventory ID in one query, for ID lists too long for a URL"""
+    try:
+        logger.info(f"Getting chemical details for {len(request.ids)} IDs")
+        result = await get_chemicals_by_ids(conn, request.ids)
+        if result["missing_ids"]:
+            logger.warning(f"Chemicals not found: {result['missing_ids']}")
+        return result
+    except Exception as e:
+        logger.error(f"Error getting chemical details: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving chemical details: {str(e)}")
+
 @router.post("/backend/update_inventory", response_model=InventoryUpdateResponse)
-def update_inventory(request: InventoryUpdateRequest):
+async def update_inventory(request: InventoryUpdateRequest, conn=Depends(get_db)):
     """Update inventory quantity endpoint"""
-    conn = None
     try:
         # Log the incoming request
         logger.info(f"Processing inventory update: id={request.inventory_id}, qty={request.quantity}, action={request.action}")
         
-        # Get database connection
-        try:
-            conn = get_db_connection()
-        except Exception as conn_error:
-            logger.error(f"Failed to connect to database: {str(conn_error)}")
-            raise HTTPException(
-                status_code=503, 
-                detail=f"Database connection failed: {str(conn_error)}"
-            )
-        
         # Call service to update inventory
         try:
-            result = update_inventory_quantity(
+            result = await update_inventory_quantity(
                 conn,
                 request.inventory_id,
                 request.quantity,
@@ -96,23 +179,15 @@ def update_inventory(request: InventoryUpdateRequest):
         except ValueError as val_error:
             # Handle validation errors
             logger.error(f"Validation error: {str(val_error)}")
-            if conn:
-                conn.close()
             raise HTTPException(status_code=400, detail=str(val_error))
         except Exception as service_error:
             # Handle other service errors
             logger.error(f"Service error in update_inventory_quantity: {str(service_error)}")
-            if conn:
-                conn.close()
             raise HTTPException(
                 status_code=500, 
                 detail=f"Error processing inventory update: {str(service_error)}"
             )
         
-        # Close connection
-        if conn:
-            conn.close()
-        
         # If operation failed, return 400 Bad Request
         if not result["success"]:
             logger.warning(f"Inventory update failed: {result['message']}")
@@ -124,12 +199,25 @@ def update_inventory(request: InventoryUpdateRequest):
         raise
     except Exception as e:
         logger.error(f"Unhandled error updating inventory: {str(e)}", exc_info=True)
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
         raise HTTPException(
             status_code=500, 
             detail=f"An unexpected error occurred while updating inventory"
         )
+
+@router.post("/backend/update_inventory_batch", response_model=InventoryBatchUpdateResponse)
+async def update_inventory_in_batch(request: InventoryBatchUpdateRequest, conn=Depends(get_db)):
+    """Apply many inventory updates in one transaction (atomic or best-effort)"""
+    try:
+        logger.info(f"Processing inventory batch: {len(request.items)} items, mode={request.mode}")
+        result = await update_inventory_batch(
+            conn,
+            [item.model_dump() for item in request.items],
+            request.mode
+        )
+        return result
+    except ValueError as val_error:
+        logger.error(f"Validation error: {str(val_error)}")
+        raise HTTPException(status_code=400, detail=str(val_error))
+    except Exception as e:
+        logger.error(f"Error processing inventory batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing inventory batch: {str(e)}")
@@ -0,0 +1,52 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..services.export import export_inventory
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["export"])
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+@router.get("/backend/export/inventory")
+async def export_inventory_file(
+    format: str = Query("csv", description="'csv' or 'ndjson'"),
+    building_name: Optional[str] = None,
+    lab_room_number: Optional[int] = None
+):
+    """
+    Stream an inventory snapshot as CSV or NDJSON, optionally for one building or lab room
+
+    The database connection is taken inside the stream rather than from Depends(get_db),
+    which would be returned to the pool before the response body is sent.
+    """
+    try:
+        stream = export_inventory(format, building_name, lab_room_number)
+        # Start the export before answering, so connection and query errors still get an error status
+        first_chunk = await anext(stream, b"")
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error exporting inventory: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error exporting inventory: {str(e)}")
+
+    async def body():
+        try:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # Return the connection promptly if the client goes away mid-stream
+            await stream.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="inventory.{format}"'}
+    )
@@ -1,122 +1,148 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Path
-from ..database import get_db_connection
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
+from ..database import get_db
 from ..models.location import (
     BuildingListResponse,
     LabRoomListResponse,
     LocationsListResponse,
     LocationCreateUpdateRequest,
     LocationResponse,
-    LocationCheckResponse
+    LocationCheckResponse,
+    LocationTreeResponse
 )
 from ..services.location import (
     get_buildings,
     get_lab_rooms,
+    get_location_hierarchy,
     get_locations,
     create_location,
     update_location,
     check_location,
     delete_location
 )
+from ..services.location_tree import get_location_tree
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["locations"])
 
+def not_modified(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names the current ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def location_tree_response(request: Request, response: Response, tree, build):
+    """
+    Answer from the location tree with its ETag, or 304 if the client's copy is current
+    
+    Cache-Control: no-cache lets clients keep the response but revalidate it every time.
+    """
+    headers = {"ETag": tree.etag, "Cache-Control": "no-cache"}
+    if not_modified(request, tree.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return build()
+
 @router.get("/backend/buildings", response_model=BuildingListResponse)
-def get_all_buildings():
-    """Get a list of unique building names"""
+async def get_all_buildings(request: Request, response: Response):
+    """Get a list of unique building names (served from the location tree, supports If-None-Match)"""
     try:
-        conn = get_db_connection()
-        result = get_buildings(conn)
-        conn.close()
-        return result
+        tree = await get_location_tree().current()
+        return location_tree_response(request, response, tree, lambda: get_buildings(tree))
     except Exception as e:
         logger.error(f"Error getting buildings: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting buildings: {str(e)}")
 
 @router.get("/backend/lab_rooms/{building_name}", response_model=LabRoomListResponse)
-def get_lab_rooms_for_building(
+async def get_lab_rooms_for_building(
+    request: Request,
+    response: Response,
     building_name: str = Path(..., description="Building name to filter lab rooms")
 ):
-    """Get a list of unique lab room numbers for a specific building"""
+    """Get a list of unique lab room numbers for a specific building (served from the location tree, supports If-None-Match)"""
     try:
-        conn = get_db_connection()
-        result = get_lab_rooms(conn, building_name)
-        conn.close()
-        return result
+        tree = await get_location_tree().current()
+        return location_tree_response(request, response, tree, lambda: get_lab_rooms(tree, building_name))
     except Exception as e:
         logger.error(f"Error getting lab rooms: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting lab rooms: {str(e)}")
 
+@router.get("/backend/location_tree", response_model=LocationTreeResponse)
+async def get_location_tree_for_dropdowns(request: Request, response: Response):
+    """
+    Get every building with its lab rooms and lockers in one response (supports If-None-Match)
+    
+    Lets frontends fill the building, lab room and locker dropdowns client-side.
+    Lab room numbers are object keys, so they are strings.
+    """
+    try:
+        tree = await get_location_tree().current()
+        return location_tree_response(request, response, tree, lambda: get_location_hierarchy(tree))
+    except Exception as e:
+        logger.error(f"Error getting location tree: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting location tree: {str(e)}")
+
 @router.get("/backend/locations", response_model=LocationsListResponse)
-def get_all_locations():
+async def get_all_locations(conn=Depends(get_db)):
     """Get all locations endpoint"""
     try:
-        conn = get_db_connection()
-        result = get_locations(conn)
-        conn.close()
+        result = await get_locations(conn)
         return result
     except Exception as e:
         logger.error(f"Error getting locations: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting locations: {str(e)}")
 
 @router.post("/backend/createlocation", response_model=LocationResponse)
-def create_new_location(request: LocationCreateUpdateRequest):
+async def create_new_location(request: LocationCreateUpdateRequest, conn=Depends(get_db)):
     """Create a new location"""
     try:
-        conn = get_db_connection()
-        result = create_location(
+        result = await create_location(
             conn,
             request.building_name,
             request.lab_room_number,
             request.locker_number
         )
-        conn.close()
         return result
     except Exception as e:
         logger.error(f"Error creating location: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating location: {str(e)}")
 
 @router.post("/backend/updatelocation", response_model=LocationResponse)
-def update_existing_location(request: LocationCreateUpdateRequest):
+async def update_existing_location(request: LocationCreateUpdateRequest, conn=Depends(get_db)):
     """Update an existing location"""
     try:
         if not request.location_id:
             return LocationResponse(success=False, message="Location ID is required for update")
         
-        conn = get_db_connection()
-        result = update_location(
+        result = await update_location(
             conn,
             request.location_id,
             request.building_name,
             request.lab_room_number,
             request.locker_number
         )
-        conn.close()
         return result
     except Exception as e:
         logger.error(f"Error updating location: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating location: {str(e)}")
 
 @router.get("/backend/checklocation/{location_id}", response_model=LocationCheckResponse)
-def check_location_inventory(location_id: int):
+async def check_location_inventory(location_id: int, conn=Depends(get_db)):
     """Check if a location has inventory associated with it"""
     try:
-        conn = get_db_connection()
-        result = check_location(conn, location_id)
-        conn.close()
+        result = await check_location(conn, location_id)
         return result
     except Exception as e:
         logger.error(f"Error checking location inventory: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error checking location inventory: {str(e)}")
 
 @router.delete("/backend/deletelocation/{location_id}", response_model=LocationResponse)
-def delete_existing_location(location_id: int):
+async def delete_existing_location(location_id: int, conn=Depends(get_db)):
     """Delete a location if it has no inventory"""
     try:
-        conn = get_db_connection()
-        result = delete_location(conn, location_id)
-        conn.close()
+        result = await delete_location(conn, location_id)
         return result
     except Exception as e:
         logger.error(f"Error deleting location: {str(e)}")
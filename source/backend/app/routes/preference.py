@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
-from ..database import get_db_connection
+from ..database import get_db
 from ..models.preference import (
     UserPreferenceRequest,
     UserPreferenceUpdateRequest,
@@ -13,12 +13,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["preferences"])
 
 @router.post("/backend/get_user_preferences", response_model=UserPreferenceResponse)
-def get_preferences(request: UserPreferenceRequest):
+async def get_preferences(request: UserPreferenceRequest, conn=Depends(get_db)):
     """Get user preferences endpoint"""
     try:
-        conn = get_db_connection()
-        preferences = get_user_preferences(conn, request.username, request.key)
-        conn.close()
+        preferences = await get_user_preferences(conn, request.username, request.key)
         
         return UserPreferenceResponse(
             success=True,
@@ -30,24 +28,20 @@ def get_preferences(request: UserPreferenceRequest):
         raise HTTPException(status_code=500, detail=f"Error getting user preferences: {str(e)}")
 
 @router.post("/backend/update_user_preference", response_model=UserPreferenceResponse)
-def update_preference(request: UserPreferenceUpdateRequest):
+async def update_preference(request: UserPreferenceUpdateRequest, conn=Depends(get_db)):
     """Update user preference endpoint"""
     try:
-        conn = get_db_connection()
-        result = update_user_preference(conn, request.username, request.key, request.value)
-        conn.close()
+        result = await update_user_preference(conn, request.username, request.key, request.value)
         return result
     except Exception as e:
         logger.error(f"Error updating user preference: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating user preference: {str(e)}")
 
 @router.post("/backend/delete_user_preference", response_model=UserPreferenceAck)
-def delete_preferences(request: UserPreferenceRequest):
+async def delete_preferences(request: UserPreferenceRequest, conn=Depends(get_db)):
     """Delete user preferences endpoint"""
     try:
-        conn = get_db_connection()
-        result = delete_user_preferences(conn, request.username)
-        conn.close()
+        result = await delete_user_preferences(conn, request.username)
         return result
     except Exception as e:
         logger.error(f"Error deleting user preference: {str(e)}")
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 async def get_all_reports():
     """Get all available reports"""
     try:
-        reports = report.get_all_reports()
+        reports = await report.get_all_reports()
         return reports
     except Exception as e:
         logger.error(f"Error fetching reports: {str(e)}")
@@ -21,7 +21,7 @@ async def get_all_reports():
 async def get_report(report_id: int):
     """Get a specific report by ID"""
     try:
-        report_data = report.get_report_by_id(report_id)
+        report_data = await report.get_report_by_id(report_id)
         if not report_data:
             raise HTTPException(status_code=404, detail=f"Report with ID {report_id} not found")
         return report_data
@@ -35,7 +35,7 @@ async def get_report(report_id: int):
 async def execute_report(report_id: int, parameters: Dict[str, Any] = None):
     """Execute a specific report and return the results"""
     try:
-        result = report.execute_report(report_id, parameters)
+        result = await report.execute_report(report_id, parameters)
         return result
     except HTTPException as he:
         raise he
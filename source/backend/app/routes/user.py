@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
-from ..database import get_db_connection
+from ..database import get_db
 from ..models.user import (
     UserRequest,
     UserInfoRequest,
@@ -22,72 +22,60 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["users"])
 
 @router.post("/backend/createuser", response_model=UserResponse)
-def create_new_user(request: UserRequest):
+async def create_new_user(request: UserRequest, conn=Depends(get_db)):
     """Create user endpoint"""
     try:
-        conn = get_db_connection()
-        result = create_user(conn, request.username, request.password, request.email, request.role)
-        conn.close()
+        result = await create_user(conn, request.username, request.password, request.email, request.role)
         return result
     except Exception as e:
         logger.error(f"Error creating user: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
 @router.post("/backend/get_user_info", response_model=UserInfoResponse)
-def get_user_information(request: UserInfoRequest):
+async def get_user_information(request: UserInfoRequest, conn=Depends(get_db)):
     """Get user information endpoint"""
     try:
-        conn = get_db_connection()
-        result = get_user_info(conn, request.username)
-        conn.close()
+        result = await get_user_info(conn, request.username)
         return result
     except Exception as e:
         logger.error(f"Error getting user info: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting user info: {str(e)}")
 
 @router.post("/backend/updateuser", response_model=UserResponse)
-def update_existing_user(request: UserRequest):
+async def update_existing_user(request: UserRequest, conn=Depends(get_db)):
     """Update user endpoint"""
     try:
-        conn = get_db_connection()
-        result = update_user(conn, request.username, request.email, request.role, request.password)
-        conn.close()
+        result = await update_user(conn, request.username, request.email, request.role, request.password)
         return result
     except Exception as e:
         logger.error(f"Error updating user: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating user: {str(e)}")
 
 @router.get("/backend/users", response_model=UsersListResponse)
-def get_all_system_users():
+async def get_all_system_users(conn=Depends(get_db)):
     """Get all users endpoint"""
     try:
-        conn = get_db_connection()
-        result = get_all_users(conn)
-        conn.close()
+        result = await get_all_users(conn)
         return result
     except Exception as e:
         logger.error(f"Error getting users: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting users: {str(e)}")
 
 @router.get("/backend/roles", response_model=RolesListResponse)
-def get_system_roles():
+async def get_system_roles(conn=Depends(get_db)):
     """Get a list of all available roles"""
     try:
-        conn = get_db_connection()
-        result = get_roles(conn)
-        conn.close()
+        result = await get_roles(conn)
         return result
     except Exception as e:
         logger.error(f"Error getting roles: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting roles: {str(e)}")
 
 @router.post("/backend/deleteuser", response_model=UserResponse)
-def delete_existing_user(request: UserInfoRequest):
+async def delete_existing_user(request: UserInfoRequest, conn=Depends(get_db)):
     """Delete user endpoint"""
     try:
-        conn = get_db_connection()
-        result = delete_user(conn, request.username)
-        conn.close()
+        result = await delete_user(conn, request.username)
         return result
     except Exception as e:
         logger.error(f"Error deleting user: {str(e)}")
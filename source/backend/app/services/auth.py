@@ -1,12 +1,11 @@
 import logging
 from datetime import datetime, timedelta
-import psycopg2
 from ..utils import hash_password
 from ..services.preference import get_user_preferences
 
 logger = logging.getLogger(__name__)
 
-def login_user(conn, username: str, password: str):
+async def login_user(conn, username: str, password: str):
     """Handle user login logic"""
     try:
         cursor = conn.cursor()
@@ -21,14 +20,14 @@ def login_user(conn, username: str, password: str):
             WHERE user_name = %s AND password = %s
         """
         
-        cursor.execute(query, (username, hashed_password))
-        user = cursor.fetchone()
+        await cursor.execute(query, (username, hashed_password))
+        user = await cursor.fetchone()
         
         if user:
             logger.info(f'Login success: {username}')
             
             # Get user preferences
-            preferences = get_user_preferences(conn, username)
+            preferences = await get_user_preferences(conn, username)
             
             # Add password reset flag to preferences
             preferences['pswd_reset'] = user[2]
@@ -43,24 +42,24 @@ def login_user(conn, username: str, password: str):
                     SET pswd_reset = 'Y'
                     WHERE user_name = %s
                 """
-                cursor.execute(update_query, (username,))
-                conn.commit()
+                await cursor.execute(update_query, (username,))
+                await conn.commit()
                 preferences['pswd_reset'] = 'Y'
             
-            cursor.close()
+            await cursor.close()
             return {"success": True, "role": user[1], "preferences": preferences}
         else:
             logger.warning(f'Login failure: {username}')
-            cursor.close()
+            await cursor.close()
             return {"success": False, "message": "Invalid username or password"}
     
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         if not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def update_password(conn, username: str, old_password: str, new_password: str):
+async def update_password(conn, username: str, old_password: str, new_password: str):
     """Update user password"""
     try:
         cursor = conn.cursor()
@@ -71,10 +70,10 @@ def update_password(conn, username: str, old_password: str, new_password: str):
             FROM users 
             WHERE user_name = %s AND password = %s
         """       
-        cursor.execute(query, (username, hash_password(old_password)))
-        if not cursor.fetchone():
+        await cursor.execute(query, (username, hash_password(old_password)))
+        if not await cursor.fetchone():
             logger.error('Old password does not match')
-            cursor.close()
+            await cursor.close()
             return {"success": False, "message": "Old password does not match"}
         
         # Update password
@@ -83,20 +82,20 @@ def update_password(conn, username: str, old_password: str, new_password: str):
             SET password = %s, pswd_reset = 'N', last_reset = CURRENT_TIMESTAMP
             WHERE user_name = %s
         """
-        cursor.execute(update_query, [hash_password(new_password), username])
+        await cursor.execute(update_query, [hash_password(new_password), username])
         
-        conn.commit()
-        cursor.close()
+        await conn.commit()
+        await cursor.close()
         return {"success": True, "message": "User password updated successfully"}
     
     except Exception as e:
         logger.error(f"Password update error: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def set_password_reset(conn, username: str):
+async def set_password_reset(conn, username: str):
     """Set the password reset flag for a user"""
     try:
         logger.info(f"Setting password reset flag for user: {username}")
@@ -104,10 +103,10 @@ def set_password_reset(conn, username: str):
         
         # Check if the user exists
         check_query = "SELECT user_name FROM users WHERE user_name = %s"
-        cursor.execute(check_query, (username,))
-        if not cursor.fetchone():
+        await cursor.execute(check_query, (username,))
+        if not await cursor.fetchone():
             logger.error(f"User not found: {username}")
-            cursor.close()
+            await cursor.close()
             return {"success": False, "message": "User does not exist"}
         
         # Force set the value to 'Y'
@@ -119,16 +118,16 @@ def set_password_reset(conn, username: str):
             SET pswd_reset = %s
             WHERE user_name = %s
         """
-        cursor.execute(update_query, (new_value, username))
-        conn.commit()
+        await cursor.execute(update_query, (new_value, username))
+        await conn.commit()
         
         logger.info(f"Password reset flag set to 'Y' for user: {username}")
-        cursor.close()
+        await cursor.close()
         return {"success": True, "message": f"Password reset flag set for user {username}"}
     
     except Exception as e:
         logger.error(f"Error setting password reset flag: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
@@ -0,0 +1,308 @@
+import csv
+import json
+import logging
+import psycopg
+from ..utils.search_cache import get_search_cache
+from .location_tree import get_location_tree
+
+logger = logging.getLogger(__name__)
+
+# Fields of an import record: one inventory container with its chemical and location
+IMPORT_COLUMNS = [
+    "name", "unit_of_measure", "cas_number", "chemical_formula", "molecular_weight",
+    "physical_state", "signal_word", "hazard_classification", "chemical_description", "sds_link",
+    "building_name", "lab_room_number", "locker_number", "quantity", "reorder_quantity"
+]
+
+REQUIRED_COLUMNS = ["name", "building_name", "lab_room_number", "locker_number", "quantity", "reorder_quantity"]
+
+# Chemical details that an import can fill in or change on an existing chemical
+CHEMICAL_DETAIL_COLUMNS = [
+    "cas_number", "chemical_formula", "molecular_weight", "physical_state", "signal_word",
+    "hazard_classification", "chemical_description", "sds_link"
+]
+
+# Most errors returned in a report (the total is always returned)
+MAX_REPORTED_ERRORS = 1000
+
+NUMBER_PATTERN = r"^\s*\+?(\d+(\.\d*)?|\.\d+)\s*$"
+INTEGER_PATTERN = r"^\s*\d+\s*$"
+
+# One row per staged record with its list of problems. Range checks are separate CASE
+# branches so that their casts only run on values that already matched the pattern.
+VALIDATION_QUERY = f"""
+    SELECT row_number, problems
+    FROM (
+        SELECT
+            s.row_number,
+            CASE WHEN s.parse_error IS NOT NULL THEN ARRAY[s.parse_error] ELSE array_remove(ARRAY[
+                CASE WHEN coalesce(trim(s.name), '') = '' THEN 'name is required' END,
+                CASE WHEN length(trim(s.name)) > 100 THEN 'name is longer than 100 characters' END,
+                CASE WHEN existing.name_key IS NULL AND with_unit.name_key IS NULL
+                     THEN 'unit_of_measure is required for a new chemical' END,
+                CASE WHEN length(trim(s.unit_of_measure)) > 20 THEN 'unit_of_measure is longer than 20 characters' END,
+                CASE WHEN length(trim(s.cas_number)) > 20 THEN 'cas_number is longer than 20 characters' END,
+                CASE WHEN length(trim(s.chemical_formula)) > 50 THEN 'chemical_formula is longer than 50 characters' END,
+                CASE WHEN length(trim(s.physical_state)) > 20 THEN 'physical_state is longer than 20 characters' END,
+                CASE WHEN length(trim(s.signal_word)) > 20 THEN 'signal_word is longer than 20 characters' END,
+                CASE WHEN coalesce(trim(s.molecular_weight), '') = '' THEN NULL
+                     WHEN s.molecular_weight !~ '{NUMBER_PATTERN}' THEN 'molecular_weight must be a number below 1000000'
+                     WHEN trim(s.molecular_weight)::numeric >= 1000000 THEN 'molecular_weight must be a number below 1000000' END,
+                CASE WHEN coalesce(trim(s.building_name), '') = '' THEN 'building_name is required' END,
+                CASE WHEN length(trim(s.building_name)) > 50 THEN 'building_name is longer than 50 characters' END,
+                CASE WHEN coalesce(s.lab_room_number, '') !~ '{INTEGER_PATTERN}' THEN 'lab_room_number must be a whole number from 0 to 9999'
+                     WHEN trim(s.lab_room_number)::numeric > 9999 THEN 'lab_room_number must be a whole number from 0 to 9999' END,
+                CASE WHEN coalesce(s.locker_number, '') !~ '{INTEGER_PATTERN}' THEN 'locker_number must be a whole number from 0 to 999'
+                     WHEN trim(s.locker_number)::numeric > 999 THEN 'locker_number must be a whole number from 0 to 999' END,
+                CASE WHEN coalesce(s.quantity, '') !~ '{NUMBER_PATTERN}' THEN 'quantity must be a number of zero or more' END,
+                CASE WHEN coalesce(s.reorder_quantity, '') !~ '{NUMBER_PATTERN}' THEN 'reorder_quantity must be a number of zero or more' END
+            ], NULL) END AS problems
+        FROM import_staging s
+            -- A new chemical needs a unit on at least one of its records
+            LEFT JOIN (SELECT DISTINCT lower(name) AS name_key FROM chemicals) existing
+                ON existing.name_key = lower(trim(s.name))
+            LEFT JOIN (
+                SELECT DISTINCT lower(trim(name)) AS name_key
+                FROM import_staging
+                WHERE coalesce(trim(unit_of_measure), '') <> ''
+            ) with_unit ON with_unit.name_key = lower(trim(s.name))
+    ) checked
+    WHERE cardinality(problems) > 0
+    ORDER BY row_number
+"""
+
+def _detail_value(column, alias="v"):
+    """Staged chemical detail cast to its chemicals column type"""
+    return f"{alias}.{column}::numeric" if column == "molecular_weight" else f"{alias}.{column}"
+
+async def _stage_csv(cursor, chunks):
+    """Copy CSV data into the staging table, naming columns from the header line"""
+    chunks = aiter(chunks)
+    buffer = b""
+    header = None
+    async for chunk in chunks:
+        buffer += chunk
+        if b"\n" in buffer:
+            header, buffer = buffer.split(b"\n", 1)
+            break
+    else:
+        header, buffer = buffer, b""
+
+    columns = [column.strip().lower() for column in next(csv.reader([header.decode("utf-8-sig")]), [])]
+    unknown = [column for column in columns if column not in IMPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns in CSV header: {', '.join(unknown)}")
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns in CSV header: {', '.join(missing)}")
+    if len(set(columns)) != len(columns):
+        raise ValueError("Duplicate columns in CSV header")
+
+    try:
+        async with cursor.copy(f"COPY import_staging ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)") as copy:
+            if buffer:
+                await copy.write(buffer)
+            async for chunk in chunks:
+                await copy.write(chunk)
+    except psycopg.errors.DataError as e:
+        # Malformed CSV (wrong number of fields, bad quoting or encoding) cannot be staged at all
+        raise ValueError(f"Unreadable CSV: {str(e).splitlines()[0]}")
+
+async def _stage_ndjson(cursor, chunks):
+    """Copy NDJSON records into the staging table; unreadable lines are staged with a parse error"""
+    def to_row(line):
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("record is not a JSON object")
+        except ValueError as e:
+            return [None] * len(IMPORT_COLUMNS) + [f"invalid JSON: {str(e)}"]
+        return [None if record.get(column) is None else str(record[column]) for column in IMPORT_COLUMNS] + [None]
+
+    columns = ", ".join(IMPORT_COLUMNS + ["parse_error"])
+    async with cursor.copy(f"COPY import_staging ({columns}) FROM STDIN") as copy:
+        buffer = b""
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    await copy.write_row(to_row(line))
+        if buffer.strip():
+            await copy.write_row(to_row(buffer))
+
+async def import_inventory(conn, chunks, fmt="csv", mode="atomic"):
+    """
+    Bulk load chemicals, locations and inventory from CSV or NDJSON
+
+    Records are streamed with COPY into a temporary staging table, validated in SQL, and
+    merged in a single transaction: chemicals are matched by name (case-insensitive) and
+    created when new, with any chemical details given in the file applied to them;
+    locations are created when new; every valid record adds one inventory container.
+
+    Args:
+        conn: Database connection
+        chunks: Async iterable of bytes holding the file
+        fmt: 'csv' (with a header line naming the columns) or 'ndjson' (one JSON object per line)
+        mode: 'atomic' (nothing is imported if any record is invalid) or 'best_effort'
+            (valid records are imported and invalid ones reported)
+
+    Returns:
+        Dict containing success, counts, the per-record error report, and message
+    """
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"Invalid format: {fmt}. Must be 'csv' or 'ndjson'")
+    if mode not in ("atomic", "best_effort"):
+        raise ValueError(f"Invalid mode: {mode}. Must be 'atomic' or 'best_effort'")
+
+    try:
+        cursor = conn.cursor()
+
+        # Staging columns are text so that every record loads and can be validated in SQL
+        await cursor.execute(f"""
+            CREATE TEMP TABLE import_staging (
+                row_number BIGINT GENERATED ALWAYS AS IDENTITY,
+                {', '.join(f'{column} TEXT' for column in IMPORT_COLUMNS)},
+                parse_error TEXT
+            ) ON COMMIT DROP
+        """)
+
+        if fmt == "csv":
+            await _stage_csv(cursor, chunks)
+        else:
+            await _stage_ndjson(cursor, chunks)
+
+        # Temporary tables are never analyzed automatically
+        await cursor.execute("ANALYZE import_staging")
+        await cursor.execute("SELECT count(*) FROM import_staging")
+        rows_received = (await cursor.fetchone())[0]
+
+        # Validate
+        await cursor.execute(VALIDATION_QUERY)
+        errors = [{"row": row[0], "messages": row[1]} for row in await cursor.fetchall()]
+
+        result = {
+            "rows_received": rows_received,
+            "rows_imported": 0,
+            "chemicals_created": 0,
+            "chemicals_updated": 0,
+            "locations_created": 0,
+            "error_count": len(errors),
+            "errors": errors[:MAX_REPORTED_ERRORS]
+        }
+
+        if errors and mode == "atomic":
+            await conn.rollback()
+            await cursor.close()
+            return {
+                "success": False,
+                **result,
+                "message": f"Import rejected: {len(errors)} of {rows_received} records are invalid"
+            }
+
+        # Only valid records are left to merge, so the casts below cannot fail
+        if errors:
+            await cursor.execute(
+                "DELETE FROM import_staging WHERE row_number = ANY(%s)",
+                ([error["row"] for error in errors],)
+            )
+
+        # One set of chemical values per name: the first non-empty value of each field
+        await cursor.execute(f"""
+            CREATE TEMP TABLE import_chemicals ON COMMIT DROP AS
+            SELECT
+                lower(trim(name)) AS name_key,
+                (array_agg(trim(name) ORDER BY row_number))[1] AS name,
+                {', '.join(
+                    f"(array_agg(NULLIF(trim({column}), '') ORDER BY row_number) FILTER (WHERE NULLIF(trim({column}), '') IS NOT NULL))[1] AS {column}"
+                    for column in ["unit_of_measure"] + CHEMICAL_DETAIL_COLUMNS
+                )}
+            FROM import_staging
+            GROUP BY lower(trim(name))
+        """)
+
+        # Fill in or change details of existing chemicals
+        await cursor.execute(f"""
+            UPDATE chemicals c
+            SET {', '.join(
+                f"{column} = COALESCE({_detail_value(column)}, c.{column})"
+                for column in CHEMICAL_DETAIL_COLUMNS
+            )}
+            FROM import_chemicals v
+            WHERE lower(c.name) = v.name_key
+              AND ({' OR '.join(
+                f"({_detail_value(column)} IS DISTINCT FROM c.{column} AND v.{column} IS NOT NULL)"
+                for column in CHEMICAL_DETAIL_COLUMNS
+            )})
+        """)
+        result["chemicals_updated"] = cursor.rowcount
+
+        # Create new chemicals
+        await cursor.execute(f"""
+            INSERT INTO chemicals (name, unit_of_measure, {', '.join(CHEMICAL_DETAIL_COLUMNS)})
+            SELECT
+                v.name,
+                v.unit_of_measure,
+                {', '.join(_detail_value(column) for column in CHEMICAL_DETAIL_COLUMNS)}
+            FROM import_chemicals v
+            WHERE NOT EXISTS (SELECT 1 FROM chemicals c WHERE lower(c.name) = v.name_key)
+        """)
+        result["chemicals_created"] = cursor.rowcount
+
+        # Create new locations
+        await cursor.execute("""
+            INSERT INTO locations (building_name, lab_room_number, locker_number)
+            SELECT DISTINCT trim(s.building_name), trim(s.lab_room_number)::int, trim(s.locker_number)::int
+            FROM import_staging s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM locations l
+                WHERE l.building_name = trim(s.building_name)
+                  AND l.lab_room_number = trim(s.lab_room_number)::int
+                  AND l.locker_number = trim(s.locker_number)::int
+            )
+            ON CONFLICT DO NOTHING
+        """)
+        result["locations_created"] = cursor.rowcount
+
+        # Add one inventory container per record
+        await cursor.execute("""
+            INSERT INTO inventory (chemical_id, quantity, reorder_quantity, location_id)
+            SELECT c.id, trim(s.quantity)::numeric, trim(s.reorder_quantity)::numeric, l.location_id
+            FROM import_staging s
+                JOIN (SELECT lower(name) AS name_key, min(id) AS id FROM chemicals GROUP BY lower(name)) c
+                    ON c.name_key = lower(trim(s.name))
+                JOIN (
+                    SELECT building_name, lab_room_number, locker_number, min(location_id) AS location_id
+                    FROM locations
+                    GROUP BY building_name, lab_room_number, locker_number
+                ) l ON l.building_name = trim(s.building_name)
+                    AND l.lab_room_number = trim(s.lab_room_number)::int
+                    AND l.locker_number = trim(s.locker_number)::int
+            ORDER BY s.row_number
+        """)
+        result["rows_imported"] = cursor.rowcount
+
+        await conn.commit()
+        await cursor.close()
+        get_search_cache().invalidate_all()
+        if result["locations_created"]:
+            get_location_tree().invalidate()
+
+        logger.info(f"Bulk import: {result['rows_imported']} of {rows_received} records imported")
+        return {
+            "success": not errors,
+            **result,
+            "message": f"Imported {result['rows_imported']} of {rows_received} records"
+        }
+
+    except ValueError:
+        await conn.rollback()
+        if 'cursor' in locals() and not cursor.closed:
+            await cursor.close()
+        raise
+    except Exception as e:
+        logger.error(f"Error importing inventory: {str(e)}", exc_info=True)
+        await conn.rollback()
+        if 'cursor' in locals() and not cursor.closed:
+            await cursor.close()
+        raise Exception(f"Bulk import failed: {str(e)}")
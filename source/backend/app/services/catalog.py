@@ -0,0 +1,91 @@
+import os
+import time
+import asyncio
+import logging
+from psycopg.rows import dict_row
+from ..utils.search_cache import get_search_cache
+
+logger = logging.getLogger(__name__)
+
+# Chemical fields served from the catalog instead of being joined into inventory queries
+CATALOG_FIELDS = [
+    "name", "unit_of_measure", "cas_number", "chemical_formula", "signal_word", "physical_state",
+    "hazard_classification", "chemical_description", "molecular_weight", "sds_link"
+]
+
+class ChemicalCatalog:
+    """
+    In-memory copy of the chemicals table, stamped with its cache_versions counter
+
+    The counter is bumped by a trigger on every change to chemicals
+    (scripts/add_cache_versions.sql). It is checked at most once per check_interval,
+    and the whole catalog is reloaded when it has moved. A chemical that is not in the
+    catalog forces an immediate check, so new chemicals are found without waiting.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self.version = None
+        self._chemicals = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_many(self, conn, chemical_ids):
+        """
+        Return {chemical_id: fields} for the given chemicals
+
+        Args:
+            conn: Database connection used if the catalog needs checking or reloading
+            chemical_ids: Iterable of chemical IDs
+        """
+        await self.refresh(conn)
+        if any(chemical_id not in self._chemicals for chemical_id in chemical_ids):
+            await self.refresh(conn, force=True)
+        return self._chemicals
+
+    async def refresh(self, conn, force=False):
+        """Reload the catalog if its version changed (checked at most every check_interval unless forced)"""
+        if not force and self.version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        async with self._lock:
+            if not force and self.version is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            cursor = conn.cursor()
+            try:
+                await cursor.execute("SELECT version FROM cache_versions WHERE name = 'chemicals'")
+                version = (await cursor.fetchone())[0]
+            finally:
+                await cursor.close()
+            if version != self.version:
+                await self._load(conn, version)
+            self._checked_at = time.monotonic()
+
+    async def _load(self, conn, version):
+        cursor = conn.cursor(row_factory=dict_row)
+        try:
+            await cursor.execute(f"SELECT id, {', '.join(CATALOG_FIELDS)} FROM chemicals")
+            chemicals = {}
+            async for row in cursor:
+                chemical_id = row.pop('id')
+                if row['molecular_weight'] is not None:
+                    row['molecular_weight'] = float(row['molecular_weight'])
+                chemicals[chemical_id] = row
+        finally:
+            await cursor.close()
+
+        previous = self.version
+        self._chemicals = chemicals
+        self.version = version
+        logger.info(f"Loaded {len(chemicals)} chemicals into the catalog (version {version})")
+        if previous is not None:
+            # Cached searches carry chemical fields from the previous version
+            get_search_cache().invalidate_all()
+
+_catalog = None
+
+def get_catalog() -> ChemicalCatalog:
+    """Return the process-wide chemical catalog (version checks every CATALOG_CHECK_INTERVAL seconds)"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ChemicalCatalog(check_interval=float(os.environ.get('CATALOG_CHECK_INTERVAL', '5')))
+    return _catalog
@@ -1,13 +1,20 @@
+import json
+import base64
 import logging
-import psycopg2
-import psycopg2.extras
+from decimal import Decimal
+from psycopg.rows import dict_row
+from ..utils.search_cache import get_search_cache
+from .catalog import get_catalog
 
 logger = logging.getLogger(__name__)
 
-def update_inventory_quantity(conn, inventory_id, quantity, action):
+async def update_inventory_quantity(conn, inventory_id, quantity, action):
     """
     Update inventory quantity based on action (add or remove)
     
+    The change is applied with a single conditional UPDATE, so concurrent updates of
+    the same container cannot lose writes or drive the quantity below zero.
+    
     Args:
         conn: Database connection
         inventory_id: ID of the inventory record to update
@@ -19,18 +26,50 @@ def update_inventory_quantity(conn, inventory_id, quantity, action):
     """
     cursor = None
     try:
-        # Log the incoming parameters
-        logger.info(f"Updating inventory: id={inventory_id}, qty={quantity}, action={action}")
+        try:
+            quantity_to_update = Decimal(str(quantity))
+        except Exception as dec_err:
+            logger.error(f"Error converting quantity values: {str(dec_err)}")
+            raise ValueError(f"Invalid quantity values: {str(dec_err)}")
         
         cursor = conn.cursor()
         
-        # First get current quantity
-        query = "SELECT quantity, reorder_quantity FROM inventory WHERE id = %s"
-        logger.debug(f"Executing query: {query} with params: {(inventory_id,)}")
-        cursor.execute(query, (inventory_id,))
+        if action in ("add", "remove"):
+            delta = quantity_to_update if action == "add" else -quantity_to_update
+            update_query = """
+                UPDATE inventory
+                SET quantity = quantity + %(delta)s
+                WHERE id = %(id)s AND quantity + %(delta)s >= 0
+                RETURNING quantity, reorder_quantity
+            """
+            await cursor.execute(update_query, {"id": inventory_id, "delta": delta})
+            result = await cursor.fetchone()
+            
+            if result:
+                await conn.commit()
+                await cursor.close()
+                get_search_cache().invalidate_inventory([inventory_id])
+                
+                new_quantity, reorder_quantity = result
+                logger.info(f"Inventory {inventory_id} {action} {quantity_to_update}: new quantity {new_quantity}")
+                
+                # Create notification message about reordering if needed
+                reorder_message = ""
+                if new_quantity < reorder_quantity:
+                    reorder_message = " Quantity is below reorder level."
+                
+                return {
+                    "success": True,
+                    "new_quantity": float(new_quantity),  # Convert Decimal to float for JSON serialization
+                    "message": f"Inventory updated successfully.{reorder_message}"
+                }
         
-        result = cursor.fetchone()
-        if not result:
+        # Nothing was updated: look the record up to report why
+        await cursor.execute("SELECT quantity FROM inventory WHERE id = %s", (inventory_id,))
+        current = await cursor.fetchone()
+        await cursor.close()
+        
+        if not current:
             logger.error(f"Inventory record {inventory_id} not found")
             return {
                 "success": False,
@@ -38,84 +77,30 @@ def update_inventory_quantity(conn, inventory_id, quantity, action):
                 "message": f"Inventory record {inventory_id} not found"
             }
         
-        current_quantity, reorder_quantity = result
-        logger.info(f"Current quantity: {current_quantity}, Reorder quantity: {reorder_quantity}")
-        
-        # Convert values to compatible types (decimal.Decimal)
-        from decimal import Decimal
-        try:
-            current_quantity = Decimal(str(current_quantity))
-            quantity_to_update = Decimal(str(quantity))
-            logger.debug(f"Converted quantities: current={current_quantity}, update={quantity_to_update}")
-        except Exception as dec_err:
-            logger.error(f"Error converting quantity values: {str(dec_err)}")
-            raise ValueError(f"Invalid quantity values: {str(dec_err)}")
-        
-        # Calculate new quantity based on action
-        if action == "add":
-            new_quantity = current_quantity + quantity_to_update
-            logger.info(f"Adding {quantity_to_update} to {current_quantity}, new quantity: {new_quantity}")
-        elif action == "remove":
-            new_quantity = current_quantity - quantity_to_update
-            logger.info(f"Removing {quantity_to_update} from {current_quantity}, new quantity: {new_quantity}")
-            # Prevent negative inventory
-            if new_quantity < 0:
-                logger.warning(f"Attempted to remove {quantity_to_update} from {current_quantity}, would result in negative inventory")
-                return {
-                    "success": False,
-                    "new_quantity": float(current_quantity),
-                    "message": f"Cannot remove more than available quantity ({current_quantity})"
-                }
-        else:
-            logger.error(f"Invalid action provided: {action}")
+        current_quantity = current[0]
+        if action == "remove":
+            logger.warning(f"Attempted to remove {quantity_to_update} from {current_quantity}, would result in negative inventory")
             return {
                 "success": False,
                 "new_quantity": float(current_quantity),
-                "message": f"Invalid action: {action}. Must be 'add' or 'remove'"
+                "message": f"Cannot remove more than available quantity ({current_quantity})"
             }
         
-        # Update the inventory record
-        update_query = "UPDATE inventory SET quantity = %s WHERE id = %s"
-        logger.debug(f"Executing update: {update_query} with params: ({new_quantity}, {inventory_id})")
-        try:
-            cursor.execute(update_query, (new_quantity, inventory_id))
-            rows_affected = cursor.rowcount
-            logger.info(f"Update affected {rows_affected} rows")
-            
-            if rows_affected == 0:
-                logger.warning(f"Update did not change any rows for inventory_id={inventory_id}")
-        except Exception as sql_err:
-            logger.error(f"SQL error during inventory update: {str(sql_err)}")
-            raise sql_err
-        
-        # Commit the transaction
-        logger.debug("Committing transaction")
-        conn.commit()
-        
-        # Close the cursor
-        if cursor and not cursor.closed:
-            cursor.close()
-        
-        # Create notification message about reordering if needed
-        reorder_message = ""
-        if new_quantity < reorder_quantity:
-            reorder_message = " Quantity is below reorder level."
-            logger.info(f"Inventory below reorder level: current={new_quantity}, reorder={reorder_quantity}")
-        
-        result = {
-            "success": True,
-            "new_quantity": float(new_quantity),  # Convert Decimal to float for JSON serialization
-            "message": f"Inventory updated successfully.{reorder_message}"
+        logger.error(f"Invalid action provided: {action}")
+        return {
+            "success": False,
+            "new_quantity": float(current_quantity),
+            "message": f"Invalid action: {action}. Must be 'add' or 'remove'"
         }
-        logger.info(f"Inventory update successful: {result}")
-        return result
     
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"Error updating inventory: {str(e)}", exc_info=True)
         if cursor and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         try:
-            conn.rollback()
+            await conn.rollback()
             logger.info("Transaction rolled back")
         except Exception as rollback_err:
             logger.error(f"Error during rollback: {str(rollback_err)}")
@@ -123,242 +108,477 @@ def update_inventory_quantity(conn, inventory_id, quantity, action):
         # Re-raise the exception with more context
         raise Exception(f"Inventory update failed: {str(e)}")
 
-def search_chemicals(conn, name=None, building_name=None, lab_room_number=None, locker_number=None, hazard_classification=None):
-    """Search chemicals based on provided criteria"""
+async def update_inventory_batch(conn, items, mode="atomic"):
+    """
+    Apply many inventory adjustments in one transaction
+    
+    Adjustments are summed per inventory record and applied with a single set-based
+    UPDATE guarded against negative quantities. In 'atomic' mode the whole batch is
+    rolled back if any item fails; in 'best_effort' mode the successful items are kept.
+    
+    Args:
+        conn: Database connection
+        items: List of dicts with inventory_id, quantity and action ('add' or 'remove')
+        mode: 'atomic' or 'best_effort'
+    
+    Returns:
+        Dict containing overall success, per-item results (in request order), and message
+    """
+    if mode not in ("atomic", "best_effort"):
+        raise ValueError(f"Invalid mode: {mode}. Must be 'atomic' or 'best_effort'")
+    
+    cursor = None
+    try:
+        # Net change per inventory record, in first-seen order
+        deltas = {}
+        invalid = set()
+        for index, item in enumerate(items):
+            if item["action"] not in ("add", "remove"):
+                invalid.add(index)
+                continue
+            quantity = Decimal(str(item["quantity"]))
+            delta = quantity if item["action"] == "add" else -quantity
+            deltas[item["inventory_id"]] = deltas.get(item["inventory_id"], Decimal(0)) + delta
+        
+        ids = list(deltas)
+        cursor = conn.cursor()
+        update_query = """
+            UPDATE inventory AS i
+            SET quantity = i.quantity + v.delta
+            FROM unnest(%s::int[], %s::numeric[]) AS v(id, delta)
+            WHERE i.id = v.id AND i.quantity + v.delta >= 0
+            RETURNING i.id, i.quantity, i.reorder_quantity
+        """
+        await cursor.execute(update_query, (ids, [deltas[i] for i in ids]))
+        updated = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+        
+        # Only look records up again when some of them could not be updated
+        current = {}
+        failed_ids = [i for i in ids if i not in updated]
+        if failed_ids:
+            await cursor.execute("SELECT id, quantity FROM inventory WHERE id = ANY(%s)", (failed_ids,))
+            current = {row[0]: row[1] for row in await cursor.fetchall()}
+        
+        batch_ok = not failed_ids and not invalid
+        applied = batch_ok or mode == "best_effort"
+        if applied:
+            await conn.commit()
+            if updated:
+                get_search_cache().invalidate_inventory(updated)
+        else:
+            await conn.rollback()
+        await cursor.close()
+        
+        results = []
+        for index, item in enumerate(items):
+            inventory_id = item["inventory_id"]
+            if inventory_id in updated:
+                new_quantity, reorder_quantity = updated[inventory_id]
+                if not applied:
+                    new_quantity -= deltas[inventory_id]
+            else:
+                new_quantity, reorder_quantity = current.get(inventory_id, 0), None
+            
+            if index in invalid:
+                message = f"Invalid action: {item['action']}. Must be 'add' or 'remove'"
+                success = False
+            elif inventory_id not in updated and inventory_id not in current:
+                message = f"Inventory record {inventory_id} not found"
+                success = False
+            elif inventory_id not in updated:
+                message = f"Cannot remove more than available quantity ({new_quantity})"
+                success = False
+            elif not applied:
+                message = "Not applied because another item in the batch failed"
+                success = False
+            else:
+                reorder_message = " Quantity is below reorder level." if new_quantity < reorder_quantity else ""
+                message = f"Inventory updated successfully.{reorder_message}"
+                success = True
+            
+            results.append({
+                "inventory_id": inventory_id,
+                "success": success,
+                "new_quantity": float(new_quantity),
+                "message": message
+            })
+        
+        succeeded = sum(1 for r in results if r["success"])
+        logger.info(f"Inventory batch ({mode}): {succeeded} of {len(items)} items applied")
+        return {
+            "success": batch_ok,
+            "results": results,
+            "message": f"{succeeded} of {len(items)} inventory updates applied"
+        }
+    
+    except Exception as e:
+        logger.error(f"Error updating inventory batch: {str(e)}", exc_info=True)
+        if cursor and not cursor.closed:
+            await cursor.close()
+        await conn.rollback()
+        raise Exception(f"Inventory batch update failed: {str(e)}")
+
+# Columns of a chemical search result row, in the order of the columnar response
+SEARCH_RESULT_COLUMNS = [
+    "id", "name", "unit_of_measure", "quantity", "reorder_quantity",
+    "building_name", "lab_room_number", "locker_number", "cas_number", "chemical_formula",
+    "signal_word", "physical_state", "hazard_classification", "chemical_description",
+    "molecular_weight", "sds_link"
+]
+
+def search_rows_to_records(columns, rows):
+    """Expand columnar search rows into one dict per chemical"""
+    return [dict(zip(columns, row)) for row in rows]
+
+# Sortable search columns: the search page's column key -> (SQL expression, type of its cursor value).
+# Nullable text columns are coalesced so that keyset comparisons never see NULL.
+SEARCH_SORT_COLUMNS = {
+    'name': ("c.name", "text"),
+    'uom': ("c.unit_of_measure", "text"),
+    'qty': ("i.quantity", "numeric"),
+    'reorder_qty': ("i.reorder_quantity", "numeric"),
+    'bld_name': ("l.building_name", "text"),
+    'lab_room': ("l.lab_room_number", "int"),
+    'locker': ("l.locker_number", "int"),
+    'cas_number': ("COALESCE(c.cas_number, '')", "text"),
+    'chemical_formula': ("COALESCE(c.chemical_formula, '')", "text"),
+    'signal_word': ("COALESCE(c.signal_word, '')", "text"),
+    'physical_state': ("COALESCE(c.physical_state, '')", "text"),
+    # Trigram similarity to the name searched for (needs pg_trgm and a name filter)
+    'relevance': ("similarity(c.name, %(name)s)", "real"),
+    # Full-text rank against the free-text query (scripts/add_chemical_search_vector.sql)
+    'rank': ("ts_rank(c.search_vector, websearch_to_tsquery('english', %(query)s))", "real")
+}
+
+def like_pattern(value):
+    """Substring ILIKE pattern with the user's own %, _ and backslashes matched literally"""
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def encode_search_cursor(sort, direction, sort_value, inventory_id):
+    """Build the opaque cursor pointing just after the given row"""
+    payload = json.dumps([sort, direction, str(sort_value), inventory_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_search_cursor(cursor, sort, direction):
+    """Return (sort_value, inventory_id) from a cursor issued for the same sort and direction"""
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, cursor_direction, sort_value, inventory_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid search cursor")
+    if cursor_sort != sort or cursor_direction != direction:
+        raise ValueError("Search cursor does not match the requested sort order")
+    return sort_value, int(inventory_id)
+
+async def search_chemicals(conn, name=None, building_name=None, lab_room_number=None, locker_number=None, hazard_classification=None,
+                           limit=None, sort=None, direction=None, cursor=None, query=None):
+    """
+    Search chemicals based on provided criteria
+    
+    Results are returned in columnar form (column names plus one list per row); use
+    search_rows_to_records for the dict per row shape.
+    
+    Results are ordered in SQL by the requested column with the inventory ID as a tiebreaker.
+    When a limit is given, one page is returned along with a next_cursor for the following page
+    (None on the last page); passing that cursor back continues after the last row seen.
+    Name and hazard filters are substring matches served by trigram indexes; with a name
+    filter, sort="relevance" (direction "desc") ranks the closest names first.
+    A free-text query (web search syntax) matches name, CAS number, formula, hazard
+    classification and description through the search_vector index; results are then
+    ordered by rank unless another sort is requested.
+    """
+    if sort is None:
+        sort = "rank" if query else "name"
+    if direction is None:
+        direction = "desc" if sort in ("rank", "relevance") else "asc"
+    if sort not in SEARCH_SORT_COLUMNS:
+        raise ValueError(f"Invalid sort column: {sort}")
+    direction = direction.lower()
+    if direction not in ("asc", "desc"):
+        raise ValueError(f"Invalid sort direction: {direction}. Must be 'asc' or 'desc'")
+    if sort == "relevance" and not name:
+        raise ValueError("Sorting by relevance requires a name to search for")
+    if sort == "rank" and not query:
+        raise ValueError("Sorting by rank requires a query")
+    sort_expr, sort_type = SEARCH_SORT_COLUMNS[sort]
+    
+    try:
+        db_cursor = conn.cursor()
+        
+        # Chemical fields come from the in-memory catalog; chemicals is only joined
+        # when a filter or the sort order needs its columns
+        needs_chemicals = bool(name or hazard_classification or query) or "c." in sort_expr
+        chemicals_join = "JOIN chemicals c ON i.chemical_id = c.id" if needs_chemicals else ""
         
         # Build the query
-        query = """
+        query_sql = f"""
             SELECT 
                 i.id,
-                c.name,
-                c.unit_of_measure,
+                i.chemical_id,
                 i.quantity,
                 i.reorder_quantity,
                 l.building_name,
                 l.lab_room_number,
                 l.locker_number,
-                c.cas_number,
-                c.chemical_formula,
-                c.signal_word,
-                c.physical_state,
-                c.hazard_classification,
-                c.chemical_description,
-                c.molecular_weight,
-                c.sds_link
+                {sort_expr} AS sort_value
             FROM 
                 inventory i
-                JOIN chemicals c ON i.chemical_id = c.id
                 JOIN locations l ON i.location_id = l.location_id
+                {chemicals_join}
             WHERE 1=1
         """
         
-        params = []
+        params = {"name": name, "query": query}
+        
+        if query:
+            query_sql += " AND c.search_vector @@ websearch_to_tsquery('english', %(query)s)"
         
         # Add filters based on request parameters
         if name:
-            query += " AND c.name ILIKE %s"
-            params.append(f"%{name}%")
+            # Served by the trigram index on chemicals.name (scripts/add_trigram_indexes.sql)
+            query_sql += " AND c.name ILIKE %(name_pattern)s"
+            params["name_pattern"] = like_pattern(name)
         
         if building_name:
-            query += " AND l.building_name = %s"
-            params.append(building_name)
+            query_sql += " AND l.building_name = %(building_name)s"
+            params["building_name"] = building_name
         
         if lab_room_number is not None:
-            query += " AND l.lab_room_number = %s"
-            params.append(lab_room_number)
+            query_sql += " AND l.lab_room_number = %(lab_room_number)s"
+            params["lab_room_number"] = lab_room_number
         
         if locker_number is not None:
-            query += " AND l.locker_number = %s"
-            params.append(locker_number)
+            query_sql += " AND l.locker_number = %(locker_number)s"
+            params["locker_number"] = locker_number
         
         if hazard_classification:
-            query += " AND c.hazard_classification ILIKE %s"
-            params.append(f"%{hazard_classification}%")
+            query_sql += " AND c.hazard_classification ILIKE %(hazard_pattern)s"
+            params["hazard_pattern"] = like_pattern(hazard_classification)
 
-        query += " ORDER BY c.name"
+        # Continue after the last row of the previous page
+        if cursor:
+            sort_value, last_id = decode_search_cursor(cursor, sort, direction)
+            comparison = ">" if direction == "asc" else "<"
+            query_sql += f" AND ({sort_expr}, i.id) {comparison} (%(after_value)s::{sort_type}, %(after_id)s)"
+            params["after_value"] = sort_value
+            params["after_id"] = last_id
         
-        # Execute the query
-        cursor.execute(query, params)
+        query_sql += f" ORDER BY {sort_expr} {direction.upper()}, i.id {direction.upper()}"
         
-        # Process the results
-        chemicals = []
-        for row in cursor:
-            chemicals.append({
-                "id": row['id'],
-                "name": row['name'],
-                "unit_of_measure": row['unit_of_measure'],
-                "quantity": float(row['quantity']),
-                "reorder_quantity": float(row['reorder_quantity']),
-                "building_name": row['building_name'],
-                "lab_room_number": row['lab_room_number'],
-                "locker_number": row['locker_number'],
-                "cas_number": row['cas_number'],
-                "chemical_formula": row['chemical_formula'],
-                "signal_word": row['signal_word'],
-                "physical_state": row['physical_state'],
-                "hazard_classification": row['hazard_classification'],
-                "chemical_description": row['chemical_description'],
-                "molecular_weight": row['molecular_weight'],
-                "sds_link": row['sds_link']
-            })
+        # Fetch one extra row to learn whether another page follows
+        if limit:
+            query_sql += " LIMIT %(limit)s"
+            params["limit"] = limit + 1
+        
+        # Execute the query
+        await db_cursor.execute(query_sql, params)
+        rows = await db_cursor.fetchall()
+        await db_cursor.close()
+        
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_search_cursor(sort, direction, rows[-1][-1], rows[-1][0])
+        
+        # Process the results, filling in chemical fields from the catalog
+        chemicals = await get_catalog().get_many(conn, {row[1] for row in rows})
+        results = []
+        for inventory_id, chemical_id, quantity, reorder_quantity, building, lab_room, locker, _ in rows:
+            chemical = chemicals[chemical_id]
+            results.append([
+                inventory_id,
+                chemical["name"],
+                chemical["unit_of_measure"],
+                float(quantity),
+                float(reorder_quantity),
+                building,
+                lab_room,
+                locker,
+                chemical["cas_number"],
+                chemical["chemical_formula"],
+                chemical["signal_word"],
+                chemical["physical_state"],
+                chemical["hazard_classification"],
+                chemical["chemical_description"],
+                chemical["molecular_weight"],
+                chemical["sds_link"]
+            ])
         
-        cursor.close()
         return {
             "success": True,
-            "results": chemicals,
-            "message": f"Found {len(chemicals)} chemicals matching the criteria"
+            "columns": SEARCH_RESULT_COLUMNS,
+            "rows": results,
+            "next_cursor": next_cursor,
+            "message": f"Found {len(results)} chemicals matching the criteria"
         }
     
     except Exception as e:
         logger.error(f"Error searching chemicals: {str(e)}")
-        if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+        if 'db_cursor' in locals() and not db_cursor.closed:
+            await db_cursor.close()
         raise e
 
-def get_chemical_by_id(conn, inventory_id):
-    """Get a specific chemical by its inventory ID"""
+async def get_chemicals_by_ids(conn, inventory_ids):
+    """
+    Get many chemicals by their inventory IDs in one query
+    
+    Args:
+        conn: Database connection
+        inventory_ids: List of inventory IDs
+        
+    Returns:
+        Dict containing success, chemicals (in the order requested, duplicates once),
+        missing_ids, and message
+    """
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        inventory_ids = list(dict.fromkeys(inventory_ids))
+        cursor = conn.cursor(row_factory=dict_row)
         
-        # Build the query
+        # Build the query (chemical fields come from the in-memory catalog)
         query = """
             SELECT 
                 i.id,
-                c.name,
-                c.unit_of_measure,
+                i.chemical_id,
                 i.quantity,
                 i.reorder_quantity,
                 l.building_name,
                 l.lab_room_number,
-                l.locker_number,
-                c.cas_number,
-                c.chemical_formula,
-                c.signal_word,
-                c.physical_state,
-                c.hazard_classification,
-                c.chemical_description,
-                c.molecular_weight,
-                c.sds_link
+                l.locker_number
             FROM 
                 inventory i
-                JOIN chemicals c ON i.chemical_id = c.id
                 JOIN locations l ON i.location_id = l.location_id
             WHERE 
-                i.id = %s
+                i.id = ANY(%s)
         """
         
         # Execute the query
-        cursor.execute(query, (inventory_id,))
+        await cursor.execute(query, (inventory_ids,))
+        rows = {row['id']: row for row in await cursor.fetchall()}
+        await cursor.close()
         
-        # Process the result
-        row = cursor.fetchone()
-        if not row:
-            cursor.close()
-            return {
-                "success": False,
-                "chemical": None,
-                "message": f"Chemical with inventory ID {inventory_id} not found"
-            }
+        catalog = await get_catalog().get_many(conn, {row['chemical_id'] for row in rows.values()})
         
-        chemical = {
-            "id": row['id'],
-            "name": row['name'],
-            "unit_of_measure": row['unit_of_measure'],
-            "quantity": float(row['quantity']),
-            "reorder_quantity": float(row['reorder_quantity']),
-            "building_name": row['building_name'],
-            "lab_room_number": row['lab_room_number'],
-            "locker_number": row['locker_number'],
-            "cas_number": row['cas_number'],
-            "chemical_formula": row['chemical_formula'],
-            "signal_word": row['signal_word'],
-            "physical_state": row['physical_state'],
-            "hazard_classification": row['hazard_classification'],
-            "chemical_description": row['chemical_description'],
-            "molecular_weight": row['molecular_weight'],
-            "sds_link": row['sds_link']
-        }
+        # Process the results
+        chemicals = []
+        for inventory_id in inventory_ids:
+            row = rows.get(inventory_id)
+            if row is None:
+                continue
+            catalog_entry = catalog[row['chemical_id']]
+            chemicals.append({
+                "id": row['id'],
+                "name": catalog_entry['name'],
+                "unit_of_measure": catalog_entry['unit_of_measure'],
+                "quantity": float(row['quantity']),
+                "reorder_quantity": float(row['reorder_quantity']),
+                "building_name": row['building_name'],
+                "lab_room_number": row['lab_room_number'],
+                "locker_number": row['locker_number'],
+                "cas_number": catalog_entry['cas_number'],
+                "chemical_formula": catalog_entry['chemical_formula'],
+                "signal_word": catalog_entry['signal_word'],
+                "physical_state": catalog_entry['physical_state'],
+                "hazard_classification": catalog_entry['hazard_classification'],
+                "chemical_description": catalog_entry['chemical_description'],
+                "molecular_weight": catalog_entry['molecular_weight'],
+                "sds_link": catalog_entry['sds_link']
+            })
         
-        cursor.close()
+        missing_ids = [inventory_id for inventory_id in inventory_ids if inventory_id not in rows]
         return {
-            "success": True,
-            "chemical": chemical,
-            "message": "Chemical found"
+            "success": not missing_ids,
+            "chemicals": chemicals,
+            "missing_ids": missing_ids,
+            "message": f"Found {len(chemicals)} of {len(inventory_ids)} chemicals"
         }
     
     except Exception as e:
-        logger.error(f"Error getting chemical by ID: {str(e)}")
+        logger.error(f"Error getting chemicals by ID: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def get_reorder_notifications(conn):
-    """Get users who should be notified about chemicals that need reordering"""
+async def get_chemical_by_id(conn, inventory_id):
+    """Get a specific chemical by its inventory ID"""
+    result = await get_chemicals_by_ids(conn, [inventory_id])
+    if not result["chemicals"]:
+        return {
+            "success": False,
+            "chemical": None,
+            "message": f"Chemical with inventory ID {inventory_id} not found"
+        }
+    
+    return {
+        "success": True,
+        "chemical": result["chemicals"][0],
+        "message": "Chemical found"
+    }
+
+async def get_reorder_notifications(conn, since=None):
+    """
+    Get users who should be notified about chemicals that need reordering
+    
+    Without a since token every item currently below its reorder level is returned. With
+    the next_token of a previous call, only items that crossed below their reorder level
+    after that call (and are still low) are returned. Crossings are recorded by a trigger
+    (scripts/add_inventory_reorder_events.sql).
+    """
+    if since is not None and not since.isdigit():
+        raise ValueError(f"Invalid since token: {since}")
+    
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        
-        # Find all chemicals where quantity is below reorder_quantity
+        cursor = conn.cursor(row_factory=dict_row)
+        
+        # Watermark for the next delta run: every transaction older than the oldest one
+        # still running has finished, so all of their crossing events are visible now
+        await cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text AS watermark")
+        next_token = (await cursor.fetchone())['watermark']
+        
+        crossed_filter = ""
+        params = {}
+        if since is not None:
+            crossed_filter = """
+                    AND i.id IN (
+                        SELECT inventory_id
+                        FROM inventory_reorder_events
+                        WHERE xid >= %(since)s::xid8 AND xid < %(until)s::xid8
+                    )"""
+            params = {"since": since, "until": next_token}
+        
+        # Low-stock items in each notified user's building and lab room. Scopes are kept
+        # current from user_preferences by a trigger, and only inventory below its reorder
+        # level is read, via the partial index (scripts/add_reorder_notification_scopes.sql)
         query = """
-            WITH low_inventory AS (
-                SELECT 
-                    i.id,
-                    c.name,
-                    c.unit_of_measure,
-                    i.quantity,
-                    i.reorder_quantity,
-                    l.building_name,
-                    l.lab_room_number,
-                    l.location_id
-                FROM 
-                    inventory i
-                    JOIN chemicals c ON i.chemical_id = c.id
-                    JOIN locations l ON i.location_id = l.location_id
-                WHERE 
-                    i.quantity < i.reorder_quantity
-            ),
-            users_with_prefs AS (
-                SELECT 
-                    u.user_name,
-                    u.email_address,
-                    up_building.preference_value as building,
-                    up_lab.preference_value as lab_room,
-                    up_notif.preference_value as notification_pref
-                FROM 
-                    users u
-                    LEFT JOIN user_preferences up_building ON u.user_name = up_building.user_name AND up_building.preference_key = 'building'
-                    LEFT JOIN user_preferences up_lab ON u.user_name = up_lab.user_name AND up_lab.preference_key = 'lab_room'
-                    LEFT JOIN user_preferences up_notif ON u.user_name = up_notif.user_name AND up_notif.preference_key = 'reorder_notification'
-                WHERE
-                    up_notif.preference_value = 'on'
-            )
             SELECT 
                 u.user_name,
                 u.email_address,
-                li.id,
-                li.name,
-                li.unit_of_measure,
-                li.quantity,
-                li.reorder_quantity,
-                li.building_name,
-                li.lab_room_number
+                i.id,
+                c.name,
+                c.unit_of_measure,
+                i.quantity,
+                i.reorder_quantity,
+                l.building_name,
+                l.lab_room_number
             FROM 
-                users_with_prefs u
-                JOIN low_inventory li ON (
-                    (u.building = li.building_name OR u.building IS NULL OR u.building = '') 
-                    AND 
-                    (CAST(u.lab_room AS INTEGER) = li.lab_room_number OR u.lab_room IS NULL OR u.lab_room = '')
+                user_notification_scopes s
+                JOIN users u ON u.user_name = s.user_name
+                JOIN locations l ON (
+                    (s.building_name IS NULL OR l.building_name = s.building_name)
+                    AND
+                    (s.lab_room_number IS NULL OR l.lab_room_number = s.lab_room_number)
                 )
+                JOIN inventory i ON i.location_id = l.location_id AND i.quantity < i.reorder_quantity""" + crossed_filter + """
+                JOIN chemicals c ON i.chemical_id = c.id
             ORDER BY 
-                u.user_name, li.name
+                u.user_name, c.name
         """
         
-        cursor.execute(query)
+        await cursor.execute(query, params)
         
         # Organize results by user
         user_chemicals = {}
-        for row in cursor:
+        async for row in cursor:
             username = row['user_name']
             
             if username not in user_chemicals:
@@ -381,15 +601,16 @@ def get_reorder_notifications(conn):
         # Convert to list for response
         users = list(user_chemicals.values())
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True,
             "users": users,
+            "next_token": next_token,
             "message": f"Found {len(users)} users to notify"
         }
     
     except Exception as e:
         logger.error(f"Error getting reorder notifications: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
@@ -0,0 +1,103 @@
+import json
+import logging
+from psycopg.rows import dict_row
+from ..database import db_connection
+from .bulk_import import IMPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Exported fields: the inventory ID followed by the fields bulk import reads
+EXPORT_COLUMNS = ["inventory_id"] + IMPORT_COLUMNS
+
+# Bytes collected before a chunk is sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Rows fetched per round trip by the NDJSON server-side cursor
+EXPORT_FETCH_ROWS = 1000
+
+def _export_query(building_name=None, lab_room_number=None):
+    """SELECT for the export and its parameters"""
+    column_sql = {
+        "inventory_id": "i.id",
+        "quantity": "i.quantity",
+        "reorder_quantity": "i.reorder_quantity",
+        **{column: f"l.{column}" for column in ("building_name", "lab_room_number", "locker_number")}
+    }
+    select_list = ", ".join(
+        f"{column_sql.get(column, 'c.' + column)} AS {column}" for column in EXPORT_COLUMNS
+    )
+
+    query = f"""
+        SELECT {select_list}
+        FROM
+            inventory i
+            JOIN chemicals c ON i.chemical_id = c.id
+            JOIN locations l ON i.location_id = l.location_id
+    """
+    conditions = []
+    params = []
+    if building_name:
+        conditions.append("l.building_name = %s")
+        params.append(building_name)
+    if lab_room_number is not None:
+        conditions.append("l.lab_room_number = %s")
+        params.append(lab_room_number)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY i.id"
+    return query, params
+
+async def export_inventory(fmt="csv", building_name=None, lab_room_number=None):
+    """
+    Stream the inventory, with chemical and location details, as CSV or NDJSON
+
+    An async generator of byte chunks. CSV comes straight from COPY ... TO STDOUT and
+    NDJSON from a server-side cursor, so memory use does not grow with the inventory.
+    The first line is sent as soon as it arrives and later ones in chunks of about
+    EXPORT_CHUNK_SIZE bytes. The pooled connection is held only while the generator runs.
+
+    Args:
+        fmt: 'csv' (with a header line) or 'ndjson' (one JSON object per line)
+        building_name: Optional building to export
+        lab_room_number: Optional lab room to export
+    """
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"Invalid format: {fmt}. Must be 'csv' or 'ndjson'")
+
+    query, params = _export_query(building_name, lab_room_number)
+    rows = 0
+    buffer = bytearray()
+
+    async with db_connection() as conn:
+        if fmt == "csv":
+            cursor = conn.cursor()
+            try:
+                # COPY cannot take server-side parameters; psycopg binds them client-side
+                async with cursor.copy(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", params) as copy:
+                    async for data in copy:
+                        buffer += data
+                        rows += 1
+                        if rows == 1 or len(buffer) >= EXPORT_CHUNK_SIZE:
+                            yield bytes(buffer)
+                            buffer.clear()
+            finally:
+                await cursor.close()
+            rows -= 1  # header line
+        else:
+            cursor = conn.cursor(name="inventory_export", row_factory=dict_row)
+            cursor.itersize = EXPORT_FETCH_ROWS
+            try:
+                await cursor.execute(query, params)
+                async for row in cursor:
+                    # Decimal columns (quantities, molecular weight) are written as numbers
+                    buffer += json.dumps(row, default=float).encode() + b"\n"
+                    rows += 1
+                    if rows == 1 or len(buffer) >= EXPORT_CHUNK_SIZE:
+                        yield bytes(buffer)
+                        buffer.clear()
+            finally:
+                await cursor.close()
+
+    if buffer:
+        yield bytes(buffer)
+    logger.info(f"Exported {rows} inventory records as {fmt}")
@@ -1,70 +1,45 @@
 import logging
-import psycopg2
-import psycopg2.extras
+import psycopg
+from psycopg.rows import dict_row
+from ..utils.search_cache import get_search_cache
+from .location_tree import get_location_tree
 
 logger = logging.getLogger(__name__)
 
-def get_buildings(conn):
-    """Get a list of unique building names"""
-    try:
-        cursor = conn.cursor()
-        
-        # Query to get unique building names
-        query = """
-            SELECT DISTINCT building_name
-            FROM locations
-            ORDER BY building_name ASC
-        """
-        
-        cursor.execute(query)
-        buildings = [row[0] for row in cursor.fetchall()]
-        
-        cursor.close()
-        return {
-            "success": True,
-            "buildings": buildings,
-            "message": f"Found {len(buildings)} buildings"
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting buildings: {str(e)}")
-        if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
-        raise e
+def get_buildings(tree):
+    """Get a list of unique building names from the location tree"""
+    buildings = tree.building_names()
+    return {
+        "success": True,
+        "buildings": buildings,
+        "message": f"Found {len(buildings)} buildings"
+    }
 
-def get_lab_rooms(conn, building_name: str):
-    """Get a list of unique lab room numbers for a specific building"""
-    try:
-        cursor = conn.cursor()
-        
-        # Query to get unique lab room numbers for the specified building
-        query = """
-            SELECT DISTINCT lab_room_number
-            FROM locations
-            WHERE building_name = %s
-            ORDER BY lab_room_number ASC
-        """
-        
-        cursor.execute(query, (building_name,))
-        lab_rooms = [row[0] for row in cursor.fetchall()]
-        
-        cursor.close()
-        return {
-            "success": True,
-            "lab_rooms": lab_rooms,
-            "message": f"Found {len(lab_rooms)} lab rooms for building {building_name}"
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting lab rooms: {str(e)}")
-        if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
-        raise e
+def get_lab_rooms(tree, building_name: str):
+    """Get a list of unique lab room numbers for a specific building from the location tree"""
+    lab_rooms = tree.lab_rooms(building_name)
+    return {
+        "success": True,
+        "lab_rooms": lab_rooms,
+        "message": f"Found {len(lab_rooms)} lab rooms for building {building_name}"
+    }
+
+def get_location_hierarchy(tree):
+    """Get the whole building -> lab room -> locker hierarchy from the location tree"""
+    buildings = {
+        building_name: {str(lab_room_number): lockers for lab_room_number, lockers in lab_rooms.items()}
+        for building_name, lab_rooms in tree.buildings.items()
+    }
+    return {
+        "success": True,
+        "buildings": buildings,
+        "message": f"Found {len(buildings)} buildings"
+    }
 
-def get_locations(conn):
+async def get_locations(conn):
     """Get all locations from database"""
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cursor = conn.cursor(row_factory=dict_row)
         
         # Query to get all locations
         query = """
@@ -73,11 +48,11 @@ def get_locations(conn):
             ORDER BY building_name ASC, lab_room_number ASC, locker_number ASC
         """
         
-        cursor.execute(query)
+        await cursor.execute(query)
         locations = []
         
         # Process the results
-        for row in cursor:
+        async for row in cursor:
             locations.append({
                 "location_id": row['location_id'],
                 "building_name": row['building_name'],
@@ -85,7 +60,7 @@ def get_locations(conn):
                 "locker_number": row['locker_number']
             })
         
-        cursor.close()    
+        await cursor.close()    
         return {
             "success": True,
             "locations": locations,
@@ -95,56 +70,51 @@ def get_locations(conn):
     except Exception as e:
         logger.error(f"Error getting locations: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def create_location(conn, building_name: str, lab_room_number: int, locker_number: int):
-    """Create a new location"""
+async def create_location(conn, building_name: str, lab_room_number: int, locker_number: int):
+    """Create a new location (duplicates are rejected by the locations unique constraint)"""
     try:
         cursor = conn.cursor()
         
-        # Check if location with same building, room, and locker already exists
-        check_query = """
-            SELECT location_id 
-            FROM locations 
-            WHERE building_name = %s AND lab_room_number = %s AND locker_number = %s
+        # Insert new location; a duplicate building, room and locker inserts nothing
+        insert_query = """
+            INSERT INTO locations (building_name, lab_room_number, locker_number)
+            VALUES (%s, %s, %s)
+            ON CONFLICT DO NOTHING
+            RETURNING location_id
         """
-        cursor.execute(check_query, (building_name, lab_room_number, locker_number))
-        existing_location = cursor.fetchone()
+        await cursor.execute(insert_query, (building_name, lab_room_number, locker_number))
+        row = await cursor.fetchone()
         
-        if existing_location:
-            cursor.close()
+        if row is None:
+            await conn.rollback()
+            await cursor.close()
             return {
                 "success": False, 
                 "message": f"Location already exists with building {building_name}, room {lab_room_number}, locker {locker_number}"
             }
         
-        # Insert new location
-        insert_query = """
-            INSERT INTO locations (building_name, lab_room_number, locker_number)
-            VALUES (%s, %s, %s)
-            RETURNING location_id
-        """
-        cursor.execute(insert_query, (building_name, lab_room_number, locker_number))
-        new_location_id = cursor.fetchone()[0]
-        conn.commit()
+        await conn.commit()
+        get_location_tree().invalidate()
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True, 
             "message": "Location created successfully",
-            "location_id": new_location_id
+            "location_id": row[0]
         }
     
     except Exception as e:
         logger.error(f"Error creating location: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def update_location(conn, location_id: int, building_name: str, lab_room_number: int, locker_number: int):
-    """Update an existing location"""
+async def update_location(conn, location_id: int, building_name: str, lab_room_number: int, locker_number: int):
+    """Update an existing location (duplicates are rejected by the locations unique constraint)"""
     try:
         if not location_id:
             return {
@@ -154,52 +124,42 @@ def update_location(conn, location_id: int, building_name: str, lab_room_number:
         
         cursor = conn.cursor()
         
-        # Check if location exists
-        check_query = "SELECT location_id FROM locations WHERE location_id = %s"
-        cursor.execute(check_query, (location_id,))
-        if not cursor.fetchone():
-            cursor.close()
+        # Update location
+        update_query = """
+            UPDATE locations
+            SET building_name = %s, lab_room_number = %s, locker_number = %s
+            WHERE location_id = %s
+            RETURNING location_id
+        """
+        try:
+            await cursor.execute(update_query, (
+                building_name, 
+                lab_room_number,
+                locker_number,
+                location_id
+            ))
+        except psycopg.errors.UniqueViolation:
+            await conn.rollback()
+            await cursor.close()
             return {
                 "success": False, 
-                "message": f"Location with ID {location_id} not found"
+                "message": f"Another location already exists with building {building_name}, room {lab_room_number}, locker {locker_number}"
             }
         
-        # Check if another location with same building, room, and locker exists (excluding this one)
-        check_duplicate_query = """
-            SELECT location_id 
-            FROM locations 
-            WHERE building_name = %s AND lab_room_number = %s AND locker_number = %s AND location_id != %s
-        """
-        cursor.execute(check_duplicate_query, (
-            building_name, 
-            lab_room_number,
-            locker_number,
-            location_id
-        ))
-        existing_location = cursor.fetchone()
-        
-        if existing_location:
-            cursor.close()
+        if await cursor.fetchone() is None:
+            await conn.rollback()
+            await cursor.close()
             return {
                 "success": False, 
-                "message": f"Another location already exists with building {building_name}, room {lab_room_number}, locker {locker_number}"
+                "message": f"Location with ID {location_id} not found"
             }
         
-        # Update location
-        update_query = """
-            UPDATE locations
-            SET building_name = %s, lab_room_number = %s, locker_number = %s
-            WHERE location_id = %s
-        """
-        cursor.execute(update_query, (
-            building_name, 
-            lab_room_number,
-            locker_number,
-            location_id
-        ))
-        conn.commit()
+        await conn.commit()
+        # Searches show, and may filter on, the old building, room and locker
+        get_search_cache().invalidate_all()
+        get_location_tree().invalidate()
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True, 
             "message": "Location updated successfully",
@@ -208,33 +168,35 @@ def update_location(conn, location_id: int, building_name: str, lab_room_number:
     
     except Exception as e:
         logger.error(f"Error updating location: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def check_location(conn, location_id: int):
+async def check_location(conn, location_id: int):
     """Check if a location has inventory associated with it"""
     try:
         cursor = conn.cursor()
         
-        # Check if location exists
-        check_query = "SELECT location_id FROM locations WHERE location_id = %s"
-        cursor.execute(check_query, (location_id,))
-        if not cursor.fetchone():
-            cursor.close()
+        # No row means the location does not exist
+        check_query = """
+            SELECT (SELECT COUNT(*) FROM inventory i WHERE i.location_id = l.location_id)
+            FROM locations l
+            WHERE l.location_id = %s
+        """
+        await cursor.execute(check_query, (location_id,))
+        row = await cursor.fetchone()
+        
+        if row is None:
+            await cursor.close()
             return {
                 "success": False, 
                 "has_inventory": False,
                 "message": f"Location with ID {location_id} not found"
             }
         
-        # Check if location has inventory
-        inventory_query = "SELECT COUNT(*) FROM inventory WHERE location_id = %s"
-        cursor.execute(inventory_query, (location_id,))
-        inventory_count = cursor.fetchone()[0]
-        
-        cursor.close()
+        inventory_count = row[0]
+        await cursor.close()
         return {
             "success": True, 
             "has_inventory": inventory_count > 0,
@@ -244,42 +206,58 @@ def check_location(conn, location_id: int):
     except Exception as e:
         logger.error(f"Error checking location inventory: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def delete_location(conn, location_id: int):
+async def _location_delete_failure(cursor, location_id: int):
+    """Explain why a location was not deleted: it does not exist or it still has inventory"""
+    await cursor.execute("""
+        SELECT
+            EXISTS (SELECT 1 FROM locations WHERE location_id = %s),
+            (SELECT COUNT(*) FROM inventory WHERE location_id = %s)
+    """, (location_id, location_id))
+    exists, inventory_count = await cursor.fetchone()
+    if not exists:
+        return {
+            "success": False, 
+            "message": f"Location with ID {location_id} not found"
+        }
+    return {
+        "success": False, 
+        "message": f"Cannot delete location with ID {location_id}. It has {inventory_count} inventory items."
+    }
+
+async def delete_location(conn, location_id: int):
     """Delete a location if it has no inventory"""
     try:
         cursor = conn.cursor()
         
-        # Check if location exists
-        check_query = "SELECT location_id FROM locations WHERE location_id = %s"
-        cursor.execute(check_query, (location_id,))
-        if not cursor.fetchone():
-            cursor.close()
-            return {
-                "success": False, 
-                "message": f"Location with ID {location_id} not found"
-            }
-        
-        # Check if location has inventory
-        inventory_query = "SELECT COUNT(*) FROM inventory WHERE location_id = %s"
-        cursor.execute(inventory_query, (location_id,))
-        inventory_count = cursor.fetchone()[0]
+        # Delete location only if no inventory refers to it
+        delete_query = """
+            DELETE FROM locations l
+            WHERE l.location_id = %s
+              AND NOT EXISTS (SELECT 1 FROM inventory i WHERE i.location_id = l.location_id)
+            RETURNING l.location_id
+        """
+        try:
+            await cursor.execute(delete_query, (location_id,))
+            deleted = await cursor.fetchone() is not None
+        except psycopg.errors.ForeignKeyViolation:
+            # Inventory was added to the location after the NOT EXISTS check
+            await conn.rollback()
+            deleted = False
         
-        if inventory_count > 0:
-            cursor.close()
-            return {
-                "success": False, 
-                "message": f"Cannot delete location with ID {location_id}. It has {inventory_count} inventory items."
-            }
+        if not deleted:
+            await conn.rollback()
+            result = await _location_delete_failure(cursor, location_id)
+            await conn.rollback()
+            await cursor.close()
+            return result
         
-        # Delete location
-        delete_query = "DELETE FROM locations WHERE location_id = %s"
-        cursor.execute(delete_query, (location_id,))
-        conn.commit()
+        await conn.commit()
+        get_location_tree().invalidate()
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True, 
             "message": f"Location with ID {location_id} deleted successfully"
@@ -287,7 +265,7 @@ def delete_location(conn, location_id: int):
     
     except Exception as e:
         logger.error(f"Error deleting location: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from ..database import db_connection
+
+logger = logging.getLogger(__name__)
+
+class LocationTree:
+    """
+    In-memory building -> lab room -> locker hierarchy, stamped with its cache_versions counter
+
+    The counter is bumped by a trigger on every change to locations
+    (scripts/add_location_cache_version.sql) and checked at most once per check_interval,
+    so building and lab room lookups need no database query in steady state. The location
+    services call invalidate() after their own changes so this process sees them at once.
+    The etag is a hash of the tree's contents, so every process serving the same locations
+    hands out the same ETag.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self.version = None
+        self.etag = None
+        self.buildings = {}  # {building_name: {lab_room_number: [locker_number, ...]}}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_current(self):
+        return self.version is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    async def current(self):
+        """Return the tree, checking its version first if a check is due"""
+        if not self._is_current():
+            async with self._lock:
+                if not self._is_current():
+                    async with db_connection() as conn:
+                        await self.refresh(conn)
+        return self
+
+    def invalidate(self):
+        """Check the version on the next request (called after changing locations)"""
+        self._checked_at = 0.0
+
+    async def refresh(self, conn):
+        """Reload the tree if its version changed"""
+        cursor = conn.cursor()
+        try:
+            await cursor.execute("SELECT version FROM cache_versions WHERE name = 'locations'")
+            version = (await cursor.fetchone())[0]
+            if version != self.version:
+                await cursor.execute("""
+                    SELECT building_name, lab_room_number, locker_number
+                    FROM locations
+                    ORDER BY building_name, lab_room_number, locker_number
+                """)
+                buildings = {}
+                async for building_name, lab_room_number, locker_number in cursor:
+                    lockers = buildings.setdefault(building_name, {}).setdefault(lab_room_number, [])
+                    if not lockers or lockers[-1] != locker_number:
+                        lockers.append(locker_number)
+
+                self.buildings = buildings
+                self.version = version
+                self.etag = '"' + hashlib.sha256(
+                    json.dumps(list(buildings.items()), separators=(",", ":")).encode()
+                ).hexdigest()[:32] + '"'
+                logger.info(f"Loaded {len(buildings)} buildings into the location tree (version {version})")
+        finally:
+            await cursor.close()
+        self._checked_at = time.monotonic()
+
+    def building_names(self):
+        """Building names in alphabetical order"""
+        return list(self.buildings)
+
+    def lab_rooms(self, building_name):
+        """Lab room numbers of a building in ascending order (empty for an unknown building)"""
+        return list(self.buildings.get(building_name, {}))
+
+_location_tree = None
+
+def get_location_tree() -> LocationTree:
+    """Return the process-wide location tree (version checks every LOCATION_TREE_CHECK_INTERVAL seconds)"""
+    global _location_tree
+    if _location_tree is None:
+        _location_tree = LocationTree(check_interval=float(os.environ.get('LOCATION_TREE_CHECK_INTERVAL', '5')))
+    return _location_tree
@@ -0,0 +1,149 @@
+import os
+import json
+import asyncio
+import logging
+from psycopg.rows import dict_row
+from ..database import RotatingCredentialsConnection, _current_connection_kwargs, db_connection
+from ..utils.low_stock_notifier import create_low_stock_notifier
+
+logger = logging.getLogger(__name__)
+
+# Channel the inventory reorder trigger notifies on (scripts/add_low_stock_notify.sql)
+LOW_STOCK_CHANNEL = "inventory_low_stock"
+
+# Advisory lock held by the one listener that delivers alerts, so replicas do not send duplicates
+LOW_STOCK_LISTENER_LOCK = 7437001
+
+async def get_low_stock_alerts(conn, inventory_ids):
+    """Details of the given inventory records that are still below their reorder level"""
+    try:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        query = """
+            SELECT
+                i.id,
+                c.name,
+                c.unit_of_measure,
+                i.quantity,
+                i.reorder_quantity,
+                l.building_name,
+                l.lab_room_number,
+                l.locker_number
+            FROM
+                inventory i
+                JOIN chemicals c ON i.chemical_id = c.id
+                JOIN locations l ON i.location_id = l.location_id
+            WHERE
+                i.id = ANY(%s) AND i.quantity < i.reorder_quantity
+            ORDER BY
+                l.building_name, l.lab_room_number, c.name
+        """
+        await cursor.execute(query, (list(inventory_ids),))
+
+        alerts = []
+        async for row in cursor:
+            alerts.append({
+                **row,
+                "quantity": float(row['quantity']),
+                "reorder_quantity": float(row['reorder_quantity'])
+            })
+
+        await cursor.close()
+        return alerts
+
+    except Exception as e:
+        logger.error(f"Error getting low stock alerts: {str(e)}")
+        if 'cursor' in locals() and not cursor.closed:
+            await cursor.close()
+        raise e
+
+class LowStockListener:
+    """
+    Turns low-stock notifications from Postgres into batched alerts
+
+    Listens on a dedicated connection (LISTEN cannot share pooled connections), collects the
+    inventory IDs notified within a short window, then hands the items that are still low to
+    the notifier. Notifications sent while the listener is disconnected are not replayed;
+    the daily reorder notification run still reports those items.
+
+    Only one listener across all backend processes is active: it holds a session advisory
+    lock, and the others stand by, retrying the lock every standby_interval seconds so one
+    of them takes over when the active listener's connection goes away.
+    """
+
+    def __init__(self, notifier=None, batch_window: float = 5.0, max_batch: int = 500,
+                 standby_interval: float = 30.0):
+        self.notifier = notifier or create_low_stock_notifier()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.standby_interval = standby_interval
+        self.listening = asyncio.Event()
+
+    async def run(self):
+        """Listen until cancelled, reconnecting with backoff after errors"""
+        backoff = 1.0
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.listening.is_set():
+                    # The connection that just failed had been working, so start backing off afresh
+                    backoff = 1.0
+                self.listening.clear()
+                logger.error(f"Low-stock listener failed, reconnecting in {backoff:.0f}s: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def _listen(self):
+        kwargs = await _current_connection_kwargs()
+        conn = await RotatingCredentialsConnection.connect(autocommit=True, **kwargs)
+        async with conn:
+            await self._wait_for_lock(conn)
+            await conn.execute(f"LISTEN {LOW_STOCK_CHANNEL}")
+            logger.info(f"Low-stock listener waiting for notifications on {LOW_STOCK_CHANNEL}")
+            self.listening.set()
+            while True:
+                inventory_ids = await self._next_batch(conn)
+                await self._deliver(inventory_ids)
+
+    async def _wait_for_lock(self, conn):
+        """Stand by until this connection holds the listener lock (released when it closes)"""
+        standing_by = False
+        while True:
+            cursor = await conn.execute("SELECT pg_try_advisory_lock(%s)", (LOW_STOCK_LISTENER_LOCK,))
+            if (await cursor.fetchone())[0]:
+                return
+            if not standing_by:
+                logger.info("Another low-stock listener is active, standing by")
+                standing_by = True
+            await asyncio.sleep(self.standby_interval)
+
+    async def _next_batch(self, conn):
+        """Wait for a notification, then collect any others arriving within the batch window"""
+        inventory_ids = []
+        async for notify in conn.notifies(stop_after=1):
+            inventory_ids.append(json.loads(notify.payload)["inventory_id"])
+        async for notify in conn.notifies(timeout=self.batch_window, stop_after=self.max_batch - 1):
+            inventory_ids.append(json.loads(notify.payload)["inventory_id"])
+        return list(dict.fromkeys(inventory_ids))
+
+    async def _deliver(self, inventory_ids):
+        try:
+            # Items may have been restocked again within the window
+            async with db_connection() as conn:
+                alerts = await get_low_stock_alerts(conn, inventory_ids)
+            if alerts:
+                await self.notifier.notify(alerts)
+                logger.info(f"Sent low-stock alert for {len(alerts)} items via {self.notifier.name} notifier")
+        except Exception as e:
+            logger.error(f"Error delivering low-stock alerts for inventory {inventory_ids}: {str(e)}", exc_info=True)
+
+def create_low_stock_listener() -> LowStockListener:
+    """Listener configured from LOW_STOCK_BATCH_WINDOW, LOW_STOCK_MAX_BATCH and LOW_STOCK_STANDBY_INTERVAL"""
+    return LowStockListener(
+        batch_window=float(os.environ.get('LOW_STOCK_BATCH_WINDOW', '5')),
+        max_batch=int(os.environ.get('LOW_STOCK_MAX_BATCH', '500')),
+        standby_interval=float(os.environ.get('LOW_STOCK_STANDBY_INTERVAL', '30')),
+    )
@@ -1,12 +1,12 @@
 import logging
-import psycopg2.extras
+from psycopg.rows import dict_row
 
 logger = logging.getLogger(__name__)
 
-def get_user_preferences(conn, username: str, key: str = None):
+async def get_user_preferences(conn, username: str, key: str = None):
     """Get user preferences from database"""
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cursor = conn.cursor(row_factory=dict_row)
         
         # Build the query
         query = """
@@ -23,23 +23,23 @@ def get_user_preferences(conn, username: str, key: str = None):
             params.append(key)
         
         # Execute the query
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         
         # Process the results
         preferences = {}
-        for row in cursor:
+        async for row in cursor:
             preferences[row['preference_key']] = row['preference_value']
         
-        cursor.close()
+        await cursor.close()
         return preferences
     
     except Exception as e:
         logger.error(f"Error in get_user_preferences: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def update_user_preference(conn, username: str, key: str, value: str):
+async def update_user_preference(conn, username: str, key: str, value: str):
     """Update or create user preference"""
     try:
         cursor = conn.cursor()
@@ -50,8 +50,8 @@ def update_user_preference(conn, username: str, key: str, value: str):
             FROM user_preferences
             WHERE user_name = %s AND preference_key = %s
         """
-        cursor.execute(check_query, (username, key))
-        preference_exists = cursor.fetchone() is not None
+        await cursor.execute(check_query, (username, key))
+        preference_exists = await cursor.fetchone() is not None
         
         if preference_exists:
             # Update existing preference
@@ -60,21 +60,21 @@ def update_user_preference(conn, username: str, key: str, value: str):
                 SET preference_value = %s
                 WHERE user_name = %s AND preference_key = %s
             """
-            cursor.execute(update_query, (value, username, key))
+            await cursor.execute(update_query, (value, username, key))
         else:
             # Insert new preference
             insert_query = """
                 INSERT INTO user_preferences (user_name, preference_key, preference_value)
                 VALUES (%s, %s, %s)
             """
-            cursor.execute(insert_query, (username, key, value))
+            await cursor.execute(insert_query, (username, key, value))
         
-        conn.commit()
+        await conn.commit()
         
         # Get updated preferences
-        preferences = get_user_preferences(conn, username)
+        preferences = await get_user_preferences(conn, username)
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True,
             "preferences": preferences,
@@ -83,12 +83,12 @@ def update_user_preference(conn, username: str, key: str, value: str):
     
     except Exception as e:
         logger.error(f"Error updating user preference: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def delete_user_preferences(conn, username: str):
+async def delete_user_preferences(conn, username: str):
     """delete user preferences"""
     try:
         cursor = conn.cursor()
@@ -97,14 +97,14 @@ def delete_user_preferences(conn, username: str):
             DELETE FROM user_preferences 
             WHERE user_name = %s
         """
-        cursor.execute(delete_query, (username,))
-        conn.commit()        
-        cursor.close()
+        await cursor.execute(delete_query, (username,))
+        await conn.commit()        
+        await cursor.close()
         return {"success": True, "message": "Preferences deleted successfully"}
     
     except Exception as e:
         logger.error(f"Error deleting user preferences: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
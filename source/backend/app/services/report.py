@@ -1,14 +1,14 @@
 import logging
 from typing import List, Dict, Any, Optional
-import psycopg2
-import psycopg2.extras
+import psycopg
+from psycopg.rows import dict_row
 from fastapi import HTTPException
-from ..database import get_db_connection
+from ..database import db_connection
 from ..models.report import Report, ReportResult
 
 logger = logging.getLogger(__name__)
 
-def get_all_reports() -> List[Report]:
+async def get_all_reports() -> List[Report]:
     """
     Get all available reports from the database
     
@@ -16,10 +16,9 @@ def get_all_reports() -> List[Report]:
         List[Report]: List of report objects
     """
     try:
-        conn = get_db_connection()
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("SELECT report_id, report_name, sql_query, parameters FROM reports ORDER BY report_name")
-            rows = cursor.fetchall()
+        async with db_connection() as conn, conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute("SELECT report_id, report_name, sql_query, parameters FROM reports ORDER BY report_name")
+            rows = await cursor.fetchall()
             
             reports = []
             for row in rows:
@@ -34,11 +33,8 @@ def get_all_reports() -> List[Report]:
     except Exception as e:
         logger.error(f"Error retrieving reports: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve reports: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
-def get_report_by_id(report_id: int) -> Optional[Report]:
+async def get_report_by_id(report_id: int) -> Optional[Report]:
     """
     Get a specific report by ID
     
@@ -49,13 +45,12 @@ def get_report_by_id(report_id: int) -> Optional[Report]:
         Optional[Report]: Report object if found, None otherwise
     """
     try:
-        conn = get_db_connection()
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute(
+        async with db_connection() as conn, conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute(
                 "SELECT report_id, report_name, sql_query, parameters FROM reports WHERE report_id = %s",
                 (report_id,)
             )
-            row = cursor.fetchone()
+            row = await cursor.fetchone()
             
             if not row:
                 return None
@@ -69,11 +64,8 @@ def get_report_by_id(report_id: int) -> Optional[Report]:
     except Exception as e:
         logger.error(f"Error retrieving report {report_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve report: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
-def execute_report(report_id: int, params: Dict[str, Any] = None) -> ReportResult:
+async def execute_report(report_id: int, params: Dict[str, Any] = None) -> ReportResult:
     """
     Execute a report and return the results
     
@@ -86,21 +78,20 @@ def execute_report(report_id: int, params: Dict[str, Any] = None) -> ReportResul
     """
     try:
         # Get the report definition
-        report = get_report_by_id(report_id)
+        report = await get_report_by_id(report_id)
         if not report:
             raise HTTPException(status_code=404, detail=f"Report with ID {report_id} not found")
         
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
+        async with db_connection() as conn, conn.cursor() as cursor:
             # Execute the SQL query - for now, we don't handle parameterized queries
             # In the future, this could be enhanced to support parameters
-            cursor.execute(report.sql_query)
+            await cursor.execute(report.sql_query)
             
             # Get column names
             columns = [desc[0] for desc in cursor.description]
             
             # Fetch all rows
-            rows = cursor.fetchall()
+            rows = await cursor.fetchall()
             
             # Create the result
             result = ReportResult(
@@ -110,12 +101,9 @@ def execute_report(report_id: int, params: Dict[str, Any] = None) -> ReportResul
             )
             
             return result
-    except psycopg2.Error as db_error:
+    except psycopg.Error as db_error:
         logger.error(f"Database error executing report {report_id}: {str(db_error)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
     except Exception as e:
         logger.error(f"Error executing report {report_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to execute report: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
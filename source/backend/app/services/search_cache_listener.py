@@ -0,0 +1,66 @@
+import json
+import asyncio
+import logging
+from ..database import RotatingCredentialsConnection, _current_connection_kwargs
+from ..utils.search_cache import get_search_cache
+
+logger = logging.getLogger(__name__)
+
+# Channel the inventory, chemicals and locations triggers notify on (scripts/add_search_cache_notify.sql)
+SEARCH_CACHE_CHANNEL = "search_cache"
+
+class SearchCacheListener:
+    """
+    Applies search cache invalidations sent by other backend processes
+
+    Every process runs one, listening on a dedicated connection (LISTEN cannot share pooled
+    connections). A notification carries either the inventory IDs a statement changed or a
+    request to drop every cached search. The cache is only used while the listener is
+    connected, and is cleared whenever it connects or disconnects.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or get_search_cache()
+
+    async def run(self):
+        """Listen until cancelled, reconnecting with backoff after errors"""
+        backoff = 1.0
+        try:
+            while True:
+                try:
+                    await self._listen()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if self.cache.listening:
+                        # The connection that just failed had been working, so start backing off afresh
+                        backoff = 1.0
+                    self.cache.set_listening(False)
+                    logger.error(f"Search cache listener failed, reconnecting in {backoff:.0f}s: {str(e)}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 60.0)
+        finally:
+            self.cache.set_listening(False)
+
+    async def _listen(self):
+        kwargs = await _current_connection_kwargs()
+        conn = await RotatingCredentialsConnection.connect(autocommit=True, **kwargs)
+        async with conn:
+            await conn.execute(f"LISTEN {SEARCH_CACHE_CHANNEL}")
+            self.cache.set_listening(True)
+            logger.info(f"Search cache listener waiting for notifications on {SEARCH_CACHE_CHANNEL}")
+            async for notify in conn.notifies():
+                self.apply(notify.payload)
+
+    def apply(self, payload: str):
+        """Invalidate the cached searches a notification payload names"""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed search cache notification: {payload}")
+            self.cache.invalidate_all()
+            return
+        if message.get("all"):
+            self.cache.invalidate_all()
+        else:
+            self.cache.invalidate_inventory(message.get("inventory_ids", []))
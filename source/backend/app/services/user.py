@@ -1,21 +1,20 @@
 import logging
-import psycopg2
-import psycopg2.extras
+from psycopg.rows import dict_row
 from ..utils import hash_password
 from ..services.preference import get_user_preferences
 
 logger = logging.getLogger(__name__)
 
-def create_user(conn, username: str, password: str, email: str, role: str):
+async def create_user(conn, username: str, password: str, email: str, role: str):
     """Create a new user in the system"""
     try:
         cursor = conn.cursor()
         
         # Check if user already exists
         check_query = "SELECT user_name FROM users WHERE user_name = %s"
-        cursor.execute(check_query, (username,))
-        if cursor.fetchone():
-            cursor.close()
+        await cursor.execute(check_query, (username,))
+        if await cursor.fetchone():
+            await cursor.close()
             return {"success": False, "message": "User already exists"}
         
         # Hash the password
@@ -27,25 +26,25 @@ def create_user(conn, username: str, password: str, email: str, role: str):
             VALUES (%s, %s, %s, %s)
         """
         
-        cursor.execute(insert_query, (
+        await cursor.execute(insert_query, (
             username,
             hashed_password,
             email,
             role
         ))
         
-        conn.commit()
-        cursor.close()
+        await conn.commit()
+        await cursor.close()
         return {"success": True, "message": "User created successfully"}
     
     except Exception as e:
         logger.error(f"Error creating user: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def get_user_info(conn, username: str):
+async def get_user_info(conn, username: str):
     """Get user information by username"""
     try:
         cursor = conn.cursor()
@@ -56,10 +55,10 @@ def get_user_info(conn, username: str):
             FROM users
             WHERE user_name = %s
         """
-        cursor.execute(query, (username,))
-        user = cursor.fetchone()
+        await cursor.execute(query, (username,))
+        user = await cursor.fetchone()
         
-        cursor.close()
+        await cursor.close()
         if user:
             return {
                 "success": True,
@@ -79,19 +78,19 @@ def get_user_info(conn, username: str):
     except Exception as e:
         logger.error(f"Error getting user info: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def update_user(conn, username: str, email: str, role: str, password: str = None):
+async def update_user(conn, username: str, email: str, role: str, password: str = None):
     """Update an existing user"""
     try:
         cursor = conn.cursor()
         
         # Check if user exists
         check_query = "SELECT user_name FROM users WHERE user_name = %s"
-        cursor.execute(check_query, (username,))
-        if not cursor.fetchone():
-            cursor.close()
+        await cursor.execute(check_query, (username,))
+        if not await cursor.fetchone():
+            await cursor.close()
             return {"success": False, "message": "User does not exist"}
         
         # Only update fields that are provided
@@ -121,23 +120,23 @@ def update_user(conn, username: str, email: str, role: str, password: str = None
             WHERE user_name = %s
         """
         
-        cursor.execute(update_query, update_values)
+        await cursor.execute(update_query, update_values)
         
-        conn.commit()
-        cursor.close()
+        await conn.commit()
+        await cursor.close()
         return {"success": True, "message": "User updated successfully"}
     
     except Exception as e:
         logger.error(f"Error updating user: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def get_all_users(conn):
+async def get_all_users(conn):
     """Get all users with their preferences"""
     try:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cursor = conn.cursor(row_factory=dict_row)
         
         # Query to get all users
         query = """
@@ -146,15 +145,15 @@ def get_all_users(conn):
             ORDER BY user_name ASC
         """
         
-        cursor.execute(query)
+        await cursor.execute(query)
         users = []
         
         # Process the results
-        for row in cursor:
+        async for row in cursor:
             username = row['user_name']
             
             # Get user preferences
-            preferences = get_user_preferences(conn, username)
+            preferences = await get_user_preferences(conn, username)
             
             users.append({
                 "username": username,
@@ -163,7 +162,7 @@ def get_all_users(conn):
                 "preferences": preferences
             })
         
-        cursor.close()
+        await cursor.close()
         return {
             "success": True,
             "users": users,
@@ -173,10 +172,10 @@ def get_all_users(conn):
     except Exception as e:
         logger.error(f"Error getting users: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def get_roles(conn):
+async def get_roles(conn):
     """Get all available roles"""
     try:
         cursor = conn.cursor()
@@ -188,10 +187,10 @@ def get_roles(conn):
             ORDER BY role_name ASC
         """
         
-        cursor.execute(query)
-        roles = [row[0] for row in cursor.fetchall()]
+        await cursor.execute(query)
+        roles = [row[0] for row in await cursor.fetchall()]
 
-        cursor.close()
+        await cursor.close()
         return {
             "success": True,
             "roles": roles,
@@ -201,10 +200,10 @@ def get_roles(conn):
     except Exception as e:
         logger.error(f"Error getting roles: {str(e)}")
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
 
-def delete_user(conn, username: str):
+async def delete_user(conn, username: str):
     """Delete a user in the system"""
     try:
         cursor = conn.cursor()
@@ -215,14 +214,14 @@ def delete_user(conn, username: str):
             WHERE user_name = %s
         """
         
-        cursor.execute(delete_query, (username,))
-        conn.commit()
-        cursor.close()
+        await cursor.execute(delete_query, (username,))
+        await conn.commit()
+        await cursor.close()
         return {"success": True, "message": "User deleted successfully"}
     
     except Exception as e:
         logger.error(f"Error deleting user: {str(e)}")
-        conn.rollback()
+        await conn.rollback()
         if 'cursor' in locals() and not cursor.closed:
-            cursor.close()
+            await cursor.close()
         raise e
@@ -0,0 +1,94 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class LowStockNotifier:
+    """Base class for destinations of low-stock alerts"""
+
+    name = "base"
+
+    async def notify(self, alerts: List[Dict[str, Any]]):
+        """
+        Deliver one batch of low-stock alerts
+
+        Args:
+            alerts: Dicts with id, name, unit_of_measure, quantity, reorder_quantity,
+                building_name, lab_room_number and locker_number
+        """
+        raise NotImplementedError
+
+def format_low_stock_message(alerts: List[Dict[str, Any]]) -> str:
+    """Alert email body, grouped by lab like the daily reorder notification"""
+    body = "The following chemical(s) just dropped below their reorder level:\n\n"
+
+    labs = {}
+    for alert in alerts:
+        labs.setdefault(f"{alert['building_name']} - Room {alert['lab_room_number']}", []).append(alert)
+
+    for lab, lab_alerts in labs.items():
+        body += f"\n{lab}:\n"
+        for alert in lab_alerts:
+            body += f"- {alert['name']} (locker {alert['locker_number']}): Current quantity: {alert['quantity']} {alert['unit_of_measure']}, " \
+                    f"Reorder quantity: {alert['reorder_quantity']} {alert['unit_of_measure']}\n"
+
+    body += f"\n\nThank you,\nChemtrack System\n\nSent: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    return body
+
+class LogLowStockNotifier(LowStockNotifier):
+    """Writes alerts to the application log (local development and tests)"""
+
+    name = "log"
+
+    async def notify(self, alerts: List[Dict[str, Any]]):
+        for alert in alerts:
+            logger.warning(
+                f"Low stock: {alert['name']} in {alert['building_name']} room {alert['lab_room_number']} "
+                f"locker {alert['locker_number']} is at {alert['quantity']} {alert['unit_of_measure']} "
+                f"(reorder at {alert['reorder_quantity']})"
+            )
+
+class SnsLowStockNotifier(LowStockNotifier):
+    """Publishes each batch of alerts as one message to the reorder SNS topic"""
+
+    name = "sns"
+
+    def __init__(self, topic_arn: str, region: str = None):
+        self._topic_arn = topic_arn
+        self._region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self._client = None
+
+    def _publish(self, message: str):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('sns', region_name=self._region)
+        response = self._client.publish(
+            TopicArn=self._topic_arn,
+            Subject="Chemtrack -- low stock alert",
+            Message=message
+        )
+        logger.info(f"Low-stock alert published, SNS message ID: {response.get('MessageId')}")
+
+    async def notify(self, alerts: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._publish, format_low_stock_message(alerts))
+
+def create_low_stock_notifier() -> LowStockNotifier:
+    """
+    Build the notifier selected by LOW_STOCK_NOTIFIER (sns or log)
+
+    Without an explicit choice, SNS is used when LOW_STOCK_SNS_TOPIC_ARN is set and the
+    log notifier otherwise.
+    """
+    topic_arn = os.environ.get('LOW_STOCK_SNS_TOPIC_ARN')
+    kind = os.environ.get('LOW_STOCK_NOTIFIER', '').lower() or ('sns' if topic_arn else 'log')
+
+    if kind == 'sns':
+        if not topic_arn:
+            raise ValueError("LOW_STOCK_SNS_TOPIC_ARN must be set for the sns low-stock notifier")
+        return SnsLowStockNotifier(topic_arn)
+    if kind == 'log':
+        return LogLowStockNotifier()
+    raise ValueError(f"Unknown LOW_STOCK_NOTIFIER: {kind}")
@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict, namedtuple
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sorts whose row order depends on inventory quantities; a quantity change can move rows
+# between pages of these searches even when the changed row is on neither page
+QUANTITY_SORTS = ("qty", "reorder_qty")
+
+SearchKey = namedtuple("SearchKey", [
+    "name", "building_name", "lab_room_number", "locker_number", "hazard_classification",
+    "query", "limit", "sort", "direction", "cursor"
+])
+
+def normalize_search_request(request):
+    """
+    Copy of a ChemSearchRequest with equivalent criteria written one way
+
+    Blank strings count as not given and surrounding whitespace is dropped. Name and hazard
+    filters are matched case-insensitively, so they are lowercased. The search runs with the
+    same copy its cache key is built from, so searches sharing an entry return the same rows.
+    """
+    def text(value, fold=False):
+        value = (value or "").strip()
+        if not value:
+            return None
+        return value.lower() if fold else value
+
+    return request.model_copy(update={
+        "name": text(request.name, fold=True),
+        "building_name": text(request.building_name),
+        "hazard_classification": text(request.hazard_classification, fold=True),
+        "query": " ".join(request.query.split()) if request.query and request.query.strip() else None,
+        "direction": request.direction.lower() if request.direction else None,
+    })
+
+def search_cache_key(request) -> SearchKey:
+    """Cache key for a ChemSearchRequest already passed through normalize_search_request"""
+    return SearchKey(
+        request.name,
+        request.building_name,
+        request.lab_room_number,
+        request.locker_number,
+        request.hazard_classification,
+        request.query,
+        request.limit,
+        request.sort,
+        request.direction,
+        request.cursor,
+    )
+
+class SearchCache:
+    """
+    In-process LRU cache of chemical search responses with a TTL
+
+    Each entry remembers the inventory IDs it contains so that an inventory update only
+    drops the searches it can affect. A generation counter guards against a search that
+    read the database before an invalidation storing its now stale result afterwards.
+
+    Changes made through other processes arrive as notifications on the search_cache
+    channel (scripts/add_search_cache_notify.sql), which the SearchCacheListener turns into
+    the same invalidations. Searches are only cached while that listener is connected,
+    since notifications sent while it is not are lost.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.listening = False
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    @property
+    def generation(self) -> int:
+        """Token to pass to put(); results read before a later invalidation are not stored"""
+        return self._generation
+
+    def set_listening(self, listening: bool):
+        """
+        Record whether invalidations from other processes are being received
+
+        The cache is cleared either way: entries kept from before the listener connected,
+        or read while it was disconnected, may have missed an invalidation.
+        """
+        with self._lock:
+            self.listening = listening
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def get(self, key: SearchKey) -> Optional[Dict[str, Any]]:
+        if not self.listening:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: SearchKey, result: Dict[str, Any], generation: int):
+        if not self.enabled or not self.listening:
+            return
+        # Results are columnar with the inventory ID first
+        inventory_ids = frozenset(row[0] for row in result.get("rows", []))
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result, inventory_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_inventory(self, inventory_ids):
+        """Drop searches that contain, or could now contain, any of the given inventory records"""
+        changed = set(inventory_ids)
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, (_, _, ids) in self._entries.items()
+                if not changed.isdisjoint(ids) or (key.limit is not None and key.sort in QUANTITY_SORTS)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Search cache: dropped {len(stale)} entries for inventory {sorted(changed)}")
+
+    def invalidate_all(self):
+        """Drop every cached search (locations or chemicals changed)"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        logger.debug("Search cache: cleared")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "listening": self.listening,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache sized by SEARCH_CACHE_SIZE and SEARCH_CACHE_TTL"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(
+                    max_size=int(os.environ.get('SEARCH_CACHE_SIZE', '256')),
+                    ttl=float(os.environ.get('SEARCH_CACHE_TTL', '60')),
+                )
+    return _search_cache
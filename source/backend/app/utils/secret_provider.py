@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class SecretProvider:
+    """Base class for sources of database connection settings"""
+
+    name = "base"
+
+    def get_db_credentials(self) -> Dict[str, Any]:
+        """
+        Return database connection settings
+
+        Returns:
+            Dict with host, port, dbname, user and password keys
+        """
+        raise NotImplementedError
+
+    def refresh(self) -> Dict[str, Any]:
+        """Return freshly fetched settings (providers without a cache just fetch again)"""
+        return self.get_db_credentials()
+
+class AwsSecretsManagerProvider(SecretProvider):
+    """Reads the db_url and application user credentials from AWS Secrets Manager"""
+
+    name = "aws"
+
+    def __init__(self, region: Optional[str] = None,
+                 url_secret: str = "env-vars",
+                 credentials_secret: str = "chemtrack-db-app-user"):
+        self._region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self._url_secret = url_secret
+        self._credentials_secret = credentials_secret
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import boto3
+            logger.debug(f"Initializing boto3 session with region: {self._region}")
+            session = boto3.session.Session(region_name=self._region)
+            self._client = session.client(service_name='secretsmanager', region_name=self._region)
+        return self._client
+
+    def _get_secret(self, secret_name: str) -> Dict[str, Any]:
+        logger.debug(f"Getting secret: {secret_name}")
+        response = self._get_client().get_secret_value(SecretId=secret_name)
+        return json.loads(response['SecretString'])
+
+    def get_db_credentials(self) -> Dict[str, Any]:
+        db_url = self._get_secret(self._url_secret).get('db_url')
+        if not db_url:
+            raise Exception("Database URL not found in secrets")
+
+        db_creds = self._get_secret(self._credentials_secret)
+        username = db_creds.get('username')
+        password = db_creds.get('password')
+        if not username or not password:
+            raise Exception("Database credentials not properly configured")
+
+        # db_url is in format: hostname:port or just hostname
+        host = db_url.split(':')[0] if ':' in db_url else db_url
+        return {"host": host, "port": 5432, "dbname": "chemtrack", "user": username, "password": password}
+
+class EnvSecretProvider(SecretProvider):
+    """Reads connection settings from DB_HOST, DB_PORT, DB_NAME, DB_USER and DB_PASSWORD"""
+
+    name = "env"
+
+    def get_db_credentials(self) -> Dict[str, Any]:
+        return {
+            "host": os.environ.get('DB_HOST', 'localhost'),
+            "port": int(os.environ.get('DB_PORT', '5432')),
+            "dbname": os.environ.get('DB_NAME', 'chemtrack'),
+            "user": os.environ.get('DB_USER', 'chemuser'),
+            "password": os.environ.get('DB_PASSWORD', ''),
+        }
+
+class FileSecretProvider(SecretProvider):
+    """
+    Reads connection settings from a JSON file
+
+    The file may use the connection keys directly (host, port, dbname, user, password)
+    or the Secrets Manager shapes (db_url, username, password). It is re-read on every
+    fetch so that a rotated password is picked up on refresh.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def get_db_credentials(self) -> Dict[str, Any]:
+        with open(self._path) as f:
+            data = json.load(f)
+
+        host = data.get('host') or data.get('db_url', 'localhost')
+        host = host.split(':')[0] if ':' in host else host
+        user = data.get('user') or data.get('username')
+        if not user or 'password' not in data:
+            raise Exception(f"Database credentials not properly configured in {self._path}")
+
+        return {
+            "host": host,
+            "port": int(data.get('port', 5432)),
+            "dbname": data.get('dbname', 'chemtrack'),
+            "user": user,
+            "password": data['password'],
+        }
+
+class CachedSecretProvider(SecretProvider):
+    """
+    In-memory TTL cache in front of another provider
+
+    Concurrent callers share a single fetch; refresh() bypasses the TTL and is used
+    when the database rejects the cached password after a rotation.
+    """
+
+    def __init__(self, provider: SecretProvider, ttl: float = 3600.0):
+        self._provider = provider
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = 0.0
+        self.name = provider.name
+
+    def get_db_credentials(self) -> Dict[str, Any]:
+        value = self._value
+        if value is not None and time.monotonic() - self._fetched_at < self._ttl:
+            return value
+        with self._lock:
+            if self._value is None or time.monotonic() - self._fetched_at >= self._ttl:
+                self._fetch()
+            return self._value
+
+    def refresh(self) -> Dict[str, Any]:
+        with self._lock:
+            self._fetch()
+            return self._value
+
+    def invalidate(self):
+        """Drop the cached settings so the next call fetches them again"""
+        with self._lock:
+            self._value = None
+
+    def _fetch(self):
+        logger.info(f"Fetching database credentials from {self.name} provider")
+        self._value = self._provider.get_db_credentials()
+        self._fetched_at = time.monotonic()
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def create_secret_provider() -> SecretProvider:
+    """
+    Build the provider selected by DB_SECRET_PROVIDER (aws, env or file)
+
+    Without an explicit choice, a DB_CREDENTIALS_FILE selects the file provider,
+    a DB_HOST selects the env provider, and AWS Secrets Manager is used otherwise.
+    LOCAL_DEV does not change the choice, so local development reaches the same
+    database as a deployment unless DB_SECRET_PROVIDER says otherwise.
+    """
+    kind = os.environ.get('DB_SECRET_PROVIDER', '').lower()
+    if not kind:
+        if os.environ.get('DB_CREDENTIALS_FILE'):
+            kind = 'file'
+        elif os.environ.get('DB_HOST'):
+            kind = 'env'
+        else:
+            kind = 'aws'
+
+    if kind == 'aws':
+        provider = AwsSecretsManagerProvider()
+    elif kind == 'env':
+        provider = EnvSecretProvider()
+    elif kind == 'file':
+        path = os.environ.get('DB_CREDENTIALS_FILE')
+        if not path:
+            raise ValueError("DB_CREDENTIALS_FILE must be set for the file secret provider")
+        provider = FileSecretProvider(path)
+    else:
+        raise ValueError(f"Unknown DB_SECRET_PROVIDER: {kind}")
+
+    ttl = float(os.environ.get('DB_SECRET_TTL', '3600'))
+    logger.info(f"Using {provider.name} secret provider for database credentials (ttl={ttl}s)")
+    return CachedSecretProvider(provider, ttl=ttl)
+
+def get_secret_provider() -> SecretProvider:
+    """Return the process-wide cached secret provider"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_secret_provider()
+    return _provider
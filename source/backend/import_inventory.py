@@ -0,0 +1,48 @@
+"""
+Bulk import chemicals, locations and inventory from a CSV or NDJSON file
+
+Usage:
+    python import_inventory.py inventory.csv [--format csv|ndjson] [--mode atomic|best_effort]
+
+Connects with the same settings as the backend (DB_* environment variables or the
+configured secret provider) and prints the import report as JSON.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from app.database import get_db_connection
+from app.services.bulk_import import import_inventory
+
+CHUNK_SIZE = 1024 * 1024
+
+async def read_chunks(path):
+    """Yield the file in chunks without blocking the event loop"""
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+            yield chunk
+
+async def main(args):
+    conn = await get_db_connection()
+    try:
+        return await import_inventory(conn, read_chunks(args.file), args.format, args.mode)
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import chemicals, locations and inventory")
+    parser.add_argument("file", help="CSV file with a header line, or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"],
+                        help="file format (default: from the file extension)")
+    parser.add_argument("--mode", choices=["atomic", "best_effort"], default="atomic",
+                        help="atomic imports nothing if any record is invalid (default)")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "ndjson" if args.file.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+    try:
+        result = asyncio.run(main(args))
+    except ValueError as e:
+        sys.exit(f"Import rejected: {e}")
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["success"] else 1)
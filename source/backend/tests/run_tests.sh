@@ -25,11 +25,25 @@ run_chemical_tests() {
     PYTHONPATH=../.. pytest -v tests_chemical.py --disable-warnings
 }
 
+# Run database pool tests
+run_database_tests() {
+    echo "Running backend database pool tests..."
+    PYTHONPATH=../.. pytest -v tests_database.py --disable-warnings
+}
+
+# Run secret provider tests
+run_secret_provider_tests() {
+    echo "Running backend secret provider tests..."
+    PYTHONPATH=../.. pytest -v tests_secret_provider.py --disable-warnings
+}
+
 if [ -z "$1" ]; then
     echo "Running all backend API tests..."
     run_user_tests
     run_location_tests
     run_chemical_tests
+    run_database_tests
+    run_secret_provider_tests
 else
     if [ "$1" == "user" ]; then
         run_user_tests
@@ -37,9 +51,13 @@ else
         run_location_tests
     elif [ "$1" == "chemical" ]; then
         run_chemical_tests
+    elif [ "$1" == "database" ]; then
+        run_database_tests
+    elif [ "$1" == "secret_provider" ]; then
+        run_secret_provider_tests
     else
         echo "Invalid test type: $1"
-        echo "Available test types: user, location, chemical"
+        echo "Available test types: user, location, chemical, database, secret_provider"
         exit 1
     fi
 fi
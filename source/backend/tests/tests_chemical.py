@@ -1,5 +1,10 @@
+import io
 import os
 import sys
+import csv
+import json
+import time
+import asyncio
 import pytest
 import logging
 from fastapi.testclient import TestClient
@@ -16,6 +21,10 @@ logger = logging.getLogger(__name__)
 # Import the FastAPI app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.main import app
+from app.services.low_stock_listener import LowStockListener
+from app.services.catalog import get_catalog
+from app.database import db_connection
+from app.utils.search_cache import get_search_cache
 
 # Global variables to store test data between tests
 SAVED_QUANTITY = None
@@ -84,6 +93,91 @@ def test_chemical_search_contains_name(client):
     
     logger.info("Chemical search contains name test successful")
 
+def test_chemical_search_name_wildcards_are_literal(client):
+    """Test that % and _ in the search text are matched literally, not as wildcards"""
+    logger.info("Testing POST /backend/chemsearch with wildcard characters in the name")
+    
+    # Make the request
+    response = client.post(
+        "/backend/chemsearch",
+        json={"name": "%"}
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is True, "Success should be True"
+    assert len(data["results"]) == 0, f"No chemical names contain '%', got {len(data['results'])} results"
+    
+    logger.info("Chemical search wildcard test successful")
+
+def test_chemical_search_free_text(client):
+    """Test free-text search by CAS number and hazard phrase, ordered by rank"""
+    logger.info("Testing POST /backend/chemsearch with a free-text query")
+    
+    # Search by CAS number
+    response = client.post(
+        "/backend/chemsearch",
+        json={"query": "7664-93-9"}
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is True, "Success should be True"
+    assert len(data["results"]) > 0, "Sulfuric acid should be found by its CAS number"
+    for result in data["results"]:
+        assert result["cas_number"] == "7664-93-9", f"Unexpected match: {result['name']}"
+    
+    # Search by hazard phrase combined with a location filter
+    response = client.post(
+        "/backend/chemsearch",
+        json={"query": "flammable", "building_name": "building 202"}
+    )
+    
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert len(data["results"]) > 0, "At least one flammable chemical should be in building 202"
+    for result in data["results"]:
+        assert result["building_name"] == "building 202", f"All results should be from 'building 202', got '{result['building_name']}'"
+        searchable = " ".join(str(result[key] or "") for key in ("name", "hazard_classification", "chemical_description")).lower()
+        assert "flammab" in searchable, f"Result {result['name']} does not mention flammability"
+    
+    logger.info("Chemical search free text test successful")
+
+def test_chemical_search_columnar(client):
+    """Test the columnar search format carries the same chemicals as the default format"""
+    logger.info("Testing POST /backend/chemsearch with the columnar format")
+    
+    criteria = {"building_name": "building 202"}
+    records = client.post("/backend/chemsearch", json=criteria).json()["results"]
+    
+    # Request the columnar format by flag
+    response = client.post("/backend/chemsearch", json={**criteria, "format": "columnar"})
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is True, "Success should be True"
+    assert "columns" in data and "rows" in data, "Columnar response should contain 'columns' and 'rows'"
+    assert [dict(zip(data["columns"], row)) for row in data["rows"]] == records, \
+        "Columnar rows should decode to the default results"
+    
+    # Request the columnar format by Accept header
+    response = client.post(
+        "/backend/chemsearch",
+        json=criteria,
+        headers={"Accept": "application/vnd.chemtrack.columnar+json"}
+    )
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.json()["rows"] == data["rows"], "Accept header should select the columnar format"
+    
+    logger.info("Chemical search columnar test successful")
+
 def test_chemical_search_by_building(client):
     """Test chemical search by building name"""
     logger.info("Testing POST /backend/chemsearch by building")
@@ -172,6 +266,43 @@ def test_chemical_search_by_building_lab_and_locker(client):
     
     logger.info("Chemical search by building, lab, and locker test successful")
 
+def test_chemical_search_paginated(client):
+    """Test keyset pagination returns every match exactly once in the requested order"""
+    logger.info("Testing POST /backend/chemsearch with limit, sort and cursor")
+    
+    criteria = {"building_name": "building 202", "sort": "qty", "direction": "desc"}
+    
+    # Full result set for comparison
+    full = client.post("/backend/chemsearch", json=criteria).json()["results"]
+    assert len(full) > 7, "There should be more chemicals than fit on one page"
+    
+    # Walk the pages
+    paged = []
+    cursor = None
+    while True:
+        response = client.post("/backend/chemsearch", json={**criteria, "limit": 7, "cursor": cursor})
+        assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+        data = response.json()
+        assert len(data["results"]) <= 7, "A page should not exceed the limit"
+        paged.extend(data["results"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert [r["id"] for r in paged] == [r["id"] for r in full], "Pages should match the unpaged results"
+    quantities = [r["quantity"] for r in paged]
+    assert quantities == sorted(quantities, reverse=True), "Results should be sorted by quantity descending"
+    
+    # A cursor cannot be reused with a different sort order
+    first_page = client.post("/backend/chemsearch", json={**criteria, "limit": 7}).json()
+    response = client.post(
+        "/backend/chemsearch",
+        json={**criteria, "direction": "asc", "limit": 7, "cursor": first_page["next_cursor"]}
+    )
+    assert response.status_code == 400, f"Expected status code 400, got {response.status_code}"
+    
+    logger.info("Chemical search pagination test successful")
+
 def test_chemical_search_by_hazard(client):
     """Test chemical search by hazard classification"""
     logger.info("Testing POST /backend/chemsearch by hazard classification")
@@ -253,6 +384,228 @@ def test_reorder_notification(client):
     
     logger.info("Reorder notification test successful")
 
+@pytest.fixture
+def restore_bob_preferences(client):
+    """Put bob's preferences back as they were before the test"""
+    original = client.post("/backend/get_user_preferences", json={"username": "bob"}).json()["preferences"]
+    try:
+        yield
+    finally:
+        client.post("/backend/delete_user_preference", json={"username": "bob"})
+        for key, value in original.items():
+            client.post("/backend/update_user_preference", json={"username": "bob", "key": key, "value": value})
+
+def test_reorder_notification_follows_preferences(client, restore_bob_preferences):
+    """Test that reorder notifications follow a user's notification, building and lab room preferences"""
+    logger.info("Testing GET /backend/reorder_notif after preference changes")
+    
+    def set_preference(key, value):
+        response = client.post(
+            "/backend/update_user_preference",
+            json={"username": "bob", "key": key, "value": value}
+        )
+        assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    # Turn notifications on for one building
+    set_preference("building", "building 303")
+    set_preference("reorder_notification", "on")
+    
+    data = client.get("/backend/reorder_notif").json()
+    bob = next((user for user in data["users"] if user["username"] == "bob"), None)
+    assert bob is not None, "User with notifications on should be notified"
+    assert len(bob["chemicals"]) > 0, "There should be low-stock chemicals in building 303"
+    for chemical in bob["chemicals"]:
+        assert chemical["building_name"] == "building 303", f"Unexpected building {chemical['building_name']}"
+    
+    # Turn notifications off again
+    set_preference("reorder_notification", "off")
+    
+    data = client.get("/backend/reorder_notif").json()
+    assert "bob" not in [user["username"] for user in data["users"]], "User with notifications off should not be notified"
+    
+    logger.info("Reorder notification preferences test successful")
+
+def test_reorder_notification_ignores_unmatchable_preferences(client, restore_bob_preferences):
+    """Test that lab room and building preferences no location can have are saved but not notified"""
+    logger.info("Testing reorder notification scopes with out-of-range preferences")
+    
+    for key, value in [("reorder_notification", "on"), ("building", "building 303"),
+                       ("lab_room", "99999999999999999999"), ("building", "b" * 60)]:
+        response = client.post(
+            "/backend/update_user_preference",
+            json={"username": "bob", "key": key, "value": value}
+        )
+        assert response.status_code == 200, f"Saving {key} should not fail, got {response.status_code}"
+    
+    data = client.get("/backend/reorder_notif").json()
+    assert "bob" not in [user["username"] for user in data["users"]], \
+        "Preferences that match no location should not produce notifications"
+    
+    logger.info("Reorder notification unmatchable preferences test successful")
+
+def test_reorder_notification_since_token(client, restore_bob_preferences):
+    """Test that delta mode only returns items that crossed below their reorder level since the token"""
+    logger.info("Testing GET /backend/reorder_notif?since=<token>")
+    
+    def set_preference(key, value):
+        response = client.post(
+            "/backend/update_user_preference",
+            json={"username": "bob", "key": key, "value": value}
+        )
+        assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    set_preference("building", "building 303")
+    set_preference("reorder_notification", "on")
+    
+    # Pick an item in building 303 that is not low yet
+    results = client.post("/backend/chemsearch", json={"building_name": "building 303"}).json()["results"]
+    item = next(r for r in results if r["quantity"] >= r["reorder_quantity"] > 0)
+    
+    token = client.get("/backend/reorder_notif").json()["next_token"]
+    assert token, "Response should contain a next_token"
+    
+    # Nothing has crossed since the token was issued
+    data = client.get(f"/backend/reorder_notif?since={token}").json()
+    assert "bob" not in [user["username"] for user in data["users"]], "No new crossings expected yet"
+    
+    # Take the item below its reorder level
+    response = client.post(
+        "/backend/update_inventory",
+        json={"inventory_id": item["id"], "quantity": item["quantity"], "action": "remove"}
+    )
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = client.get(f"/backend/reorder_notif?since={token}").json()
+    bob = next((user for user in data["users"] if user["username"] == "bob"), None)
+    assert bob is not None, "User should be notified about the new crossing"
+    assert [chemical["id"] for chemical in bob["chemicals"]] == [item["id"]], \
+        f"Only the item that crossed should be returned, got {bob['chemicals']}"
+    
+    # The following run starts after that crossing
+    data = client.get(f"/backend/reorder_notif?since={data['next_token']}").json()
+    assert "bob" not in [user["username"] for user in data["users"]], "Crossing should only be reported once"
+    
+    # Restore the item (the fixture restores the preferences)
+    client.post(
+        "/backend/update_inventory",
+        json={"inventory_id": item["id"], "quantity": item["quantity"], "action": "add"}
+    )
+    
+    logger.info("Reorder notification since token test successful")
+
+def test_catalog_refreshes_after_chemical_change(client):
+    """Test that chemical details served from the catalog follow changes to the chemicals table"""
+    logger.info("Testing chemical catalog refresh")
+    
+    catalog = get_catalog()
+    check_interval = catalog.check_interval
+    catalog.check_interval = 0
+    
+    original = client.get("/backend/chemical/165").json()["chemical"]["chemical_description"]
+    
+    async def set_description(text):
+        async with db_connection() as conn:
+            await conn.execute(
+                "UPDATE chemicals SET chemical_description = %s WHERE id = (SELECT chemical_id FROM inventory WHERE id = 165)",
+                (text,)
+            )
+    
+    try:
+        version = catalog.version
+        client.portal.call(set_description, "Catalog refresh test description")
+        
+        data = client.get("/backend/chemical/165").json()
+        assert data["chemical"]["chemical_description"] == "Catalog refresh test description", \
+            f"Catalog should reload after the change, got {data['chemical']['chemical_description']}"
+        assert catalog.version != version, "Catalog version should have moved"
+    finally:
+        client.portal.call(set_description, original)
+        catalog.check_interval = check_interval
+    
+    logger.info("Chemical catalog refresh test successful")
+
+class StubLowStockNotifier:
+    """Collects low-stock alerts instead of sending them"""
+    name = "stub"
+    
+    def __init__(self):
+        self.alerts = []
+    
+    async def notify(self, alerts):
+        self.alerts.extend(alerts)
+
+def test_low_stock_listener_alerts(client):
+    """Test that crossing below the reorder level produces a batched alert from the listener"""
+    logger.info("Testing low-stock LISTEN/NOTIFY alerts")
+    
+    notifier = StubLowStockNotifier()
+    listener = LowStockListener(notifier=notifier, batch_window=0.2)
+    
+    async def wait_until_listening():
+        await asyncio.wait_for(listener.listening.wait(), timeout=10)
+    
+    item = None
+    
+    # Run the listener on the app's event loop, where the connection pool lives
+    task = client.portal.start_task_soon(listener.run)
+    try:
+        client.portal.call(wait_until_listening)
+        
+        # Take an item that is not low yet below its reorder level
+        results = client.post("/backend/chemsearch", json={"building_name": "building 404"}).json()["results"]
+        item = next(r for r in results if r["quantity"] >= r["reorder_quantity"] > 0)
+        response = client.post(
+            "/backend/update_inventory",
+            json={"inventory_id": item["id"], "quantity": item["quantity"], "action": "remove"}
+        )
+        assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+        
+        # Wait for the batch window to close and the alert to be delivered
+        deadline = time.monotonic() + 10
+        while not notifier.alerts and time.monotonic() < deadline:
+            time.sleep(0.05)
+        
+        assert [alert["id"] for alert in notifier.alerts] == [item["id"]], \
+            f"Expected one alert for inventory {item['id']}, got {notifier.alerts}"
+        assert notifier.alerts[0]["building_name"] == "building 404"
+    finally:
+        task.cancel()
+        if item is not None:
+            client.post(
+                "/backend/update_inventory",
+                json={"inventory_id": item["id"], "quantity": item["quantity"], "action": "add"}
+            )
+    
+    logger.info("Low-stock listener test successful")
+
+def test_low_stock_listener_single_consumer(client):
+    """Test that a second listener stands by while another holds the listener lock"""
+    logger.info("Testing low-stock listener standby")
+    
+    first = LowStockListener(notifier=StubLowStockNotifier(), batch_window=0.2)
+    second = LowStockListener(notifier=StubLowStockNotifier(), batch_window=0.2, standby_interval=0.1)
+    
+    async def wait_until_listening(listener):
+        await asyncio.wait_for(listener.listening.wait(), timeout=10)
+    
+    first_task = client.portal.start_task_soon(first.run)
+    second_task = None
+    try:
+        client.portal.call(wait_until_listening, first)
+        second_task = client.portal.start_task_soon(second.run)
+        time.sleep(0.5)
+        assert not second.listening.is_set(), "Only one listener should be active"
+        
+        # The standby listener takes over once the active one stops
+        first_task.cancel()
+        client.portal.call(wait_until_listening, second)
+    finally:
+        first_task.cancel()
+        if second_task is not None:
+            second_task.cancel()
+    
+    logger.info("Low-stock listener standby test successful")
+
 def test_chemical_by_inventory_id(client):
     """Test getting chemical by inventory ID"""
     logger.info("Testing GET /backend/chemical/165 endpoint")
@@ -276,6 +629,32 @@ def test_chemical_by_inventory_id(client):
     
     logger.info("Chemical by inventory ID test successful")
 
+def test_chemicals_multi_get(client):
+    """Test getting several chemicals by inventory ID in one request"""
+    logger.info("Testing GET and POST /backend/chemicals")
+    
+    # Make the request
+    response = client.get("/backend/chemicals", params={"ids": "165,1,999999,165"})
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "A missing ID should not report full success"
+    assert [c["id"] for c in data["chemicals"]] == [165, 1], "Chemicals should be in request order, once each"
+    assert data["missing_ids"] == [999999]
+    assert data["chemicals"][0] == client.get("/backend/chemical/165").json()["chemical"]
+    
+    # The POST form takes the IDs in the body
+    data = client.post("/backend/chemicals", json={"ids": [1, 165]}).json()
+    assert data["success"] is True and [c["id"] for c in data["chemicals"]] == [1, 165]
+    
+    # Malformed ID lists are rejected
+    assert client.get("/backend/chemicals", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/backend/chemicals", params={"ids": ""}).status_code == 400
+    
+    logger.info("Chemicals multi-get test successful")
+
 def test_update_inventory_add(client):
     """Test updating inventory by adding quantity"""
     logger.info("Testing POST /backend/update_inventory - add action")
@@ -337,6 +716,335 @@ def test_update_inventory_remove(client):
     
     logger.info("Update inventory remove test successful")
 
+def test_update_inventory_remove_more_than_available(client):
+    """Test that removing more than the available quantity is rejected and leaves the quantity unchanged"""
+    logger.info("Testing POST /backend/update_inventory - remove more than available")
+    
+    global SAVED_QUANTITY
+    
+    # Make the request
+    response = client.post(
+        "/backend/update_inventory",
+        json={
+            "inventory_id": 165,
+            "quantity": SAVED_QUANTITY + 1000,
+            "action": "remove"
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 400, f"Expected status code 400, got {response.status_code}"
+    assert "Cannot remove more than available quantity" in response.json()["detail"], \
+        f"Unexpected error message: {response.json()}"
+    
+    # Verify the quantity was not changed
+    data = client.get("/backend/chemical/165").json()
+    assert abs(data["chemical"]["quantity"] - SAVED_QUANTITY) < 0.001, \
+        f"Quantity should still be {SAVED_QUANTITY}, got {data['chemical']['quantity']}"
+    
+    logger.info("Update inventory remove more than available test successful")
+
+def test_update_inventory_not_found(client):
+    """Test updating an inventory record that does not exist"""
+    logger.info("Testing POST /backend/update_inventory - unknown inventory ID")
+    
+    # Make the request
+    response = client.post(
+        "/backend/update_inventory",
+        json={
+            "inventory_id": 999999,
+            "quantity": 1.0,
+            "action": "add"
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 400, f"Expected status code 400, got {response.status_code}"
+    assert response.json()["detail"] == "Inventory record 999999 not found"
+    
+    logger.info("Update inventory not found test successful")
+
+def test_update_inventory_batch_atomic_rollback(client):
+    """Test that an atomic batch with a failing item leaves every quantity unchanged"""
+    logger.info("Testing POST /backend/update_inventory_batch - atomic rollback")
+    
+    global SAVED_QUANTITY
+    
+    # Make the request
+    response = client.post(
+        "/backend/update_inventory_batch",
+        json={
+            "mode": "atomic",
+            "items": [
+                {"inventory_id": 165, "quantity": 1.0, "action": "add"},
+                {"inventory_id": 999999, "quantity": 1.0, "action": "add"}
+            ]
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "Batch with a missing record should fail"
+    assert len(data["results"]) == 2, "There should be one result per item"
+    assert data["results"][0]["success"] is False, "Valid item should not be applied in atomic mode"
+    assert data["results"][1]["message"] == "Inventory record 999999 not found"
+    
+    # Verify the quantity was not changed
+    data = client.get("/backend/chemical/165").json()
+    assert abs(data["chemical"]["quantity"] - SAVED_QUANTITY) < 0.001, \
+        f"Quantity should still be {SAVED_QUANTITY}, got {data['chemical']['quantity']}"
+    
+    logger.info("Update inventory batch atomic rollback test successful")
+
+def test_update_inventory_batch_best_effort(client):
+    """Test that a best-effort batch applies the valid items and nets repeated records"""
+    logger.info("Testing POST /backend/update_inventory_batch - best effort")
+    
+    global SAVED_QUANTITY
+    
+    # Make the request
+    response = client.post(
+        "/backend/update_inventory_batch",
+        json={
+            "mode": "best_effort",
+            "items": [
+                {"inventory_id": 165, "quantity": 3.0, "action": "add"},
+                {"inventory_id": 165, "quantity": 1.0, "action": "remove"},
+                {"inventory_id": 999999, "quantity": 1.0, "action": "add"}
+            ]
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "Batch with a missing record should not report full success"
+    assert data["results"][0]["success"] is True, "Valid item should be applied in best-effort mode"
+    assert abs(data["results"][0]["new_quantity"] - (SAVED_QUANTITY + 2.0)) < 0.001, \
+        f"Expected quantity {SAVED_QUANTITY + 2.0}, got {data['results'][0]['new_quantity']}"
+    assert data["results"][2]["success"] is False, "Missing record should fail"
+    
+    SAVED_QUANTITY += 2.0
+    
+    logger.info("Update inventory batch best effort test successful")
+
+def wait_for_search_cache_listener(client, timeout=10.0):
+    """Wait until the search cache listener is connected, as searches are only cached then"""
+    deadline = time.monotonic() + timeout
+    while not client.get("/backend/search_cache/stats").json()["listening"]:
+        assert time.monotonic() < deadline, "Search cache listener did not connect"
+        time.sleep(0.1)
+
+def test_search_cache_invalidated_by_inventory_update(client):
+    """Test that a repeated search is served from cache and refreshed after an inventory update"""
+    logger.info("Testing search cache hits and invalidation")
+    wait_for_search_cache_listener(client)
+    
+    # Search the test record's own lab room
+    chemical = client.get("/backend/chemical/165").json()["chemical"]
+    criteria = {"building_name": chemical["building_name"], "lab_room_number": chemical["lab_room_number"]}
+    
+    # Warm the cache and find the test record
+    first = client.post("/backend/chemsearch", json=criteria).json()
+    record = next(r for r in first["results"] if r["id"] == 165)
+    
+    # The same search, written differently, should be a cache hit with the same rows
+    stats_before = client.get("/backend/search_cache/stats").json()
+    variant = client.post(
+        "/backend/chemsearch",
+        json={**criteria, "building_name": f"  {chemical['building_name']} ", "name": "  "}
+    ).json()
+    stats_after = client.get("/backend/search_cache/stats").json()
+    assert stats_after["hits"] == stats_before["hits"] + 1, "Repeated search should be served from the cache"
+    assert variant["results"] == first["results"], "Equivalent searches should return the same rows"
+    
+    # Update the record and search again
+    response = client.post(
+        "/backend/update_inventory",
+        json={"inventory_id": 165, "quantity": 1.0, "action": "add"}
+    )
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    after = client.post("/backend/chemsearch", json=criteria).json()
+    updated = next(r for r in after["results"] if r["id"] == 165)
+    assert abs(updated["quantity"] - (record["quantity"] + 1.0)) < 0.001, \
+        f"Search should reflect the update, got {updated['quantity']}"
+    
+    logger.info("Search cache invalidation test successful")
+
+def test_search_cache_sees_changes_from_other_processes(client):
+    """Test that a cached search is dropped after inventory changes made outside the API"""
+    logger.info("Testing search cache invalidation through notifications")
+    wait_for_search_cache_listener(client)
+    
+    chemical = client.get("/backend/chemical/165").json()["chemical"]
+    criteria = {"building_name": chemical["building_name"], "lab_room_number": chemical["lab_room_number"]}
+    client.post("/backend/chemsearch", json=criteria)
+    
+    # Change the record directly, as another backend worker would, without touching this cache
+    async def change_directly(delta):
+        async with db_connection() as conn:
+            await conn.execute("UPDATE inventory SET quantity = quantity + %s WHERE id = 165", (delta,))
+    
+    client.portal.call(change_directly, 1)
+    try:
+        # The notification arrives asynchronously; the search must pick up the new quantity
+        deadline = time.monotonic() + 5.0
+        while True:
+            after = client.post("/backend/chemsearch", json=criteria).json()
+            quantity = next(r for r in after["results"] if r["id"] == 165)["quantity"]
+            if abs(quantity - (chemical["quantity"] + 1.0)) < 0.001:
+                break
+            assert time.monotonic() < deadline, f"Search should reflect the direct update, got {quantity}"
+            time.sleep(0.1)
+    finally:
+        client.portal.call(change_directly, -1)
+    
+    logger.info("Search cache notification test successful")
+
+@pytest.fixture
+def bulk_import_cleanup(client):
+    """Remove the bulk import test chemical, locations and inventory before and after a test"""
+    async def delete_imported():
+        async with db_connection() as conn:
+            await conn.execute("""
+                DELETE FROM inventory
+                WHERE location_id IN (SELECT location_id FROM locations WHERE building_name = 'Import Test Hall')
+            """)
+            await conn.execute("DELETE FROM locations WHERE building_name = 'Import Test Hall'")
+            await conn.execute("DELETE FROM chemicals WHERE lower(name) = 'bulk import test chemical'")
+        # Cached searches may still list the deleted inventory
+        get_search_cache().invalidate_all()
+    
+    client.portal.call(delete_imported)
+    try:
+        yield
+    finally:
+        client.portal.call(delete_imported)
+
+def test_bulk_import_atomic_rejects_invalid_rows(client, bulk_import_cleanup):
+    """Test that an atomic import with an invalid record reports it and imports nothing"""
+    logger.info("Testing POST /backend/import/inventory - atomic rejection")
+    
+    csv_body = (
+        "name,unit_of_measure,building_name,lab_room_number,locker_number,quantity,reorder_quantity\n"
+        "Bulk Import Test Chemical,mL,Import Test Hall,101,1,250,50\n"
+        "Bulk Import Test Chemical,mL,Import Test Hall,10000,2,abc,50\n"
+    )
+    
+    # Make the request
+    response = client.post(
+        "/backend/import/inventory?mode=atomic",
+        content=csv_body,
+        headers={"Content-Type": "text/csv"}
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "Import with an invalid record should fail"
+    assert data["rows_received"] == 2 and data["rows_imported"] == 0
+    assert data["error_count"] == 1 and data["errors"][0]["row"] == 2
+    assert len(data["errors"][0]["messages"]) == 2, f"Expected room and quantity errors, got {data['errors'][0]}"
+    
+    # Verify nothing was imported
+    search = client.post("/backend/chemsearch", json={"building_name": "Import Test Hall"}).json()
+    assert search["results"] == [], "Atomic import should not create any inventory"
+    
+    logger.info("Bulk import atomic rejection test successful")
+
+def test_bulk_import_best_effort(client, bulk_import_cleanup):
+    """Test that a best-effort NDJSON import creates the chemical, location and inventory"""
+    logger.info("Testing POST /backend/import/inventory - best effort")
+    
+    ndjson_body = (
+        '{"name": "Bulk Import Test Chemical", "unit_of_measure": "mL", "building_name": "Import Test Hall", '
+        '"lab_room_number": 101, "locker_number": 1, "quantity": 250, "reorder_quantity": 50}\n'
+        '{"name": "bulk import test chemical", "cas_number": "0000-00-0", "building_name": "Import Test Hall", '
+        '"lab_room_number": 101, "locker_number": 2, "quantity": 10, "reorder_quantity": 50}\n'
+        'not json\n'
+    )
+    
+    # Make the request
+    response = client.post(
+        "/backend/import/inventory?mode=best_effort",
+        content=ndjson_body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "Import with an invalid record should not report full success"
+    assert data["rows_received"] == 3 and data["rows_imported"] == 2
+    assert data["chemicals_created"] == 1, "Both records name the same chemical"
+    assert data["locations_created"] == 2
+    assert data["errors"][0]["row"] == 3
+    
+    # Verify the imported inventory is searchable
+    search = client.post("/backend/chemsearch", json={"building_name": "Import Test Hall"}).json()
+    assert len(search["results"]) == 2, f"Expected 2 imported records, got {len(search['results'])}"
+    assert {r["cas_number"] for r in search["results"]} == {"0000-00-0"}
+    assert {r["unit_of_measure"] for r in search["results"]} == {"mL"}
+    
+    logger.info("Bulk import best effort test successful")
+
+def test_export_inventory_csv(client):
+    """Test that the CSV export streams every inventory record in a building"""
+    logger.info("Testing GET /backend/export/inventory - CSV")
+    
+    building = client.get("/backend/chemical/165").json()["chemical"]["building_name"]
+    
+    # Make the request
+    response = client.get("/backend/export/inventory", params={"building_name": building})
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.headers["content-type"].startswith("text/csv")
+    
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    search = client.post("/backend/chemsearch", json={"building_name": building}).json()
+    assert len(records) == len(search["results"]), \
+        f"Expected {len(search['results'])} records, got {len(records)}"
+    assert all(r["building_name"] == building for r in records)
+    assert "165" in {r["inventory_id"] for r in records}
+    
+    logger.info("Export inventory CSV test successful")
+
+def test_export_inventory_ndjson(client):
+    """Test that the NDJSON export writes one JSON object per record in a lab room"""
+    logger.info("Testing GET /backend/export/inventory - NDJSON")
+    
+    chemical = client.get("/backend/chemical/165").json()["chemical"]
+    params = {
+        "format": "ndjson",
+        "building_name": chemical["building_name"],
+        "lab_room_number": chemical["lab_room_number"]
+    }
+    
+    # Make the request
+    response = client.get("/backend/export/inventory", params=params)
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    records = [json.loads(line) for line in response.text.splitlines()]
+    record = next(r for r in records if r["inventory_id"] == 165)
+    assert record["name"] == chemical["name"]
+    assert abs(record["quantity"] - chemical["quantity"]) < 0.001
+    assert all(r["lab_room_number"] == chemical["lab_room_number"] for r in records)
+    
+    # Unknown formats are rejected before streaming starts
+    response = client.get("/backend/export/inventory", params={"format": "xml"})
+    assert response.status_code == 400, f"Expected status code 400, got {response.status_code}"
+    
+    logger.info("Export inventory NDJSON test successful")
+
 if __name__ == "__main__":
     # This allows running the tests directly with python instead of pytest
     pytest.main(["-v", __file__])
@@ -0,0 +1,171 @@
+import os
+import sys
+import pytest
+import logging
+from contextlib import asynccontextmanager
+from psycopg_pool import AsyncConnectionPool
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# Set environment variables for testing - still need these for app configuration
+os.environ["LOCAL_DEV"] = "true" 
+os.environ["API_KEY_SECURITY"] = "disabled"
+os.environ["SECRET_KEY"] = "test_secret_key"
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Import the FastAPI app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.main import app
+from app import database
+from app.database import (
+    init_pool, close_pool, get_pool, db_connection, get_db_connection,
+    RotatingCredentialsConnection, _current_connection_kwargs
+)
+
+@pytest.fixture(scope="module")
+def client():
+    """Create and configure a FastAPI test client"""
+    with TestClient(app) as client:
+        yield client
+
+@asynccontextmanager
+async def single_connection_pool(timeout: float = 10.0):
+    """A one-connection pool set up like the app's, so tests never resize the shared pool"""
+    pool = AsyncConnectionPool(
+        connection_class=RotatingCredentialsConnection,
+        kwargs=_current_connection_kwargs,
+        min_size=1,
+        max_size=1,
+        timeout=timeout,
+        check=database._check_if_idle,
+        reset=database._mark_returned,
+        name="chemtrack-test",
+        open=False,
+    )
+    await pool.open(wait=True)
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+async def backend_pid(conn):
+    cursor = await conn.execute("SELECT pg_backend_pid()")
+    return (await cursor.fetchone())[0]
+
+def test_pool_settings_from_environment(client, monkeypatch):
+    """Test that idle recycling, maximum lifetime and pool size come from the DB_POOL_* settings"""
+    logger.info("Testing connection pool configuration")
+    
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "2")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "4")
+    monkeypatch.setenv("DB_POOL_MAX_IDLE", "120")
+    monkeypatch.setenv("DB_POOL_MAX_LIFETIME", "600")
+    
+    async def reopen():
+        await close_pool()
+        return await init_pool()
+    
+    try:
+        pool = client.portal.call(reopen)
+        assert pool.min_size == 2 and pool.max_size == 4
+        assert pool.max_idle == 120.0, f"Expected max_idle 120, got {pool.max_idle}"
+        assert pool.max_lifetime == 600.0, f"Expected max_lifetime 600, got {pool.max_lifetime}"
+    finally:
+        monkeypatch.undo()
+        client.portal.call(reopen)
+    
+    logger.info("Connection pool configuration test successful")
+
+def test_pool_reuses_connections(client):
+    """Test that consecutive requests share pooled connections instead of reconnecting"""
+    logger.info("Testing connection reuse")
+    
+    async def checkouts_after_fill():
+        pool = await get_pool()
+        # The pool opens without waiting, so let it reach min_size first
+        await pool.wait()
+        opened = pool.get_stats().get("connections_num", 0)
+        for _ in range(3):
+            async with db_connection() as conn:
+                await conn.execute("SELECT 1")
+        return opened, pool.get_stats().get("connections_num", 0)
+    
+    opened_before, opened_after = client.portal.call(checkouts_after_fill)
+    assert opened_after == opened_before, \
+        f"Idle pooled connections should be reused, but {opened_after - opened_before} were opened"
+    
+    logger.info("Connection reuse test successful")
+
+def test_pool_replaces_dead_connection_on_checkout(client, monkeypatch):
+    """Test that the health check on checkout replaces a connection the server has closed"""
+    logger.info("Testing connection health check on checkout")
+    
+    # Check every connection on checkout, however recently it was returned
+    monkeypatch.setattr(database, "_check_after", 0.0)
+    
+    async def kill_and_reuse():
+        async with single_connection_pool() as pool:
+            async with pool.connection() as conn:
+                pid = await backend_pid(conn)
+            
+            other = await get_db_connection()
+            try:
+                await other.execute("SELECT pg_terminate_backend(%s)", (pid,))
+            finally:
+                await other.close()
+            
+            async with pool.connection() as conn:
+                return pid, await backend_pid(conn)
+    
+    killed, replacement = client.portal.call(kill_and_reuse)
+    assert killed != replacement, "A terminated connection should be replaced before it is handed out"
+    
+    logger.info("Connection health check test successful")
+
+def test_pool_exhaustion_returns_503(client, monkeypatch):
+    """Test that a request waiting longer than the pool timeout for a connection gets a 503"""
+    logger.info("Testing connection pool exhaustion")
+    
+    async def checkout_while_exhausted():
+        # db_connection uses a dedicated one-connection pool; the app's pool is left alone
+        async with single_connection_pool(timeout=0.5) as pool:
+            monkeypatch.setattr(database, "_pool", pool)
+            async with db_connection():
+                with pytest.raises(HTTPException) as exc_info:
+                    async with db_connection():
+                        pass
+            return exc_info.value
+    
+    try:
+        error = client.portal.call(checkout_while_exhausted)
+    finally:
+        monkeypatch.undo()
+    assert error.status_code == 503, f"Expected status code 503, got {error.status_code}"
+    
+    logger.info("Connection pool exhaustion test successful")
+
+def test_connect_retries_with_refreshed_credentials(client):
+    """Test that a connection rejected for a stale password re-fetches secrets and retries once"""
+    logger.info("Testing credential refresh on authentication failure")
+    
+    async def connect_with_stale_password():
+        kwargs = await _current_connection_kwargs()
+        kwargs["password"] = kwargs["password"] + "-rotated-away"
+        conn = await RotatingCredentialsConnection.connect(**kwargs)
+        try:
+            cursor = await conn.execute("SELECT 1")
+            return (await cursor.fetchone())[0]
+        finally:
+            await conn.close()
+    
+    assert client.portal.call(connect_with_stale_password) == 1, \
+        "Connection should succeed after refreshing the credentials"
+    
+    logger.info("Credential refresh test successful")
+
+if __name__ == "__main__":
+    # This allows running the tests directly with python instead of pytest
+    pytest.main(["-v", __file__])
@@ -24,6 +24,7 @@ TEST_LOCATION = {
     "locker_number": 9
 }
 TEST_LOCATION_ID = None
+BUILDINGS_ETAG = None
 
 @pytest.fixture(scope="module")
 def client():
@@ -81,6 +82,56 @@ def test_lab_rooms_by_building(client):
     # Log the building name in the message to make it explicit
     logger.info(f"Lab rooms by building test successful for '{building_name}'")
 
+def test_buildings_conditional_get(client):
+    """Test that buildings and lab rooms carry an ETag and answer 304 when it still matches"""
+    logger.info("Testing conditional GET of /backend/buildings and /backend/lab_rooms")
+    
+    global BUILDINGS_ETAG
+    
+    # Make the request
+    response = client.get("/backend/buildings")
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    BUILDINGS_ETAG = response.headers.get("etag")
+    assert BUILDINGS_ETAG and BUILDINGS_ETAG.startswith('"'), "Response should carry a strong ETag"
+    
+    # The same ETag means the client's copy is current
+    response = client.get("/backend/buildings", headers={"If-None-Match": BUILDINGS_ETAG})
+    assert response.status_code == 304, f"Expected status code 304, got {response.status_code}"
+    assert response.headers.get("etag") == BUILDINGS_ETAG
+    
+    response = client.get("/backend/lab_rooms/building 202", headers={"If-None-Match": BUILDINGS_ETAG})
+    assert response.status_code == 304, f"Expected status code 304, got {response.status_code}"
+    
+    # Any other ETag gets the full response
+    response = client.get("/backend/buildings", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    logger.info("Buildings conditional GET test successful")
+
+def test_location_tree(client):
+    """Test that the location tree matches the locations list"""
+    logger.info("Testing GET /backend/location_tree endpoint")
+    
+    # Make the request
+    response = client.get("/backend/location_tree")
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.headers.get("etag") == BUILDINGS_ETAG, "The tree shares the buildings ETag"
+    
+    data = response.json()
+    assert data["success"] is True
+    assert list(data["buildings"]) == client.get("/backend/buildings").json()["buildings"]
+    assert 100 in [int(room) for room in data["buildings"]["building 202"]]
+    
+    locations = client.get("/backend/locations").json()["locations"]
+    lockers = sum(len(lockers) for rooms in data["buildings"].values() for lockers in rooms.values())
+    assert lockers == len({(l["building_name"], l["lab_room_number"], l["locker_number"]) for l in locations})
+    
+    logger.info("Location tree test successful")
+
 def test_locations(client):
     """Test the locations endpoint to verify the list of locations"""
     logger.info("Testing GET /backend/locations endpoint")
@@ -155,6 +206,49 @@ def test_create_location(client):
     
     logger.info(f"Create location test successful. Created location ID: {TEST_LOCATION_ID}")
 
+def test_create_duplicate_location(client):
+    """Test that creating a location that already exists is rejected"""
+    logger.info("Testing POST /backend/createlocation endpoint - duplicate location")
+    
+    # Make the request with the location created above
+    response = client.post(
+        "/backend/createlocation",
+        json={
+            "building_name": TEST_LOCATION["building_name"],
+            "lab_room_number": TEST_LOCATION["lab_room_number"],
+            "locker_number": TEST_LOCATION["locker_number"]
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    
+    data = response.json()
+    assert data["success"] is False, "Duplicate location creation should fail"
+    assert data["message"] == (
+        f"Location already exists with building {TEST_LOCATION['building_name']}, "
+        f"room {TEST_LOCATION['lab_room_number']}, locker {TEST_LOCATION['locker_number']}"
+    )
+    
+    logger.info("Create duplicate location test successful")
+
+def test_buildings_etag_changes_after_create(client):
+    """Test that creating a location refreshes the cached buildings and their ETag"""
+    logger.info("Testing /backend/buildings after creating a location")
+    
+    # Make the request with the ETag from before the location was created
+    response = client.get("/backend/buildings", headers={"If-None-Match": BUILDINGS_ETAG})
+    
+    # Assertions
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.headers.get("etag") != BUILDINGS_ETAG, "ETag should change with the locations"
+    assert TEST_LOCATION["building_name"] in response.json()["buildings"], "New building should be listed"
+    
+    response = client.get(f"/backend/lab_rooms/{TEST_LOCATION['building_name']}")
+    assert response.json()["lab_rooms"] == [TEST_LOCATION["lab_room_number"]]
+    
+    logger.info("Buildings ETag refresh test successful")
+
 def test_update_location(client):
     """Test updating an existing location"""
     logger.info("Testing POST /backend/updatelocation endpoint")
@@ -232,6 +326,8 @@ def test_check_location_with_inventory(client):
         assert data["success"] is True, "Success should be True"
         assert "has_inventory" in data, "Response should contain 'has_inventory' field"
         assert data["has_inventory"] is True, "Location should have inventory"
+        assert data["message"].startswith("Location has ") and not data["message"].startswith("Location has 0 "), \
+            f"Message should include the inventory count, got {data['message']}"
     else:
         # Log a warning if we couldn't find the test location
         logger.warning("Could not find test location with inventory. Skipping inventory check test.")
@@ -253,6 +349,7 @@ def test_check_location_without_inventory(client):
     assert data["success"] is True, "Success should be True"
     assert "has_inventory" in data, "Response should contain 'has_inventory' field"
     assert data["has_inventory"] is False, "Test location should not have inventory"
+    assert data["message"] == "Location has 0 inventory items"
     
     logger.info("Check location without inventory test successful")
 
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import pytest
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.secret_provider import create_secret_provider
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    """Remove every variable that selects a secret provider"""
+    for name in ("DB_SECRET_PROVIDER", "DB_HOST", "DB_CREDENTIALS_FILE", "LOCAL_DEV"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+def test_default_secret_provider_is_aws(clean_env):
+    """Test that AWS Secrets Manager is used when nothing selects another provider"""
+    assert create_secret_provider().name == "aws"
+
+def test_local_dev_keeps_aws_secret_provider(clean_env):
+    """Test that LOCAL_DEV=true alone does not switch away from the real database credentials"""
+    clean_env.setenv("LOCAL_DEV", "true")
+    assert create_secret_provider().name == "aws"
+
+def test_explicit_env_secret_provider(clean_env):
+    """Test that DB_SECRET_PROVIDER=env selects the env provider"""
+    clean_env.setenv("DB_SECRET_PROVIDER", "env")
+    clean_env.setenv("DB_USER", "chemuser")
+    clean_env.setenv("DB_PASSWORD", "secret")
+    provider = create_secret_provider()
+    assert provider.name == "env"
+    assert provider.get_db_credentials()["password"] == "secret"
+
+def test_db_host_selects_env_secret_provider(clean_env):
+    """Test that setting DB_HOST selects the env provider"""
+    clean_env.setenv("DB_HOST", "db.example.com")
+    provider = create_secret_provider()
+    assert provider.name == "env"
+    assert provider.get_db_credentials()["host"] == "db.example.com"
+
+def test_credentials_file_selects_file_secret_provider(clean_env, tmp_path):
+    """Test that DB_CREDENTIALS_FILE selects the file provider and reads Secrets Manager shapes"""
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps({"db_url": "db.example.com:5432", "username": "chemuser", "password": "secret"}))
+    clean_env.setenv("DB_CREDENTIALS_FILE", str(path))
+    provider = create_secret_provider()
+    assert provider.name == "file"
+    creds = provider.get_db_credentials()
+    assert creds["host"] == "db.example.com"
+    assert creds["user"] == "chemuser"
+
+def test_unknown_secret_provider_is_rejected(clean_env):
+    """Test that an unknown DB_SECRET_PROVIDER fails fast"""
+    clean_env.setenv("DB_SECRET_PROVIDER", "vault")
+    with pytest.raises(ValueError):
+        create_secret_provider()
+
+if __name__ == "__main__":
+    # This allows running the tests directly with python instead of pytest
+    pytest.main(["-v", __file__])
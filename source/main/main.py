@@ -2,7 +2,6 @@ import os
 import time
 import boto3
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response
-import requests
 import logging
 import api_client
 
@@ -51,6 +50,20 @@ def after_request(response):
     request_latency = time.time() - request.start_time
     return response
 
+def error_header_html(username):
+    """Header shown when the shared-templates service cannot be reached"""
+    return f"""
+    <header class="header">
+        <div class="header-left">
+            <h1 class="header-title">ChemTrack (Error Header)</h1>
+        </div>
+        <div class="header-user">
+            <span class="header-user-name">{username}</span>
+            <a href="/logout" class="logout-btn">Logout</a>
+        </div>
+    </header>
+    """
+
 def get_shared_header(username, user_account_enabled=True):
     """Get the shared header from the shared-templates service"""
     try:
@@ -60,7 +73,7 @@ def get_shared_header(username, user_account_enabled=True):
             'user_account_enabled': str(user_account_enabled).lower()
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
         if response.status_code == 200:
             header_html = response.text
             return header_html
@@ -80,18 +93,28 @@ def get_shared_header(username, user_account_enabled=True):
             """
     except Exception as e:
         logger.error(f"Exception fetching shared header: {str(e)}")
-        # Fallback header for debugging
-        return f"""
-        <header class="header">
-            <div class="header-left">
-                <h1 class="header-title">ChemTrack (Error Header)</h1>
-            </div>
-            <div class="header-user">
-                <span class="header-user-name">{username}</span>
-                <a href="/logout" class="logout-btn">Logout</a>
-            </div>
-        </header>
-        """
+        return error_header_html(username)
+
+def error_navigation_html():
+    """Navigation shown when the shared-templates service cannot be reached"""
+    return """
+    <nav class="nav-sidebar">
+        <ul class="nav-list">
+            <li class="nav-item">
+                <a href="/" class="nav-link active">
+                    <span class="nav-icon">🏠</span>
+                    Home (Error)
+                </a>
+            </li>
+            <li class="nav-item">
+                <a href="/search" class="nav-link">
+                    <span class="nav-icon">🔍</span>
+                    Search (Error)
+                </a>
+            </li>
+        </ul>
+    </nav>
+    """
 
 def get_shared_navigation(role, active_page):
     """Get the shared navigation from the shared-templates service"""
@@ -103,7 +126,7 @@ def get_shared_navigation(role, active_page):
             'recipes_url': PRC_RECIPES
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
         if response.status_code == 200:
             nav_html = response.text
             return nav_html
@@ -130,25 +153,7 @@ def get_shared_navigation(role, active_page):
             """
     except Exception as e:
         logger.error(f"Exception fetching shared navigation: {str(e)}")
-        # Fallback navigation for debugging
-        return """
-        <nav class="nav-sidebar">
-            <ul class="nav-list">
-                <li class="nav-item">
-                    <a href="/" class="nav-link active">
-                        <span class="nav-icon">🏠</span>
-                        Home (Error)
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="/search" class="nav-link">
-                        <span class="nav-icon">🔍</span>
-                        Search (Error)
-                    </a>
-                </li>
-            </ul>
-        </nav>
-        """
+        return error_navigation_html()
 
 @app.route('/')
 def index():
@@ -164,8 +169,12 @@ def index():
     # Get shared header and navigation
     username = session.get('user', '')
     role = session.get('role', '')
-    header_html = get_shared_header(username, True)
-    navigation_html = get_shared_navigation(role, 'home')
+    page = api_client.fan_out({
+        'header_html': (get_shared_header, (username, True), error_header_html(username)),
+        'navigation_html': (get_shared_navigation, (role, 'home'), error_navigation_html()),
+    })
+    header_html = page['header_html']
+    navigation_html = page['navigation_html']
     
     # User has a valid session, render the main page
     return render_template('main.html', 
@@ -250,6 +259,38 @@ def manage_sns_subscription(email, notification_preference):
         logger.error(f"Error managing SNS subscription: {str(e)}")
         return False
 
+def get_user_email(username):
+    """Get a user's email address from the backend, or an empty string"""
+    try:
+        response = api_client.post(f"{PRC_BACKEND}/backend/get_user_info", json={"username": username})
+        if response.status_code == 200:
+            user_info = response.json()
+            if user_info.get('success'):
+                return user_info.get('email', '')
+    except Exception as e:
+        logger.error(f"Error fetching user email: {str(e)}")
+    return ''
+
+def get_user_preferences(username):
+    """Get a user's preferences from the backend, or None if they cannot be fetched"""
+    try:
+        pref_response = api_client.post(
+            f"{PRC_BACKEND}/backend/get_user_preferences", 
+            json={"username": username}
+        )
+        if pref_response.status_code == 200:
+            return pref_response.json().get('preferences', {})
+    except Exception as e:
+        logger.error(f"Error fetching user preferences: {str(e)}")
+    return None
+
+def get_buildings():
+    """Get the list of buildings for dropdowns"""
+    buildings_response = api_client.get_cached(f"{PRC_BACKEND}/backend/buildings")
+    if buildings_response.status_code == 200:
+        return buildings_response.json().get('buildings', [])
+    return []
+
 @app.route('/user_account', methods=['GET', 'POST'])
 def user_account():
     # Check if user has a valid session
@@ -371,68 +412,44 @@ def user_account():
     
     # GET request - display the form
     try:
-        # Get user email from backend
-        email = ""
-        try:
-            # Get user data from backend using the new endpoint
-            user_info_request = {
-                "username": session['user']
-            }
-            response = api_client.post(f"{PRC_BACKEND}/backend/get_user_info", json=user_info_request)
-            if response.status_code == 200:
-                user_info = response.json()
-                if user_info.get('success'):
-                    email = user_info.get('email', '')
-        except Exception as e:
-            logger.error(f"Error fetching user email: {str(e)}")
-        
-        # Get user preferences from backend
-        user_building = ''
-        user_lab_room = ''
-        reorder_notification = 'off'  # Default to off
+        # Get user data, preferences, buildings and shared components concurrently
+        username = session.get('user', '')
+        role = session.get('role', '')
+        page = api_client.fan_out({
+            'email': (get_user_email, (username,), ''),
+            'preferences': (get_user_preferences, (username,), None),
+            'buildings': (get_buildings, (), []),
+            'header_html': (get_shared_header, (username, True), error_header_html(username)),
+            'navigation_html': (get_shared_navigation, (role, 'home'), error_navigation_html()),
+        })
+        email = page['email']
+        buildings = page['buildings']
+        header_html = page['header_html']
+        navigation_html = page['navigation_html']
         
-        try:
-            pref_response = api_client.post(
-                f"{PRC_BACKEND}/backend/get_user_preferences", 
-                json={"username": session['user']}
-            )
+        prefs = page['preferences']
+        if prefs is not None:
+            user_building = prefs.get('building', '')
+            user_lab_room = prefs.get('lab_room', '')
+            reorder_notification = prefs.get('reorder_notification', 'off')
             
-            if pref_response.status_code == 200:
-                prefs = pref_response.json().get('preferences', {})
-                user_building = prefs.get('building', '')
-                user_lab_room = prefs.get('lab_room', '')
-                reorder_notification = prefs.get('reorder_notification', 'off')
-                
-                # Update session with preferences
-                session['pref_building'] = user_building
-                session['pref_lab_room'] = user_lab_room
-                session['reorder_notification'] = reorder_notification
-        except Exception as e:
-            logger.error(f"Error fetching user preferences: {str(e)}")
+            # Update session with preferences
+            session['pref_building'] = user_building
+            session['pref_lab_room'] = user_lab_room
+            session['reorder_notification'] = reorder_notification
+        else:
             # Fall back to session values if API call fails
             user_building = session.get('pref_building', '')
             user_lab_room = session.get('pref_lab_room', '')
             reorder_notification = session.get('reorder_notification', 'off')
         
-        # Get list of buildings for dropdown
-        buildings_response = api_client.get(f"{PRC_BACKEND}/backend/buildings")
-        buildings = []
-        if buildings_response.status_code == 200:
-            buildings = buildings_response.json().get('buildings', [])
-        
         # Get list of lab rooms for dropdown based on selected building
         lab_rooms = []
         if user_building:
-            lab_rooms_response = api_client.get(f"{PRC_BACKEND}/backend/lab_rooms/{user_building}")
+            lab_rooms_response = api_client.get_cached(f"{PRC_BACKEND}/backend/lab_rooms/{user_building}")
             if lab_rooms_response.status_code == 200:
                 lab_rooms = lab_rooms_response.json().get('lab_rooms', [])
         
-        # Get shared header and navigation
-        username = session.get('user', '')
-        role = session.get('role', '')
-        header_html = get_shared_header(username, True)
-        navigation_html = get_shared_navigation(role, 'home')
-        
         # Get API key for frontend requests
         api_key = api_client.get_api_key()
 
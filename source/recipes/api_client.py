@@ -1,7 +1,13 @@
 import os
+import time
 import requests
 import logging
+import threading
+import concurrent.futures
+from collections import OrderedDict
 from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -16,49 +22,188 @@ else:
     LOCAL_DEV = True
     SECRETS_SERVICE_URL = 'http://localhost:8099'
 
-def get_api_key() -> Optional[str]:
+# Seconds an API key from the secrets service is reused before it is fetched again
+API_KEY_TTL = float(os.environ.get('API_KEY_TTL', '300'))
+
+# Keep-alive connections kept per host by each worker's session
+API_POOL_SIZE = int(os.environ.get('API_POOL_SIZE', '10'))
+# Retries for failed connections and 502/503/504 responses (POSTs only retry failed connects)
+API_RETRIES = int(os.environ.get('API_RETRIES', '2'))
+API_RETRY_BACKOFF = float(os.environ.get('API_RETRY_BACKOFF', '0.3'))
+
+# Seconds a shared template fragment is served before it is revalidated in the background
+FRAGMENT_TTL = float(os.environ.get('FRAGMENT_TTL', '60'))
+# Most shared template fragments kept (one per URL and parameters)
+FRAGMENT_CACHE_SIZE = 512
+
+# Threads each worker uses to fetch a page's independent dependencies concurrently
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', '8'))
+# Seconds a page waits for its dependencies before rendering with their fallbacks
+PAGE_DEADLINE = float(os.environ.get('PAGE_DEADLINE', '10'))
+# Seconds an API request may take when the caller does not give a timeout
+API_TIMEOUT = float(os.environ.get('API_TIMEOUT', '10'))
+
+# Most responses kept for conditional GETs
+CONDITIONAL_CACHE_SIZE = 256
+
+# {url: (etag, response)} for get_cached, most recently used last
+_conditional_cache = OrderedDict()
+_conditional_cache_lock = threading.Lock()
+
+# {(url, params): [etag, version, response, fetched_at]} for get_fragment, most recently used last
+_fragment_cache = OrderedDict()
+_fragment_cache_lock = threading.Lock()
+_fragment_refreshing = set()
+
+# Page deadline (time.monotonic()) of the fan_out call running in this thread, if any
+_call_context = threading.local()
+
+# Thread pool of this worker process for fan_out, recreated after a fork
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# (api_key, fetched_at) of the last key from the secrets service
+_api_key_entry = None
+_api_key_lock = threading.Lock()
+
+# Pooled session of this worker process, recreated after a fork
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Return this worker's keep-alive session
+
+    Backend, secrets and shared template calls reuse its pooled connections instead of
+    opening a new TCP connection per request. Sessions are not shared across processes,
+    so a gunicorn worker forked from a parent that already made calls gets its own.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                retry = Retry(
+                    total=API_RETRIES,
+                    backoff_factor=API_RETRY_BACKOFF,
+                    status_forcelist=(502, 503, 504),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = pid
+    return _session
+
+def _fetch_api_key() -> Optional[str]:
+    """Fetch the API key from the secrets service, or None if it cannot be retrieved"""
+    try:
+        response = get_session().get(f"{SECRETS_SERVICE_URL}/secrets/api-key", timeout=15)
+        
+        if response.status_code == 200:
+            return response.json().get("api_key")
+        else:
+            logger.error(f"Failed to retrieve API key: Status code {response.status_code}")
+            return None
+    except requests.RequestException as e:
+        logger.error(f"Error connecting to secrets service: {e}")
+        return None
+
+def get_api_key(rejected_key: Optional[str] = None) -> Optional[str]:
     """
     Get API key from secrets service
     
+    The key is reused for API_KEY_TTL seconds. Threads that find it expired, or rejected,
+    wait for a single fetch instead of each calling the secrets service.
+    
+    Args:
+        rejected_key (str): Key the backend just refused; a different key is fetched
+    
     Returns:
         str: API key if successful, None otherwise
     """
+    global _api_key_entry
+    
     # In local development mode with LOCAL_DEV=true, return a dummy key
     if LOCAL_DEV:
         logger.info("Running in local development mode. Using dummy API key.")
         return "local-development-key"
     
-    try:
-        response = requests.get(f"{SECRETS_SERVICE_URL}/secrets/api-key", timeout=15)
+    def usable(entry):
+        return (entry is not None and entry[0] != rejected_key
+                and time.monotonic() - entry[1] < API_KEY_TTL)
+    
+    entry = _api_key_entry
+    if usable(entry):
+        return entry[0]
+    
+    with _api_key_lock:
+        # Another thread may have fetched a key while this one waited
+        entry = _api_key_entry
+        if usable(entry):
+            return entry[0]
         
-        if response.status_code == 200:
-            return response.json().get("api_key")
-        else:
-            logger.error(f"Failed to retrieve API key: Status code {response.status_code}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Error connecting to secrets service: {e}")
+        api_key = _fetch_api_key()
+        if api_key:
+            _api_key_entry = (api_key, time.monotonic())
+            return api_key
+        
+        # Keep using the expired key until the secrets service answers again
+        if entry is not None and entry[0] != rejected_key:
+            return entry[0]
         return None
 
+def _request_timeout(timeout=None):
+    """
+    Timeout for one request: the caller's, or API_TIMEOUT when none is given
+
+    Inside fan_out it is capped so the request and its retries end by the page deadline.
+    A call that has started cannot be cancelled, so an uncapped request to a hung service
+    would keep a fan-out thread busy long after the page stopped waiting for it.
+    """
+    if timeout is None:
+        timeout = API_TIMEOUT
+    deadline = getattr(_call_context, 'deadline', None)
+    if deadline is not None:
+        remaining = max(deadline - time.monotonic(), 0.1)
+        timeout = min(timeout, remaining / (API_RETRIES + 1))
+    return timeout
+
 def api_request(method, url, **kwargs):
     """
     Make API request with API key header
     
+    A 401 response is retried once with a newly fetched API key.
+    
     Args:
         method (str): HTTP method (get, post, etc.)
         url (str): Target URL
-        **kwargs: Additional arguments to pass to requests.request
+        **kwargs: Additional arguments to pass to requests.Session.request
     
     Returns:
         requests.Response: Response from the API
     """
+    kwargs['timeout'] = _request_timeout(kwargs.get('timeout'))
     api_key = get_api_key()
     if api_key:
         headers = kwargs.get('headers', {})
         headers['X-API-Key'] = api_key
         kwargs['headers'] = headers
     
-    return requests.request(method, url, **kwargs)
+    response = get_session().request(method, url, **kwargs)
+    
+    if response.status_code == 401 and api_key:
+        # The key may have been rotated since it was cached; retry once with a fresh one
+        new_key = get_api_key(rejected_key=api_key)
+        if new_key and new_key != api_key:
+            kwargs['headers'] = {**kwargs['headers'], 'X-API-Key': new_key}
+            response = get_session().request(method, url, **kwargs)
+    
+    return response
 
 # Convenience methods
 def get(url, **kwargs):
@@ -66,3 +211,154 @@ def get(url, **kwargs):
 
 def post(url, **kwargs):
     return api_request('post', url, **kwargs)
+
+def put(url, **kwargs):
+    return api_request('put', url, **kwargs)
+
+def delete(url, **kwargs):
+    return api_request('delete', url, **kwargs)
+
+def get_cached(url, **kwargs):
+    """
+    GET that revalidates a stored copy with If-None-Match
+
+    For endpoints that send an ETag, such as /backend/buildings. When the backend answers
+    304 the stored response is returned, so unchanged data is not sent again. Responses
+    without an ETag are returned as-is and not stored.
+    """
+    with _conditional_cache_lock:
+        cached = _conditional_cache.get(url)
+    if cached:
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), 'If-None-Match': cached[0]}
+
+    response = get(url, **kwargs)
+
+    with _conditional_cache_lock:
+        if response.status_code == 304 and cached:
+            _conditional_cache.move_to_end(url)
+            return cached[1]
+        etag = response.headers.get('ETag')
+        if response.status_code == 200 and etag:
+            _conditional_cache[url] = (etag, response)
+            _conditional_cache.move_to_end(url)
+            while len(_conditional_cache) > CONDITIONAL_CACHE_SIZE:
+                _conditional_cache.popitem(last=False)
+    return response
+
+def _store_fragment(key, response):
+    """Store a fragment response; a new templates version marks all fragments stale"""
+    etag = response.headers.get('ETag')
+    version = response.headers.get('X-Templates-Version')
+    with _fragment_cache_lock:
+        cached = _fragment_cache.get(key)
+        if response.status_code == 304 and cached:
+            cached[3] = time.monotonic()
+            _fragment_cache.move_to_end(key)
+            return cached[2]
+        if response.status_code == 200 and etag:
+            if version and any(entry[1] != version for entry in _fragment_cache.values()):
+                # Fragments rendered from other templates are revalidated on next use
+                for entry in _fragment_cache.values():
+                    if entry[1] != version:
+                        entry[3] = 0.0
+            _fragment_cache[key] = [etag, version, response, time.monotonic()]
+            _fragment_cache.move_to_end(key)
+            while len(_fragment_cache) > FRAGMENT_CACHE_SIZE:
+                _fragment_cache.popitem(last=False)
+    return response
+
+def _revalidate_fragment(key, url, params, etag, timeout):
+    try:
+        response = get_session().get(url, params=params, timeout=timeout, headers={'If-None-Match': etag})
+        _store_fragment(key, response)
+    except requests.RequestException as e:
+        logger.warning(f"Error revalidating shared template {url}: {e}")
+    finally:
+        with _fragment_cache_lock:
+            _fragment_refreshing.discard(key)
+
+def get_fragment(url, params=None, timeout=5):
+    """
+    GET a shared template fragment (header or navigation), served from a local cache
+
+    Fragments depend only on their URL and parameters. A copy younger than FRAGMENT_TTL is
+    returned without a request; an older copy is still returned at once while a background
+    thread revalidates it with If-None-Match (stale-while-revalidate). Only the first
+    request for a fragment waits for the shared-templates service. Responses without an
+    ETag, such as errors, are returned as-is and not stored.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    with _fragment_cache_lock:
+        cached = _fragment_cache.get(key)
+        if cached:
+            _fragment_cache.move_to_end(key)
+            if time.monotonic() - cached[3] >= FRAGMENT_TTL and key not in _fragment_refreshing:
+                _fragment_refreshing.add(key)
+                threading.Thread(
+                    target=_revalidate_fragment, args=(key, url, params, cached[0], timeout), daemon=True
+                ).start()
+            return cached[2]
+
+    response = get_session().get(url, params=params, timeout=_request_timeout(timeout))
+    return _store_fragment(key, response)
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=FANOUT_WORKERS, thread_name_prefix='fan-out'
+                )
+                _executor_pid = pid
+    return _executor
+
+def _call_before(deadline_at, function, args):
+    """Run a fan_out call with its requests' timeouts capped to the page deadline"""
+    _call_context.deadline = deadline_at
+    try:
+        return function(*args)
+    finally:
+        _call_context.deadline = None
+
+def fan_out(calls, deadline=None):
+    """
+    Run a page's independent backend and fragment requests concurrently
+
+    The page waits for the slowest call instead of the sum of all of them. Calls run in
+    worker threads, so they must be given everything they need as arguments rather than
+    reading the Flask session or request. API requests made by a call time out by the
+    deadline, so a hung service does not tie up the worker threads.
+    
+    Args:
+        calls (dict): {name: (function, args, fallback)}
+        deadline (float): Seconds to wait for all calls, PAGE_DEADLINE by default
+    
+    Returns:
+        dict: {name: result}, or the call's fallback if it raised or missed the deadline
+    """
+    if deadline is None:
+        deadline = PAGE_DEADLINE
+    executor = _get_executor()
+    deadline_at = time.monotonic() + deadline
+    futures = {
+        name: executor.submit(_call_before, deadline_at, function, args)
+        for name, (function, args, fallback) in calls.items()
+    }
+    done, _ = concurrent.futures.wait(futures.values(), timeout=deadline)
+    
+    results = {}
+    for name, future in futures.items():
+        fallback = calls[name][2]
+        if future not in done:
+            future.cancel()
+            logger.error(f"Page dependency {name} missed the {deadline}s deadline")
+            results[name] = fallback
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.error(f"Page dependency {name} failed: {e}")
+            results[name] = fallback
+    return results
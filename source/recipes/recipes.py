@@ -2,7 +2,7 @@ import os
 import time
 import logging
 from flask import Flask, render_template, request, redirect, session, jsonify
-import requests
+import api_client
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -58,7 +58,7 @@ def get_shared_header(username, user_account_enabled=True):
             'user_account_enabled': str(user_account_enabled).lower()
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
         if response.status_code == 200:
             header_html = response.text
             return header_html
@@ -101,7 +101,7 @@ def get_shared_navigation(role, active_page):
             'search_url': PRC_SEARCH + "/search"
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
         if response.status_code == 200:
             nav_html = response.text
             return nav_html
@@ -11,6 +11,10 @@ def lambda_handler(event, context):
     about chemicals that need to be reordered, and then sends them emails via SNS.
     
     This function is triggered by a scheduled CloudWatch event once per day at 3pm.
+    
+    Each run only covers chemicals that crossed below their reorder level since the
+    previous run. The backend's next_token is kept in Parameter Store (REORDER_TOKEN_PARAMETER);
+    when no token is stored yet, every chemical currently below its reorder level is reported.
     """
     
     try:
@@ -20,6 +24,7 @@ def lambda_handler(event, context):
         backend_url = os.environ.get('BACKEND_URL')
         sns_topic_arn = os.environ.get('SNS_TOPIC_ARN')
         aws_region = os.environ.get('AWS_REGION', 'us-east-1')
+        token_parameter = os.environ.get('REORDER_TOKEN_PARAMETER', 'chemtrack-reorder-notif-token')
         
         if not backend_url or not sns_topic_arn:
             raise ValueError("Required environment variables BACKEND_URL and SNS_TOPIC_ARN not set")
@@ -35,6 +40,10 @@ def lambda_handler(event, context):
         # Get API key from Parameter Store
         api_key = get_api_key_from_parameter_store(aws_region)
         
+        # Only ask for threshold crossings since the previous run
+        since_token = get_since_token(aws_region, token_parameter)
+        params = {'since': since_token} if since_token else {}
+        
         # Add timeout and helpful headers
         headers = {
             'User-Agent': 'ChemTrack-Lambda-Function/1.0',
@@ -44,7 +53,7 @@ def lambda_handler(event, context):
         
         # Print for logging
         print(f"Making HTTP request to: {reorder_api_url}")
-        response = requests.get(reorder_api_url, headers=headers, timeout=30)
+        response = requests.get(reorder_api_url, headers=headers, params=params, timeout=30)
         print(f"Response status code: {response.status_code}")
         
         # Raise exception for non-200 responses
@@ -63,9 +72,11 @@ def lambda_handler(event, context):
             }
         
         users = data.get('users', [])
+        next_token = data.get('next_token')
         
         if not users:
             print("No users need to be notified")
+            save_since_token(aws_region, token_parameter, next_token)
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -77,6 +88,7 @@ def lambda_handler(event, context):
         sns_client = boto3.client('sns', region_name=aws_region)
         
         # Send notifications to each user
+        failed_users = []
         for user in users:
             username = user.get('username')
             email = user.get('email')
@@ -120,6 +132,21 @@ def lambda_handler(event, context):
                 print(f"Notification sent to {email} (user: {username}), SNS message ID: {response.get('MessageId')}")
             except Exception as e:
                 print(f"Error sending notification to {email} (user: {username}): {str(e)}")
+                failed_users.append(username)
+        
+        if failed_users:
+            # Keep the previous token so the next run reports these crossings again
+            print(f"Not advancing the reorder token, notifications failed for: {', '.join(failed_users)}")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': f'Processed notifications for {len(users)} users, {len(failed_users)} failed',
+                    'failed_users': failed_users
+                })
+            }
+        
+        # The next run starts after the crossings reported in this one
+        save_since_token(aws_region, token_parameter, next_token)
         
         return {
             'statusCode': 200,
@@ -153,3 +180,26 @@ def get_api_key_from_parameter_store(region):
     except ClientError as e:
         print(f"Error retrieving API key from Parameter Store: {e}")
         raise ValueError(f"Failed to retrieve API key: {str(e)}")
+
+def get_since_token(region, parameter_name):
+    """Fetch the watermark of the previous run from Parameter Store (None on the first run)"""
+    try:
+        ssm_client = boto3.client('ssm', region_name=region)
+        response = ssm_client.get_parameter(Name=parameter_name)
+        token = response.get('Parameter', {}).get('Value')
+        print(f"Notifying about reorder crossings since token {token}")
+        return token
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ParameterNotFound':
+            print("No previous run recorded, notifying about all chemicals below reorder level")
+            return None
+        print(f"Error retrieving reorder token from Parameter Store: {e}")
+        raise
+
+def save_since_token(region, parameter_name, token):
+    """Store the watermark for the next run in Parameter Store"""
+    if not token:
+        return
+    ssm_client = boto3.client('ssm', region_name=region)
+    ssm_client.put_parameter(Name=parameter_name, Value=token, Type='String', Overwrite=True)
+    print(f"Saved reorder token {token}")
@@ -3,8 +3,7 @@ import time
 import logging
 import json
 from flask import Flask, render_template, request, redirect, session, jsonify, Response
-import requests
-from api_client import get, post
+from api_client import get, post, get_fragment
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -60,7 +59,7 @@ def get_shared_header(username, user_account_enabled=True):
             'user_account_enabled': str(user_account_enabled).lower()
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
+        response = get_fragment(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
         if response.status_code == 200:
             header_html = response.text
             return header_html
@@ -103,7 +102,7 @@ def get_shared_navigation(role, active_page):
             'search_url': PRC_SEARCH + "/search"
         }
         
-        response = requests.get(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
+        response = get_fragment(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
         if response.status_code == 200:
             nav_html = response.text
             return nav_html
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResultStore:
+    """
+    Base class for server-side storage of search result sets
+
+    Result sets are kept under an ID held in the user's session cookie, so the cookie stays
+    small however many results a search returns. Sets expire TTL seconds after they were
+    last read or written, and sets larger than max_entry_bytes are not stored.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl: float, max_entry_bytes: int):
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+
+    def get(self, result_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the result set stored under result_id, or None if it is missing or expired"""
+        raise NotImplementedError
+
+    def put(self, result_id: str, results: List[Dict[str, Any]]) -> bool:
+        """Store a result set under result_id, returning False if it is too large to keep"""
+        raise NotImplementedError
+
+    def delete(self, result_id: str):
+        """Remove the result set stored under result_id"""
+        raise NotImplementedError
+
+    def _encode(self, results):
+        data = json.dumps(results, separators=(",", ":")).encode()
+        if len(data) > self.max_entry_bytes:
+            logger.warning(f"Search result set of {len(data)} bytes exceeds the {self.max_entry_bytes} byte limit, not stored")
+            return None
+        return data
+
+class SqliteResultStore(ResultStore):
+    """
+    Result sets in a local SQLite file shared by the worker processes of one container
+
+    Besides the TTL, the file is capped at max_total_bytes of result data; the least
+    recently used sets are evicted when a write goes over it.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: float, max_entry_bytes: int, max_total_bytes: int):
+        super().__init__(ttl, max_entry_bytes)
+        self.path = path
+        self.max_total_bytes = max_total_bytes
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS search_results (
+                        id TEXT PRIMARY KEY,
+                        data BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS search_results_expires_at ON search_results (expires_at)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # A connection per call keeps the store safe across threads and forked workers
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, result_id):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT data FROM search_results WHERE id = ? AND expires_at > ?", (result_id, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE search_results SET expires_at = ?, accessed_at = ? WHERE id = ?",
+                    (now + self.ttl, now, result_id)
+                )
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, result_id, results):
+        data = self._encode(results)
+        if data is None:
+            self.delete(result_id)
+            return False
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO search_results (id, data, size, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE
+                    SET data = excluded.data, size = excluded.size,
+                        expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+                """, (result_id, data, len(data), now + self.ttl, now))
+                conn.execute("DELETE FROM search_results WHERE expires_at <= ?", (now,))
+                # Least recently used sets beyond the size limit
+                conn.execute("""
+                    DELETE FROM search_results WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, SUM(size) OVER (ORDER BY accessed_at DESC, id) AS running_size
+                            FROM search_results
+                        )
+                        WHERE running_size > ?
+                    )
+                """, (self.max_total_bytes,))
+            return True
+        finally:
+            conn.close()
+
+    def delete(self, result_id):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM search_results WHERE id = ?", (result_id,))
+        finally:
+            conn.close()
+
+class RedisResultStore(ResultStore):
+    """
+    Result sets in Redis, shared by every search container
+
+    Expiry uses Redis key TTLs; the total size is bounded by the server's maxmemory policy.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, max_entry_bytes: int, key_prefix: str = "chemtrack:search_results:"):
+        super().__init__(ttl, max_entry_bytes)
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._key_prefix = key_prefix
+
+    def get(self, result_id):
+        data = self._client.getex(self._key_prefix + result_id, ex=int(self.ttl))
+        return json.loads(data) if data is not None else None
+
+    def put(self, result_id, results):
+        data = self._encode(results)
+        if data is None:
+            self.delete(result_id)
+            return False
+        self._client.set(self._key_prefix + result_id, data, ex=int(self.ttl))
+        return True
+
+    def delete(self, result_id):
+        self._client.delete(self._key_prefix + result_id)
+
+def create_result_store() -> ResultStore:
+    """
+    Build the store selected by SEARCH_RESULT_STORE (sqlite or redis)
+
+    SEARCH_RESULT_TTL (seconds, default 3600) and SEARCH_RESULT_MAX_BYTES (per result set,
+    default 5 MB) apply to both. The SQLite store keeps its file at SEARCH_RESULT_STORE_PATH
+    and holds at most SEARCH_RESULT_STORE_MAX_BYTES (default 256 MB); the Redis store
+    connects to REDIS_URL.
+    """
+    kind = os.environ.get('SEARCH_RESULT_STORE', 'sqlite').lower()
+    ttl = float(os.environ.get('SEARCH_RESULT_TTL', '3600'))
+    max_entry_bytes = int(os.environ.get('SEARCH_RESULT_MAX_BYTES', str(5 * 1024 * 1024)))
+
+    if kind == 'sqlite':
+        return SqliteResultStore(
+            os.environ.get('SEARCH_RESULT_STORE_PATH', '/tmp/chemtrack-search-results.sqlite3'),
+            ttl,
+            max_entry_bytes,
+            int(os.environ.get('SEARCH_RESULT_STORE_MAX_BYTES', str(256 * 1024 * 1024)))
+        )
+    if kind == 'redis':
+        url = os.environ.get('REDIS_URL')
+        if not url:
+            raise ValueError("REDIS_URL must be set for the redis search result store")
+        return RedisResultStore(url, ttl, max_entry_bytes)
+    raise ValueError(f"Unknown SEARCH_RESULT_STORE: {kind}")
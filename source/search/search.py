@@ -1,9 +1,11 @@
 import os
 import time
+import secrets
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, Response
 import requests
 import logging
 import api_client
+from result_store import create_result_store
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -37,6 +39,46 @@ logger.info(f'Login URL: {PRC_LOGIN}')
 logger.info(f'Main URL: {PRC_MAIN}')
 
 
+# Search results are fetched a page at a time, sorted by the backend
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '100'))
+SORT_COLUMNS = ('name', 'uom', 'qty', 'reorder_qty', 'bld_name', 'lab_room', 'locker',
+                'cas_number', 'chemical_formula', 'signal_word', 'physical_state')
+
+# Search results are kept server-side; the session cookie only holds their ID
+result_store = create_result_store()
+logger.info(f'Search result store: {result_store.name}')
+
+def load_search_results():
+    """Return the user's last search results from the result store, or None if there are none"""
+    result_id = session.get('search_results_id')
+    if not result_id:
+        return None
+    try:
+        return result_store.get(result_id)
+    except Exception as e:
+        logger.error(f"Error loading search results: {str(e)}")
+        return None
+
+def save_search_results(search_results):
+    """Store the user's search results, keeping only their ID in the session cookie"""
+    result_id = session.get('search_results_id') or secrets.token_urlsafe(16)
+    try:
+        if result_store.put(result_id, search_results):
+            session['search_results_id'] = result_id
+        else:
+            session.pop('search_results_id', None)
+    except Exception as e:
+        logger.error(f"Error saving search results: {str(e)}")
+
+def update_search_result_quantity(inventory_id, new_quantity):
+    """Update the quantity of an inventory item in the user's stored search results"""
+    search_results = load_search_results()
+    if search_results:
+        for item in search_results:
+            if item['id'] == inventory_id:
+                item['quantity'] = float(new_quantity)
+        save_search_results(search_results)
+
 # Middleware to track request metrics
 @app.before_request
 def before_request():
@@ -47,38 +89,77 @@ def after_request(response):
     request_latency = time.time() - request.start_time   
     return response
 
-def get_buildings():
-    """Get list of buildings from backend API"""
+def get_location_tree():
+    """
+    Get the building -> lab room -> locker hierarchy from the backend API in one request
+    
+    Returns:
+        dict: {building_name: {lab_room_number (str): [locker_number, ...]}}, empty on error
+    """
     try:
-        buildings_endpoint = f"{PRC_BACKEND}/backend/buildings"
-        response = api_client.get(buildings_endpoint, timeout=8)
+        location_tree_endpoint = f"{PRC_BACKEND}/backend/location_tree"
+        response = api_client.get_cached(location_tree_endpoint, timeout=8)
         
         if response.status_code == 200:
             result = response.json()
             if result.get('success'):
-                return result.get('buildings', [])
-        return []
+                return result.get('buildings', {})
+        return {}
     except Exception as e:
         logger.error(str(e))
-        return []
+        return {}
 
-def get_lab_rooms(building_name):
-    """Get list of lab rooms for a specific building from backend API"""
+def get_buildings(location_tree=None):
+    """Get list of buildings from the location tree"""
+    if location_tree is None:
+        location_tree = get_location_tree()
+    return list(location_tree)
+
+def get_lab_rooms(building_name, location_tree=None):
+    """Get list of lab rooms for a specific building from the location tree"""
     if not building_name:
         return []
-        
+    if location_tree is None:
+        location_tree = get_location_tree()
+    return [int(room) for room in location_tree.get(building_name, {})]
+
+def get_chemicals(chemical_ids):
+    """Get details for many inventory items in one backend request, as a dict keyed by ID"""
+    if not chemical_ids:
+        return {}
+    
     try:
-        lab_rooms_endpoint = f"{PRC_BACKEND}/backend/lab_rooms/{building_name}"
-        response = api_client.get(lab_rooms_endpoint, timeout=8)
+        chemicals_endpoint = f"{PRC_BACKEND}/backend/chemicals"
+        response = api_client.post(chemicals_endpoint, json={"ids": list(chemical_ids)}, timeout=8)
         
         if response.status_code == 200:
             result = response.json()
-            if result.get('success'):
-                return result.get('lab_rooms', [])
-        return []
+            if result.get('missing_ids'):
+                logger.warning(f"Chemicals not found: {result.get('missing_ids')}")
+            return {chemical['id']: chemical for chemical in result.get('chemicals', [])}
+        logger.error(f"Backend API error: {response.status_code} - {response.text}")
+        return {}
     except Exception as e:
-        logger.error(str(e))
-        return []
+        logger.error(f"Error getting chemical details: {str(e)}")
+        return {}
+
+def get_chemical(chemical_id):
+    """Get details for one inventory item, or None if it cannot be found"""
+    return get_chemicals([chemical_id]).get(chemical_id)
+
+def error_header_html(username):
+    """Header shown when the shared-templates service cannot be reached"""
+    return f"""
+    <header class="header">
+        <div class="header-left">
+            <h1 class="header-title">ChemTrack Search (Error Header)</h1>
+        </div>
+        <div class="header-user">
+            <span class="header-user-name">{username}</span>
+            <a href="/logout" class="logout-btn">Logout</a>
+        </div>
+    </header>
+    """
 
 def get_shared_header(username, user_account_enabled=False):
     """Get the shared header from the shared-templates service"""
@@ -89,7 +170,7 @@ def get_shared_header(username, user_account_enabled=False):
             'user_account_enabled': str(user_account_enabled).lower()
         }
         #logger.debug(f"[SEARCH] Fetching header from: {PRC_SHARED}/shared-templates/header with params: {params}")
-        response = requests.get(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/header", params=params, timeout=5)
         if response.status_code == 200:
             header_html = response.text
             logger.debug(f"[SEARCH] Successfully fetched header HTML")
@@ -110,18 +191,28 @@ def get_shared_header(username, user_account_enabled=False):
             """
     except Exception as e:
         logger.error(f"[SEARCH] Exception fetching shared header: {str(e)}")
-        # Fallback header for debugging
-        return f"""
-        <header class="header">
-            <div class="header-left">
-                <h1 class="header-title">ChemTrack Search (Error Header)</h1>
-            </div>
-            <div class="header-user">
-                <span class="header-user-name">{username}</span>
-                <a href="/logout" class="logout-btn">Logout</a>
-            </div>
-        </header>
-        """
+        return error_header_html(username)
+
+def error_navigation_html():
+    """Navigation shown when the shared-templates service cannot be reached"""
+    return """
+    <nav class="nav-sidebar">
+        <ul class="nav-list">
+            <li class="nav-item">
+                <a href="/" class="nav-link">
+                    <span class="nav-icon">🏠</span>
+                    Home (Error)
+                </a>
+            </li>
+            <li class="nav-item">
+                <a href="/search" class="nav-link active">
+                    <span class="nav-icon">🔍</span>
+                    Search (Error)
+                </a>
+            </li>
+        </ul>
+    </nav>
+    """
 
 def get_shared_navigation(role, active_page):
     """Get the shared navigation from the shared-templates service"""
@@ -133,7 +224,7 @@ def get_shared_navigation(role, active_page):
             'recipes_url': PRC_RECIPES
         }
         #logger.debug(f"[SEARCH] Fetching navigation from: {PRC_SHARED}/shared-templates/navigation with params: {params}")
-        response = requests.get(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
+        response = api_client.get_fragment(f"{PRC_SHARED}/shared-templates/navigation", params=params, timeout=5)
         if response.status_code == 200:
             nav_html = response.text
             logger.debug(f"[SEARCH] Successfully fetched navigation HTML")
@@ -161,25 +252,7 @@ def get_shared_navigation(role, active_page):
             """
     except Exception as e:
         logger.error(f"[SEARCH] Exception fetching shared navigation: {str(e)}")
-        # Fallback navigation for debugging
-        return """
-        <nav class="nav-sidebar">
-            <ul class="nav-list">
-                <li class="nav-item">
-                    <a href="/" class="nav-link">
-                        <span class="nav-icon">🏠</span>
-                        Home (Error)
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="/search" class="nav-link active">
-                        <span class="nav-icon">🔍</span>
-                        Search (Error)
-                    </a>
-                </li>
-            </ul>
-        </nav>
-        """
+        return error_navigation_html()
 
 # Log registered routes
 logger.info("Registered routes:")
@@ -208,34 +281,24 @@ def chemical_details(chemical_id):
     
     # Get chemical details from backend
     try:
-        chemical_endpoint = f"{PRC_BACKEND}/backend/chemical/{chemical_id}"
-        response = api_client.get(chemical_endpoint, timeout=8)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                chemical = result.get('chemical', {})
-                
-                # Get shared header and navigation
-                username = session.get('user', '')
-                role = session.get('role', '')
-                header_html = get_shared_header(username, True)
-                navigation_html = get_shared_navigation(role, 'search')
-                
-                return render_template('chemical_details.html',
-                                      username=username,
-                                      role=role,
-                                      static_url=PRC_STATIC + '/static',
-                                      chemical=chemical,
-                                      scroll_position=scroll_position,
-                                      header_html=header_html,
-                                      navigation_html=navigation_html,
-                                      show_inventory_form=False)
-            else:
-                logger.error(f"Failed to get chemical details: {result.get('message')}")
-                return redirect('/search')
+        chemical = get_chemical(chemical_id)
+        if chemical:
+            # Get shared header and navigation
+            username = session.get('user', '')
+            role = session.get('role', '')
+            header_html = get_shared_header(username, True)
+            navigation_html = get_shared_navigation(role, 'search')
+            
+            return render_template('chemical_details.html',
+                                  username=username,
+                                  role=role,
+                                  static_url=PRC_STATIC + '/static',
+                                  chemical=chemical,
+                                  scroll_position=scroll_position,
+                                  header_html=header_html,
+                                  navigation_html=navigation_html,
+                                  show_inventory_form=False)
         else:
-            logger.error(f"Backend API error: {response.status_code} - {response.text}")
             return redirect('/search')
     except Exception as e:
         logger.error(f"Error getting chemical details: {str(e)}")
@@ -252,39 +315,28 @@ def receive_material(chemical_id):
     scroll_position = request.form.get('scroll_position', '0')
     
     try:
-        # Get chemical details from backend
-        chemical_endpoint = f"{PRC_BACKEND}/backend/chemical/{chemical_id}"
-        response = api_client.get(chemical_endpoint, timeout=8)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                chemical = result.get('chemical', {})
-                
-                # Get shared header and navigation
-                username = session.get('user', '')
-                role = session.get('role', '')
-                header_html = get_shared_header(username, True)
-                navigation_html = get_shared_navigation(role, 'search')
-                
-                return render_template('chemical_details.html',
-                                      username=username,
-                                      role=role,
-                                      static_url=PRC_STATIC + '/static',
-                                      chemical=chemical,
-                                      scroll_position=scroll_position,
-                                      header_html=header_html,
-                                      navigation_html=navigation_html,
-                                      show_inventory_form=True,
-                                      action_title="Receive Material",
-                                      action="add",
-                                      action_button="Add",
-                                      error=None)
-            else:
-                logger.error(f"Failed to get chemical details: {result.get('message')}")
-                return redirect('/search')
+        chemical = get_chemical(chemical_id)
+        if chemical:
+            # Get shared header and navigation
+            username = session.get('user', '')
+            role = session.get('role', '')
+            header_html = get_shared_header(username, True)
+            navigation_html = get_shared_navigation(role, 'search')
+            
+            return render_template('chemical_details.html',
+                                  username=username,
+                                  role=role,
+                                  static_url=PRC_STATIC + '/static',
+                                  chemical=chemical,
+                                  scroll_position=scroll_position,
+                                  header_html=header_html,
+                                  navigation_html=navigation_html,
+                                  show_inventory_form=True,
+                                  action_title="Receive Material",
+                                  action="add",
+                                  action_button="Add",
+                                  error=None)
         else:
-            logger.error(f"Backend API error: {response.status_code} - {response.text}")
             return redirect('/search')
     except Exception as e:
         logger.error(f"Error getting chemical details: {str(e)}")
@@ -301,39 +353,28 @@ def checkout_material(chemical_id):
     scroll_position = request.form.get('scroll_position', '0')
     
     try:
-        # Get chemical details from backend
-        chemical_endpoint = f"{PRC_BACKEND}/backend/chemical/{chemical_id}"
-        response = api_client.get(chemical_endpoint, timeout=8)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                chemical = result.get('chemical', {})
-                
-                # Get shared header and navigation
-                username = session.get('user', '')
-                role = session.get('role', '')
-                header_html = get_shared_header(username, True)
-                navigation_html = get_shared_navigation(role, 'search')
-                
-                return render_template('chemical_details.html',
-                                      username=username,
-                                      role=role,
-                                      static_url=PRC_STATIC + '/static',
-                                      chemical=chemical,
-                                      scroll_position=scroll_position,
-                                      header_html=header_html,
-                                      navigation_html=navigation_html,
-                                      show_inventory_form=True,
-                                      action_title="Check Out Material",
-                                      action="remove",
-                                      action_button="Remove",
-                                      error=None)
-            else:
-                logger.error(f"Failed to get chemical details: {result.get('message')}")
-                return redirect('/search')
+        chemical = get_chemical(chemical_id)
+        if chemical:
+            # Get shared header and navigation
+            username = session.get('user', '')
+            role = session.get('role', '')
+            header_html = get_shared_header(username, True)
+            navigation_html = get_shared_navigation(role, 'search')
+            
+            return render_template('chemical_details.html',
+                                  username=username,
+                                  role=role,
+                                  static_url=PRC_STATIC + '/static',
+                                  chemical=chemical,
+                                  scroll_position=scroll_position,
+                                  header_html=header_html,
+                                  navigation_html=navigation_html,
+                                  show_inventory_form=True,
+                                  action_title="Check Out Material",
+                                  action="remove",
+                                  action_button="Remove",
+                                  error=None)
         else:
-            logger.error(f"Backend API error: {response.status_code} - {response.text}")
             return redirect('/search')
     except Exception as e:
         logger.error(f"Error getting chemical details: {str(e)}")
@@ -377,13 +418,8 @@ def update_chemical_inventory(chemical_id):
         if response.status_code == 200:
             result = response.json()
             if result.get('success'):
-                # Update the inventory quantity in session cache if available
-                if 'search_results' in session:
-                    search_results = session.get('search_results', [])
-                    for item in search_results:
-                        if item['id'] == chemical_id:
-                            item['quantity'] = float(result.get('new_quantity', 0))
-                    session['search_results'] = search_results
+                # Update the inventory quantity in the stored search results if available
+                update_search_result_quantity(chemical_id, result.get('new_quantity', 0))
                 
                 # Redirect to the chemical details page with a success message
                 return redirect(f"/search/chemical/{chemical_id}?scroll_position={scroll_position}")
@@ -407,49 +443,68 @@ def update_chemical_inventory(chemical_id):
 def render_error(chemical_id, error_message, scroll_position):
     """Helper function to render chemical details with error message"""
     try:
-        # Get chemical details from backend
-        chemical_endpoint = f"{PRC_BACKEND}/backend/chemical/{chemical_id}"
-        response = api_client.get(chemical_endpoint, timeout=8)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                chemical = result.get('chemical', {})
-                
-                # Get shared header and navigation
-                username = session.get('user', '')
-                role = session.get('role', '')
-                header_html = get_shared_header(username, True)
-                navigation_html = get_shared_navigation(role, 'search')
-                
-                # Determine which form we were processing based on the action
-                action = request.form.get('action', '')
-                if action == 'add':
-                    action_title = "Receive Material"
-                    action_button = "Add"
-                else:
-                    action_title = "Check Out Material"
-                    action_button = "Remove"
-                
-                return render_template('chemical_details.html',
-                                      username=username,
-                                      role=role,
-                                      static_url=PRC_STATIC + '/static',
-                                      chemical=chemical,
-                                      scroll_position=scroll_position,
-                                      header_html=header_html,
-                                      navigation_html=navigation_html,
-                                      show_inventory_form=True,
-                                      action_title=action_title,
-                                      action=action,
-                                      action_button=action_button,
-                                      error=error_message)
+        chemical = get_chemical(chemical_id)
+        if chemical:
+            # Get shared header and navigation
+            username = session.get('user', '')
+            role = session.get('role', '')
+            header_html = get_shared_header(username, True)
+            navigation_html = get_shared_navigation(role, 'search')
+            
+            # Determine which form we were processing based on the action
+            action = request.form.get('action', '')
+            if action == 'add':
+                action_title = "Receive Material"
+                action_button = "Add"
+            else:
+                action_title = "Check Out Material"
+                action_button = "Remove"
+            
+            return render_template('chemical_details.html',
+                                  username=username,
+                                  role=role,
+                                  static_url=PRC_STATIC + '/static',
+                                  chemical=chemical,
+                                  scroll_position=scroll_position,
+                                  header_html=header_html,
+                                  navigation_html=navigation_html,
+                                  show_inventory_form=True,
+                                  action_title=action_title,
+                                  action=action,
+                                  action_button=action_button,
+                                  error=error_message)
     except Exception as e:
         logger.error(f"Error rendering error page: {str(e)}")
     
     # If everything else fails, redirect to search
     return redirect('/search')
 
+def run_search(search_data):
+    """
+    Search inventory through the backend API
+    
+    Returns:
+        tuple: (search_results, next_cursor or None, error message or None)
+    """
+    try:
+        search_endpoint = f"{PRC_BACKEND}/backend/chemsearch"
+        logger.debug(f"Connecting to backend API at: {search_endpoint}")
+        logger.debug(f"Search data: {search_data}")
+        
+        # Call the backend API with API key
+        response = api_client.post(search_endpoint, json=search_data, timeout=8)
+        
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('success'):
+                return decode_search_results(result), result.get('next_cursor'), None
+            return [], None, result.get('message', 'Search failed')
+        logger.error(f"Backend API error: {response.text}")
+        return [], None, f"Search service unavailable (Status code: {response.status_code})"
+    except Exception as e:
+        logger.error(f"Connection error: {str(e)}")
+        return [], None, "Could not connect to search service"
+
 @app.route('/search', methods=['GET', 'POST'])
 def search():
     # Check if user has a valid session
@@ -459,8 +514,16 @@ def search():
     # Initialize variables
     search_results = []
     error = None
-    sort_column = request.args.get('sort', 'name')  # Default sort by name
-    sort_direction = request.args.get('direction', 'asc')  # Default ascending
+    # Column clicks re-run the search sorted by the backend; otherwise keep the last sort
+    sort_column = request.args.get('sort', session.get('search_sort', 'name'))
+    if sort_column not in SORT_COLUMNS:
+        sort_column = 'name'
+    sort_direction = request.args.get('direction', session.get('search_direction', 'asc'))
+    if sort_direction not in ('asc', 'desc'):
+        sort_direction = 'asc'
+    cursor = request.args.get('cursor')
+    next_cursor = session.get('search_next_cursor')
+    page_number = session.get('search_page', 1)
     scroll_position = request.form.get('scroll_position', request.args.get('scroll_position', '0'))
     
     # Initialize filter values from session or user preferences
@@ -479,83 +542,95 @@ def search():
     
     locker = session.get('filter_locker', '')
     
-    # Get building list for dropdown
-    buildings = get_buildings()
+    username = session.get('user', '')
+    role = session.get('role', '')
     
-    # Get lab rooms for selected building
-    lab_rooms = get_lab_rooms(building_name) if building_name else []
+    # Independent page dependencies, fetched concurrently
+    calls = {
+        'location_tree': (get_location_tree, (), {}),
+        'header_html': (get_shared_header, (username, True), error_header_html(username)),
+        'navigation_html': (get_shared_navigation, (role, 'search'), error_navigation_html()),
+    }
     
     # Process search form submission
     if request.method == 'POST':
-        try:
-            # Get search parameters from form
-            chemical_name = request.form.get('chemical_name', '')
-            building_name = request.form.get('building_name', '')
-            lab_room = request.form.get('lab_room', '')
-            locker = request.form.get('locker', '')
-            hazard_classification = request.form.get('hazard_classification', '')
-            
-            # Store filter values in session
-            session['filter_chemical_name'] = chemical_name
-            session['filter_building_name'] = building_name
-            session['filter_lab_room'] = lab_room
-            session['filter_locker'] = locker
-            session['filter_hazard_classification'] = hazard_classification
-            
-            # Convert numeric fields if provided
-            lab_room_number = int(lab_room) if lab_room and lab_room.isdigit() else None
-            locker_number = int(locker) if locker and locker.isdigit() else None
-            
-            # Prepare search request
-            search_endpoint = f"{PRC_BACKEND}/backend/chemsearch"
-            search_data = {
-                "name": chemical_name if chemical_name else None,
-                "building_name": building_name if building_name else None,
-                "lab_room_number": lab_room_number,
-                "locker_number": locker_number,
-                "hazard_classification": hazard_classification if hazard_classification else None
-            }
-            
-            # Remove None values for cleaner request
-            search_data = {k: v for k, v in search_data.items() if v is not None}
-            
-            logger.debug(f"Connecting to backend API at: {search_endpoint}")
-            logger.debug(f"Search data: {search_data}")
-            
-            # Call the backend API with API key
-            response = api_client.post(search_endpoint, json=search_data, timeout=8)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    search_results = result.get('results', [])
-                    # Store search results in session for later sorting
-                    session['search_results'] = search_results
-                else:
-                    error = result.get('message', 'Search failed')
-            else:
-                error = f"Search service unavailable (Status code: {response.status_code})"
-                logger.error(f"Backend API error: {response.text}")
-                
-        except Exception as e:
-            error = "Could not connect to search service"
-            logger.error(f"Connection error: {str(e)}")
+        # Get search parameters from form
+        chemical_name = request.form.get('chemical_name', '')
+        building_name = request.form.get('building_name', '')
+        lab_room = request.form.get('lab_room', '')
+        locker = request.form.get('locker', '')
+        hazard_classification = request.form.get('hazard_classification', '')
+        
+        # Store filter values in session
+        session['filter_chemical_name'] = chemical_name
+        session['filter_building_name'] = building_name
+        session['filter_lab_room'] = lab_room
+        session['filter_locker'] = locker
+        session['filter_hazard_classification'] = hazard_classification
+        
+        # Convert numeric fields if provided
+        lab_room_number = int(lab_room) if lab_room and lab_room.isdigit() else None
+        locker_number = int(locker) if locker and locker.isdigit() else None
+        
+        # Prepare search request
+        search_criteria = {
+            "name": chemical_name if chemical_name else None,
+            "building_name": building_name if building_name else None,
+            "lab_room_number": lab_room_number,
+            "locker_number": locker_number,
+            "hazard_classification": hazard_classification if hazard_classification else None
+        }
+        
+        # Remove None values for cleaner request
+        search_criteria = {k: v for k, v in search_criteria.items() if v is not None}
+        session['search_criteria'] = search_criteria
+        cursor = None
+    
+    # A new search, a column click or a page link fetches one sorted page from the backend
+    search_criteria = session.get('search_criteria')
+    fetch_page = request.method == 'POST' or (
+        search_criteria is not None and ('sort' in request.args or cursor)
+    )
+    if fetch_page:
+        search_data = {
+            **search_criteria,
+            "limit": SEARCH_PAGE_SIZE,
+            "sort": sort_column,
+            "direction": sort_direction,
+            # Ask for the compact columnar response; decode_search_results expands it
+            "format": "columnar"
+        }
+        if cursor:
+            search_data["cursor"] = cursor
+        
+        calls['search'] = (run_search, (search_data,), ([], None, "Could not connect to search service"))
     
-    # For GET requests with sort parameters, retrieve results from session and apply local sorting
-    elif request.method == 'GET' and 'search_results' in session:
-        search_results = session.get('search_results', [])
-        if search_results and (sort_column or sort_direction):
-            search_results = sort_results(search_results, sort_column, sort_direction)
+    page = api_client.fan_out(calls)
+    header_html = page['header_html']
+    navigation_html = page['navigation_html']
+    logger.debug(f"[DEBUG] Header HTML length: {len(header_html)}, navigation HTML length: {len(navigation_html)}")
     
-    # Get shared header and navigation
-    username = session.get('user', '')
-    role = session.get('role', '')
-    logger.debug(f"[DEBUG] Fetching header for username: {username}")
-    header_html = get_shared_header(username, True)
-    logger.debug(f"[DEBUG] Header HTML length: {len(header_html)}")
-    logger.debug(f"[DEBUG] Fetching navigation for role: {role}, active_page: search")
-    navigation_html = get_shared_navigation(role, 'search')
-    logger.debug(f"[DEBUG] Navigation HTML length: {len(navigation_html)}")
+    # Get building and lab room lists for the dropdowns (the page filters lab rooms client-side)
+    location_tree = page['location_tree']
+    buildings = get_buildings(location_tree)
+    
+    # Get lab rooms for selected building
+    lab_rooms = get_lab_rooms(building_name, location_tree) if building_name else []
+    
+    if fetch_page:
+        search_results, next_cursor, error = page['search']
+        if not error:
+            # Keep the page for returning from chemical details without searching again
+            save_search_results(search_results)
+            page_number = request.args.get('page', 2, type=int) if cursor else 1
+            session['search_sort'] = sort_column
+            session['search_direction'] = sort_direction
+            session['search_next_cursor'] = next_cursor
+            session['search_page'] = page_number
+    
+    # Plain GETs show the stored page as it was last fetched
+    elif 'search_results_id' in session:
+        search_results = load_search_results() or []
     
     # Render the search page with results (if any)
     # Convert search results to JSON for the client-side
@@ -571,6 +646,8 @@ def search():
                           error=error,
                           sort_column=sort_column,
                           sort_direction=sort_direction,
+                          next_cursor=next_cursor,
+                          page_number=page_number,
                           chemical_name=chemical_name,
                           building_name=building_name,
                           lab_room=lab_room,
@@ -578,33 +655,16 @@ def search():
                           hazard_classification=hazard_classification,
                           buildings=buildings,
                           lab_rooms=lab_rooms,
+                          location_tree=location_tree,
                           header_html=header_html,
                           navigation_html=navigation_html)
 
-def sort_results(results, column, direction):
-    """Sort search results by the specified column and direction"""
-    reverse = direction.lower() == 'desc'
-    
-    # Map column names to their keys in the results
-    column_map = {
-        'name': 'name',
-        'uom': 'unit_of_measure',
-        'qty': 'quantity',
-        'reorder_qty': 'reorder_quantity',
-        'bld_name': 'building_name',
-        'lab_room': 'lab_room_number',
-        'locker': 'locker_number',
-        'cas_number': 'cas_number',
-        'chemical_formula': 'chemical_formula',
-        'signal_word': 'signal_word',
-        'physical_state': 'physical_state'
-    }
-    
-    # Get the actual key to sort by
-    sort_key = column_map.get(column, 'name')
-    
-    # Sort the results
-    return sorted(results, key=lambda x: x.get(sort_key, ''), reverse=reverse)
+def decode_search_results(result):
+    """Return search results as a list of dicts from a columnar or row-format chemsearch response"""
+    if 'columns' in result and result.get('rows') is not None:
+        columns = result['columns']
+        return [dict(zip(columns, row)) for row in result['rows']]
+    return result.get('results', [])
 
 @app.route('/search/get_lab_rooms')
 def get_lab_rooms_ajax():
@@ -694,14 +754,9 @@ def update_inventory():
                 result = response.json()
                 logger.info(f"Inventory update response: {result}")
                 
-                # If successful, update the inventory quantity in session cache
-                if result.get('success') and 'search_results' in session:
-                    search_results = session.get('search_results', [])
-                    for item in search_results:
-                        if item['id'] == inventory_id:
-                            item['quantity'] = float(result.get('new_quantity', 0))
-                    
-                    session['search_results'] = search_results
+                # If successful, update the inventory quantity in the stored search results
+                if result.get('success'):
+                    update_search_result_quantity(inventory_id, result.get('new_quantity', 0))
                     
                 return jsonify(result)
             else:
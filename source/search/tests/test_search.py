@@ -2,17 +2,20 @@ import os
 import sys
 import json
 import pytest
+import tempfile
 from unittest.mock import patch, MagicMock, Mock
 from flask import session, url_for
 
 # Set necessary environment variables before importing search
 os.environ['BASE_URL'] = 'http://localhost'
 os.environ['SECRET_KEY'] = 'test_secret_key'
+os.environ['SEARCH_RESULT_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'search-results.sqlite3')
 
 # Add the parent directory to sys.path to import search.py
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import search after setting environment variables
 import search
+import api_client
 
 @pytest.fixture
 def client():
@@ -37,16 +40,20 @@ def mock_session_user():
 
 @pytest.fixture
 def mock_requests_get():
-    """Mock requests.get for shared components"""
-    with patch('requests.get') as mock_get:
+    """Mock the pooled session's GET for shared components"""
+    # Start each test without cached fragments
+    api_client._fragment_cache.clear()
+    with patch('requests.Session.get') as mock_get:
         # Setup mock response for header
         mock_header_response = Mock()
         mock_header_response.status_code = 200
+        mock_header_response.headers = {"ETag": '"header-v1"', "X-Templates-Version": "v1"}
         mock_header_response.text = "<header>Test Header</header>"
         
         # Setup mock response for navigation
         mock_nav_response = Mock()
         mock_nav_response.status_code = 200
+        mock_nav_response.headers = {"ETag": '"nav-v1"', "X-Templates-Version": "v1"}
         mock_nav_response.text = "<nav>Test Navigation</nav>"
         
         # Configure the mock to return different responses based on URL
@@ -58,6 +65,7 @@ def mock_requests_get():
             else:
                 mock_default = Mock()
                 mock_default.status_code = 404
+                mock_default.headers = {}
                 return mock_default
                 
         mock_get.side_effect = mock_get_response
@@ -66,6 +74,8 @@ def mock_requests_get():
 @pytest.fixture
 def mock_api_client():
     """Mock the api_client module"""
+    # Start each test without responses stored for conditional GETs
+    api_client._conditional_cache.clear()
     with patch('api_client.post') as mock_post, \
          patch('api_client.get') as mock_get:
         
@@ -119,6 +129,21 @@ def mock_search_results():
         }
     ]
 
+@pytest.fixture
+def mock_location_tree():
+    """Mock location tree response"""
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"ETag": '"tree-v1"'}
+    response.json.return_value = {
+        "success": True,
+        "buildings": {
+            "Building 101": {"201": [1, 2], "202": [3], "203": [4]},
+            "Building 102": {"101": [1]}
+        }
+    }
+    return response
+
 @pytest.fixture
 def mock_chemical_details():
     """Mock chemical details data"""
@@ -151,7 +176,7 @@ def test_index_unauthenticated(client):
     if hasattr(response, 'location'):
         assert '/login' in response.location or 'login' in response.location
 
-def test_search_authenticated_get(client, mock_session_user, mock_requests_get, mock_api_client):
+def test_search_authenticated_get(client, mock_session_user, mock_requests_get, mock_api_client, mock_location_tree):
     """Test the search route GET with authenticated user"""
     with client.session_transaction() as sess:
         sess['user'] = 'testuser'
@@ -159,16 +184,8 @@ def test_search_authenticated_get(client, mock_session_user, mock_requests_get,
         sess['pref_building'] = 'Building 101'
         sess['pref_lab_room'] = 'Lab 202'
     
-    # Configure API responses for buildings and lab rooms
-    buildings_response = MagicMock()
-    buildings_response.status_code = 200
-    buildings_response.json.return_value = {"success": True, "buildings": ["Building 101", "Building 102"]}
-    
-    lab_rooms_response = MagicMock()
-    lab_rooms_response.status_code = 200
-    lab_rooms_response.json.return_value = {"success": True, "lab_rooms": [201, 202, 203]}
-    
-    mock_api_client["get"].side_effect = [buildings_response, lab_rooms_response]
+    # Configure API response for the location tree (buildings and lab rooms in one request)
+    mock_api_client["get"].return_value = mock_location_tree
     
     response = client.get('/search')
     assert response.status_code == 200
@@ -176,28 +193,26 @@ def test_search_authenticated_get(client, mock_session_user, mock_requests_get,
     assert b'Search' in response.data
     assert b'Chemical Name' in response.data
     assert b'Building 101' in response.data  # From user preferences
+    assert b'<option value="201"' in response.data  # Lab rooms of the preferred building
+    
+    # The page embeds the tree for client-side lab room filtering
+    assert mock_api_client["get"].call_count == 1
+    assert mock_api_client["get"].call_args[0][0].endswith('/backend/location_tree')
+    assert b'"Building 102": {"101": [1]}' in response.data
 
-def test_search_post(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results):
+def test_search_post(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results, mock_location_tree):
     """Test search form submission"""
     with client.session_transaction() as sess:
         sess['user'] = 'testuser'
         sess['role'] = 'technician'
     
     # Configure API responses
-    buildings_response = MagicMock()
-    buildings_response.status_code = 200
-    buildings_response.json.return_value = {"success": True, "buildings": ["Building 101", "Building 102"]}
-    
-    lab_rooms_response = MagicMock()
-    lab_rooms_response.status_code = 200
-    lab_rooms_response.json.return_value = {"success": True, "lab_rooms": [201, 202, 203]}
-    
     search_response = MagicMock()
     search_response.status_code = 200
     search_response.json.return_value = {"success": True, "results": mock_search_results}
     
-    # First get for buildings, second for lab rooms, post for search
-    mock_api_client["get"].side_effect = [buildings_response, lab_rooms_response]
+    # Get for the location tree, post for search
+    mock_api_client["get"].return_value = mock_location_tree
     mock_api_client["post"].return_value = search_response
     
     # Submit search form
@@ -220,28 +235,101 @@ def test_search_post(client, mock_session_user, mock_requests_get, mock_api_clie
     assert 'Acetone' in str(search_call[1]['json'])
     assert 'Building 101' in str(search_call[1]['json'])
     assert '202' in str(search_call[1]['json'])
+    assert search_call[1]['json']['format'] == 'columnar'
+
+def test_decode_search_results(mock_search_results):
+    """Test that columnar and row-format search responses decode to the same results"""
+    columns = list(mock_search_results[0].keys())
+    columnar = {
+        "success": True,
+        "columns": columns,
+        "rows": [[item[column] for column in columns] for item in mock_search_results]
+    }
+    assert search.decode_search_results(columnar) == mock_search_results
+    assert search.decode_search_results({"success": True, "results": mock_search_results}) == mock_search_results
 
-def test_sort_results(mock_search_results):
-    """Test the sort_results functionality"""
-    # Sort by name ascending
-    sorted_results = search.sort_results(mock_search_results, 'name', 'asc')
-    assert sorted_results[0]['name'] == 'Acetone'
-    assert sorted_results[1]['name'] == 'Ethanol'
+def test_search_post_requests_sorted_page(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results, mock_location_tree):
+    """Test that a search asks the backend for one page in the current sort order"""
+    with client.session_transaction() as sess:
+        sess['user'] = 'testuser'
+        sess['role'] = 'technician'
+    
+    search_response = MagicMock()
+    search_response.status_code = 200
+    search_response.json.return_value = {"success": True, "results": mock_search_results, "next_cursor": "abc123"}
+    mock_api_client["get"].return_value = mock_location_tree
+    mock_api_client["post"].return_value = search_response
     
-    # Sort by name descending
-    sorted_results = search.sort_results(mock_search_results, 'name', 'desc')
-    assert sorted_results[0]['name'] == 'Ethanol'
-    assert sorted_results[1]['name'] == 'Acetone'
+    response = client.post('/search', data={'chemical_name': 'Acetone'})
+    assert response.status_code == 200
     
-    # Sort by quantity ascending
-    sorted_results = search.sort_results(mock_search_results, 'qty', 'asc')
-    assert sorted_results[0]['quantity'] == 2.5
-    assert sorted_results[1]['quantity'] == 5.0
+    search_data = mock_api_client["post"].call_args[1]['json']
+    assert search_data['limit'] == search.SEARCH_PAGE_SIZE
+    assert search_data['sort'] == 'name'
+    assert search_data['direction'] == 'asc'
+    assert 'cursor' not in search_data
     
-    # Sort by quantity descending
-    sorted_results = search.sort_results(mock_search_results, 'qty', 'desc')
-    assert sorted_results[0]['quantity'] == 5.0
-    assert sorted_results[1]['quantity'] == 2.5
+    # The next page link follows the backend's cursor
+    assert b'cursor=abc123' in response.data
+    assert b'Page 1' in response.data
+
+def test_search_sort_click_sorts_on_backend(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results, mock_location_tree):
+    """Test that clicking a column header re-runs the search sorted by the backend"""
+    with client.session_transaction() as sess:
+        sess['user'] = 'testuser'
+        sess['role'] = 'technician'
+    
+    search_response = MagicMock()
+    search_response.status_code = 200
+    search_response.json.return_value = {"success": True, "results": mock_search_results}
+    mock_api_client["get"].return_value = mock_location_tree
+    mock_api_client["post"].return_value = search_response
+    
+    client.post('/search', data={'chemical_name': 'Acetone', 'building_name': 'Building 101'})
+    
+    # The backend's order is shown as returned
+    search_response.json.return_value = {"success": True, "results": list(reversed(mock_search_results))}
+    response = client.get('/search?sort=qty&direction=desc')
+    assert response.status_code == 200
+    rows = response.data[response.data.index(b'results-body'):]
+    assert rows.index(b'Ethanol') < rows.index(b'Acetone')
+    
+    search_data = mock_api_client["post"].call_args[1]['json']
+    assert search_data['name'] == 'Acetone'
+    assert search_data['building_name'] == 'Building 101'
+    assert search_data['sort'] == 'qty'
+    assert search_data['direction'] == 'desc'
+    assert 'cursor' not in search_data
+    
+    # The sort is kept for the next search
+    client.post('/search', data={'chemical_name': 'Ethanol'})
+    assert mock_api_client["post"].call_args[1]['json']['sort'] == 'qty'
+
+def test_search_next_page_passes_cursor(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results, mock_location_tree):
+    """Test that the next page link sends the cursor with the same criteria and sort"""
+    with client.session_transaction() as sess:
+        sess['user'] = 'testuser'
+        sess['role'] = 'technician'
+    
+    search_response = MagicMock()
+    search_response.status_code = 200
+    search_response.json.return_value = {"success": True, "results": mock_search_results[:1], "next_cursor": "abc123"}
+    mock_api_client["get"].return_value = mock_location_tree
+    mock_api_client["post"].return_value = search_response
+    
+    client.post('/search', data={'hazard_classification': 'flammable'})
+    
+    search_response.json.return_value = {"success": True, "results": mock_search_results[1:], "next_cursor": None}
+    response = client.get('/search?sort=name&direction=asc&cursor=abc123&page=2')
+    assert response.status_code == 200
+    assert b'Ethanol' in response.data
+    assert b'Page 2' in response.data
+    assert b'Next Page' not in response.data
+    
+    search_data = mock_api_client["post"].call_args[1]['json']
+    assert search_data['cursor'] == 'abc123'
+    assert search_data['hazard_classification'] == 'flammable'
+    assert search_data['sort'] == 'name'
 
 def test_chemical_details_authenticated(client, mock_session_user, mock_requests_get, mock_api_client, mock_chemical_details):
     """Test viewing chemical details with authenticated user"""
@@ -252,9 +340,9 @@ def test_chemical_details_authenticated(client, mock_session_user, mock_requests
     # Configure API response for chemical details
     chemical_response = MagicMock()
     chemical_response.status_code = 200
-    chemical_response.json.return_value = {"success": True, "chemical": mock_chemical_details}
+    chemical_response.json.return_value = {"success": True, "chemicals": [mock_chemical_details], "missing_ids": []}
     
-    mock_api_client["get"].return_value = chemical_response
+    mock_api_client["post"].return_value = chemical_response
     
     response = client.get('/search/chemical/1')
     assert response.status_code == 200
@@ -280,9 +368,9 @@ def test_receive_material(client, mock_session_user, mock_requests_get, mock_api
     # Configure API response for chemical details
     chemical_response = MagicMock()
     chemical_response.status_code = 200
-    chemical_response.json.return_value = {"success": True, "chemical": mock_chemical_details}
+    chemical_response.json.return_value = {"success": True, "chemicals": [mock_chemical_details], "missing_ids": []}
     
-    mock_api_client["get"].return_value = chemical_response
+    mock_api_client["post"].return_value = chemical_response
     
     form_data = {
         'scroll_position': '100'
@@ -303,9 +391,9 @@ def test_checkout_material(client, mock_session_user, mock_requests_get, mock_ap
     # Configure API response for chemical details
     chemical_response = MagicMock()
     chemical_response.status_code = 200
-    chemical_response.json.return_value = {"success": True, "chemical": mock_chemical_details}
+    chemical_response.json.return_value = {"success": True, "chemicals": [mock_chemical_details], "missing_ids": []}
     
-    mock_api_client["get"].return_value = chemical_response
+    mock_api_client["post"].return_value = chemical_response
     
     form_data = {
         'scroll_position': '100'
@@ -322,10 +410,11 @@ def test_update_inventory(client, mock_session_user, mock_api_client, mock_chemi
     with client.session_transaction() as sess:
         sess['user'] = 'testuser'
         sess['role'] = 'technician'
-        sess['search_results'] = [
-            {"id": 1, "name": "Acetone", "quantity": 2.5},
-            {"id": 2, "name": "Ethanol", "quantity": 5.0}
-        ]
+        sess['search_results_id'] = 'test-results'
+    search.result_store.put('test-results', [
+        {"id": 1, "name": "Acetone", "quantity": 2.5},
+        {"id": 2, "name": "Ethanol", "quantity": 5.0}
+    ])
     
     # Configure API responses
     update_response = MagicMock()
@@ -350,12 +439,58 @@ def test_update_inventory(client, mock_session_user, mock_api_client, mock_chemi
     assert "'quantity': 1.0" in str(update_call[1]['json'])
     assert "'action': 'add'" in str(update_call[1]['json'])
     
-    # Check session was updated with new quantity
+    # Check the stored search results were updated with the new quantity
+    search_results = search.result_store.get('test-results')
+    assert [item['quantity'] for item in search_results] == [3.5, 5.0]
+
+def test_search_results_stored_server_side(client, mock_session_user, mock_requests_get, mock_api_client, mock_search_results, mock_location_tree):
+    """Test that search results are kept in the result store and only their ID in the cookie"""
+    search_response = MagicMock()
+    search_response.status_code = 200
+    search_response.json.return_value = {"success": True, "results": mock_search_results}
+    mock_api_client["post"].return_value = search_response
+    
     with client.session_transaction() as sess:
-        search_results = sess.get('search_results', [])
-        for item in search_results:
-            if item['id'] == 1:
-                assert item['quantity'] == 3.5
+        sess['user'] = 'testuser'
+        sess['role'] = 'technician'
+    client.post('/search', data={'chemical_name': 'Acetone'})
+    
+    with client.session_transaction() as sess:
+        assert 'search_results' not in sess
+        result_id = sess['search_results_id']
+    assert search.result_store.get(result_id) == mock_search_results
+    
+    # Returning to the page reads the stored results back without searching again
+    mock_api_client["post"].reset_mock()
+    response = client.get('/search')
+    assert response.status_code == 200
+    assert b'Ethanol' in response.data
+    mock_api_client["post"].assert_not_called()
+
+def test_sqlite_result_store_limits(tmp_path):
+    """Test that the SQLite result store enforces its TTL and size limits"""
+    from result_store import SqliteResultStore
+    store = SqliteResultStore(str(tmp_path / 'results.sqlite3'), ttl=60, max_entry_bytes=200, max_total_bytes=250)
+    
+    first = [{"id": 1, "name": "x" * 50}]
+    second = [{"id": 2, "name": "y" * 50}]
+    assert store.put('first', first)
+    assert store.put('second', second)
+    assert store.get('first') == first
+    
+    # Over the total size limit the least recently used set is evicted
+    assert store.put('third', [{"id": 3, "name": "z" * 100}])
+    assert store.get('second') is None
+    assert store.get('first') == first
+    
+    # Oversized sets are not stored
+    assert not store.put('first', [{"id": 4, "name": "w" * 300}])
+    assert store.get('first') is None
+    
+    # Expired sets are gone
+    store.ttl = -1
+    assert store.put('expired', first)
+    assert store.get('expired') is None
 
 def test_update_inventory_invalid_quantity(client, mock_session_user, mock_requests_get, mock_api_client, mock_chemical_details):
     """Test updating inventory with invalid quantity"""
@@ -366,9 +501,9 @@ def test_update_inventory_invalid_quantity(client, mock_session_user, mock_reque
     # Configure API response for chemical details (needed for error rendering)
     chemical_response = MagicMock()
     chemical_response.status_code = 200
-    chemical_response.json.return_value = {"success": True, "chemical": mock_chemical_details}
+    chemical_response.json.return_value = {"success": True, "chemicals": [mock_chemical_details], "missing_ids": []}
     
-    mock_api_client["get"].return_value = chemical_response
+    mock_api_client["post"].return_value = chemical_response
     
     form_data = {
         'action': 'add',
@@ -380,12 +515,143 @@ def test_update_inventory_invalid_quantity(client, mock_session_user, mock_reque
     assert response.status_code == 200
     assert b'Quantity must be greater than zero' in response.data
 
+def test_api_client_get_cached_revalidates(mock_api_client, mock_location_tree):
+    """Test that a conditional GET reuses the stored response when the backend answers 304"""
+    not_modified_response = MagicMock()
+    not_modified_response.status_code = 304
+    mock_api_client["get"].side_effect = [mock_location_tree, not_modified_response]
+    
+    assert search.get_buildings() == ["Building 101", "Building 102"]
+    assert search.get_buildings() == ["Building 101", "Building 102"]
+    
+    # The second request revalidated the stored copy
+    assert mock_api_client["get"].call_args_list[1][1]['headers']['If-None-Match'] == '"tree-v1"'
+
+def test_api_client_refreshes_api_key_on_401():
+    """Test that the API key is cached and fetched again once the backend rejects it"""
+    unauthorized_response = MagicMock()
+    unauthorized_response.status_code = 401
+    ok_response = MagicMock()
+    ok_response.status_code = 200
+    mock_session = MagicMock()
+    mock_session.request.side_effect = [ok_response, unauthorized_response, ok_response]
+    
+    with patch('api_client.LOCAL_DEV', False), \
+         patch('api_client._api_key_entry', None), \
+         patch('api_client.get_session', return_value=mock_session), \
+         patch('api_client._fetch_api_key', side_effect=["old-key", "new-key"]) as mock_fetch:
+        assert api_client.get("http://backend/one").status_code == 200
+        assert api_client.get("http://backend/two").status_code == 200
+    
+    # The first key was reused until it was rejected, then the request was retried once
+    assert mock_fetch.call_count == 2
+    keys = [call[1]['headers']['X-API-Key'] for call in mock_session.request.call_args_list]
+    assert keys == ["old-key", "old-key", "new-key"]
+
+def test_api_client_fan_out():
+    """Test that page dependencies run concurrently and fall back on errors and the deadline"""
+    import threading
+    release = threading.Event()
+    
+    def fail():
+        raise RuntimeError("backend down")
+    
+    try:
+        page = api_client.fan_out({
+            'ok': (lambda value: value, ("result",), None),
+            'failed': (fail, (), "failed fallback"),
+            'slow': (release.wait, (5,), "slow fallback"),
+        }, deadline=0.2)
+    finally:
+        release.set()
+    
+    assert page == {'ok': "result", 'failed': "failed fallback", 'slow': "slow fallback"}
+
+def test_api_client_request_timeouts():
+    """Test that requests get a default timeout, capped to the page deadline inside fan_out"""
+    mock_session = MagicMock()
+    mock_session.request.return_value = Mock(status_code=200)
+    with patch('api_client.get_session', return_value=mock_session), \
+         patch('api_client.get_api_key', return_value=None):
+        api_client.get("http://backend/buildings")
+        assert mock_session.request.call_args[1]['timeout'] == api_client.API_TIMEOUT
+        
+        page = api_client.fan_out({
+            'buildings': (api_client.get, ("http://backend/buildings",), None),
+        }, deadline=0.9)
+        assert page['buildings'].status_code == 200
+        timeout = mock_session.request.call_args[1]['timeout']
+        assert timeout <= 0.9 / (api_client.API_RETRIES + 1), f"Timeout {timeout} outlives the page deadline"
+
+def test_search_page_uses_error_fragments_on_deadline(client, mock_api_client, mock_location_tree):
+    """Test that header and navigation that miss the page deadline fall back to the error HTML"""
+    with client.session_transaction() as sess:
+        sess['user'] = 'testuser'
+        sess['role'] = 'technician'
+    mock_api_client["get"].return_value = mock_location_tree
+    
+    with patch('api_client.fan_out', side_effect=lambda calls: {name: call[2] for name, call in calls.items()}):
+        response = client.get('/search')
+    assert response.status_code == 200
+    assert b'ChemTrack Search (Error Header)' in response.data
+    assert b'Search (Error)' in response.data
+
+def test_get_chemicals(mock_api_client, mock_chemical_details):
+    """Test getting details for several inventory items in one request"""
+    chemicals_response = MagicMock()
+    chemicals_response.status_code = 200
+    chemicals_response.json.return_value = {"success": False, "chemicals": [mock_chemical_details], "missing_ids": [7]}
+    mock_api_client["post"].return_value = chemicals_response
+    
+    chemicals = search.get_chemicals([1, 7])
+    assert list(chemicals) == [1]
+    assert chemicals[1]['name'] == 'Acetone'
+    
+    # One request for all the IDs
+    mock_api_client["post"].assert_called_once()
+    assert mock_api_client["post"].call_args[0][0].endswith('/backend/chemicals')
+    assert mock_api_client["post"].call_args[1]['json'] == {"ids": [1, 7]}
+    
+    # A missing item is None
+    assert search.get_chemical(7) is None
+
+def test_get_chemicals_failure(mock_api_client):
+    """Test that a backend failure yields no chemicals"""
+    chemicals_response = MagicMock()
+    chemicals_response.status_code = 500
+    mock_api_client["post"].return_value = chemicals_response
+    
+    assert search.get_chemicals([1]) == {}
+    assert search.get_chemicals([]) == {}
+
 def test_get_shared_header_success(mock_requests_get):
     """Test successfully getting shared header"""
     header = search.get_shared_header("testuser", True)
     assert "Test Header" in header
     mock_requests_get.assert_called_once()
 
+def test_get_shared_header_cached(mock_requests_get):
+    """Test that the header is served from the fragment cache and revalidated in the background"""
+    assert "Test Header" in search.get_shared_header("testuser", True)
+    assert "Test Header" in search.get_shared_header("testuser", True)
+    mock_requests_get.assert_called_once()
+    
+    # An expired copy is still served while a background thread revalidates it
+    not_modified_response = Mock()
+    not_modified_response.status_code = 304
+    not_modified_response.headers = {"ETag": '"header-v1"', "X-Templates-Version": "v1"}
+    with patch('api_client.FRAGMENT_TTL', 0), patch('api_client.threading.Thread') as mock_thread:
+        assert "Test Header" in search.get_shared_header("testuser", True)
+        mock_thread.assert_called_once()
+        revalidate = mock_thread.call_args[1]
+    mock_requests_get.side_effect = None
+    mock_requests_get.return_value = not_modified_response
+    revalidate['target'](*revalidate['args'])
+    
+    assert mock_requests_get.call_args[1]['headers'] == {'If-None-Match': '"header-v1"'}
+    assert "Test Header" in search.get_shared_header("testuser", True)
+    assert mock_requests_get.call_count == 2
+
 def test_get_shared_header_failure(mock_requests_get):
     """Test fallback when shared header fails"""
     # Configure the mock to simulate a failure
@@ -409,14 +675,9 @@ def test_get_shared_navigation_failure(mock_requests_get):
     nav = search.get_shared_navigation("technician", "search")
     assert "Search (Error)" in nav
 
-def test_get_buildings_success(mock_api_client):
-    """Test successfully getting buildings list"""
-    # Configure API response for buildings
-    buildings_response = MagicMock()
-    buildings_response.status_code = 200
-    buildings_response.json.return_value = {"success": True, "buildings": ["Building 101", "Building 102"]}
-    
-    mock_api_client["get"].return_value = buildings_response
+def test_get_buildings_success(mock_api_client, mock_location_tree):
+    """Test successfully getting buildings list from the location tree"""
+    mock_api_client["get"].return_value = mock_location_tree
     
     buildings = search.get_buildings()
     assert len(buildings) == 2
@@ -425,37 +686,34 @@ def test_get_buildings_success(mock_api_client):
 
 def test_get_buildings_failure(mock_api_client):
     """Test handling failure when getting buildings"""
-    # Configure API response for buildings to return failure
-    buildings_response = MagicMock()
-    buildings_response.status_code = 500
+    # Configure API response for the location tree to return failure
+    location_tree_response = MagicMock()
+    location_tree_response.status_code = 500
     
-    mock_api_client["get"].return_value = buildings_response
+    mock_api_client["get"].return_value = location_tree_response
     
     buildings = search.get_buildings()
     assert buildings == []
 
-def test_get_lab_rooms_success(mock_api_client):
-    """Test successfully getting lab rooms for a building"""
-    # Configure API response for lab rooms
-    lab_rooms_response = MagicMock()
-    lab_rooms_response.status_code = 200
-    lab_rooms_response.json.return_value = {"success": True, "lab_rooms": [201, 202, 203]}
-    
-    mock_api_client["get"].return_value = lab_rooms_response
+def test_get_lab_rooms_success(mock_api_client, mock_location_tree):
+    """Test successfully getting lab rooms for a building from the location tree"""
+    mock_api_client["get"].return_value = mock_location_tree
     
     lab_rooms = search.get_lab_rooms("Building 101")
-    assert len(lab_rooms) == 3
-    assert 201 in lab_rooms
-    assert 202 in lab_rooms
-    assert 203 in lab_rooms
+    assert lab_rooms == [201, 202, 203]
+    
+    # A tree already in hand is reused without another request
+    tree = mock_location_tree.json.return_value["buildings"]
+    assert search.get_lab_rooms("Building 102", tree) == [101]
+    assert mock_api_client["get"].call_count == 1
 
 def test_get_lab_rooms_failure(mock_api_client):
     """Test handling failure when getting lab rooms"""
-    # Configure API response for lab rooms to return failure
-    lab_rooms_response = MagicMock()
-    lab_rooms_response.status_code = 500
+    # Configure API response for the location tree to return failure
+    location_tree_response = MagicMock()
+    location_tree_response.status_code = 500
     
-    mock_api_client["get"].return_value = lab_rooms_response
+    mock_api_client["get"].return_value = location_tree_response
     
     lab_rooms = search.get_lab_rooms("Building 101")
     assert lab_rooms == []
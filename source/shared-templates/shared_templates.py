@@ -1,5 +1,6 @@
 import os
 import time
+import hashlib
 from flask import Flask, render_template, request, redirect, url_for, jsonify, send_from_directory
 import logging
 
@@ -35,6 +36,28 @@ else:
     logger.info(f'Admin URL: {PRC_ADMIN}')
     logger.info(f'Recipes URL: {PRC_RECIPES}')
 
+def templates_version():
+    """Hash of the shared templates and the URLs rendered into them"""
+    digest = hashlib.sha256()
+    template_dir = os.path.join(app.root_path, app.template_folder, 'shared')
+    for name in sorted(os.listdir(template_dir)):
+        with open(os.path.join(template_dir, name), 'rb') as f:
+            digest.update(name.encode() + b'\0' + f.read())
+    for url in (PRC_BACKEND, PRC_MAIN, PRC_SEARCH, PRC_STATIC, PRC_ADMIN, PRC_RECIPES, PRC_REPORTS):
+        digest.update(url.encode() + b'\0')
+    return digest.hexdigest()[:16]
+
+# Sent as X-Templates-Version so frontends can tell when a deployment changed the templates
+TEMPLATES_VERSION = templates_version()
+
+def fragment_response(html):
+    """Response for a rendered fragment with an ETag, answering If-None-Match with 304"""
+    response = app.make_response(html)
+    response.headers['X-Templates-Version'] = TEMPLATES_VERSION
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
 # Middleware to track request metrics
 @app.before_request
 def before_request():
@@ -53,11 +76,11 @@ def header():
     username = request.args.get('username', '')
     user_account_enabled = request.args.get('user_account_enabled', 'false').lower() == 'true'
     
-    return render_template('shared/header.html', 
+    return fragment_response(render_template('shared/header.html', 
                           username=username,
                           static_url=PRC_STATIC + "/static",
                           user_account_enabled=user_account_enabled,
-                          main_url=PRC_MAIN)
+                          main_url=PRC_MAIN))
 
 @app.route('/shared-templates/navigation')
 def navigation():
@@ -68,7 +91,7 @@ def navigation():
     current_path = request.args.get('current_path', '')
     
     logger.info(f'>>> Admin URL: {PRC_ADMIN}')
-    return render_template('shared/navigation.html', 
+    return fragment_response(render_template('shared/navigation.html', 
                           role=role,
                           active_page=active_page,
                           current_path=current_path,
@@ -76,7 +99,7 @@ def navigation():
                           search_url=PRC_SEARCH + '/search',
                           recipes_url=PRC_RECIPES,
                           reports_url=PRC_REPORTS,
-                          admin_url=PRC_ADMIN)
+                          admin_url=PRC_ADMIN))
 
 @app.route('/shared-templates/base_layout')
 def base_layout():